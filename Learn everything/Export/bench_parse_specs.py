@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark parser của specs_engine.py (dùng bởi export.py / export_specs_batch.py):
+  bản cũ : parse_title(html) + parse_specs(html) -> 2 lần BeautifulSoup, fallback gọi get_text cho mọi table/div/section
+  bản mới: PageContext(html) parse 1 lần + TextIndex tính text các tag 1 lượt từ dưới lên
+- Đầu vào: file HTML trang sản phẩm đã lưu (--html a.html b.html ...).
+  Không truyền thì tự dựng 2 trang mẫu: có heading "Thông số kỹ thuật" và trang phải đi fallback (DOM lồng sâu).
+- Kiểm tra 2 cách cho kết quả giống hệt rồi in thời gian CPU/trang.
+- Cách chạy: python bench_parse_specs.py --html saved/*.html --repeat 10
+"""
+
+import argparse
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+import specs_engine as engine
+from specs_engine import normalize_space
+
+# ---------- Bản cũ (giữ nguyên để so sánh) ----------
+def legacy_find_specs_root(soup: BeautifulSoup):
+    heading = soup.find(
+        lambda tag: tag.name in ["h1","h2","h3","h4","strong","p","span"]
+        and tag.get_text(strip=True)
+        and re.search(r"thông\s*số\s*kỹ\s*thuật", tag.get_text(strip=True), re.I)
+    )
+    if heading:
+        nxt = heading.find_next(lambda t: t.name in ["ul","ol","table","div","section"])
+        if nxt:
+            return nxt
+    for tb in soup.find_all("table"):
+        ttext = normalize_space(tb.get_text(" ", strip=True)).lower()
+        if any(k in ttext for k in engine.TABLE_KEYWORDS):
+            return tb
+    for d in soup.find_all(["div","section"]):
+        t = normalize_space(d.get_text(" ", strip=True)).lower()
+        if ("thông số" in t and "kỹ thuật" in t) or \
+           sum(1 for kw in engine.BLOCK_KEYWORDS if kw in t) >= 2:
+            return d
+    return None
+
+def legacy_parse_specs(html: str):
+    soup = BeautifulSoup(html, "lxml")
+    root = legacy_find_specs_root(soup)
+    if not root:
+        return {}
+    if root.name == "table":
+        kv = engine.extract_kv_from_table(root)
+    elif root.name in ["ul","ol"]:
+        kv = engine.extract_kv_from_list(root)
+    else:
+        table = root.find("table")
+        if table:
+            kv = engine.extract_kv_from_table(table)
+        else:
+            lst = root.find(["ul","ol"])
+            kv = engine.extract_kv_from_list(lst) if lst else engine.extract_kv_from_block(root)
+    specs = {}
+    for k, v in kv:
+        specs.setdefault(k, v)
+    return specs
+
+def run_legacy(html: str):
+    return engine.parse_title(html), legacy_parse_specs(html)
+
+def run_fast(html: str):
+    page = engine.PageContext(html)
+    return engine.parse_title(page), engine.parse_specs(page)
+
+# ---------- Trang mẫu ----------
+def synthetic_pages(depth: int = 12, n_blocks: int = 60, n_specs: int = 25):
+    menu = "".join(f'<li><a href="/danh-muc/{i}">Danh mục {i}</a></li>' for i in range(300))
+    blocks = "".join("<div>" * depth + f"<p>Nội dung mô tả {i} với vài câu văn.</p>" + "</div>" * depth
+                     for i in range(n_blocks))
+    rows = "".join(f"<li>Thuộc tính {i}<br>Giá trị {i}</li>" for i in range(n_specs))
+    rows += "<li>Kích thước<br>30 x 20 cm</li><li>Xuất xứ<br>Việt Nam</li>"
+    body = f"<header><ul>{menu}</ul></header><h1>Nồi cơm điện Sunhouse</h1>{blocks}"
+    with_heading = (f"<html><head><title>Nồi cơm | Sunhouse</title></head><body>{body}"
+                    f"<h2>Thông số kỹ thuật</h2><ul>{rows}</ul><footer><ul>{menu}</ul></footer></body></html>")
+    # Không có heading -> phải dò table/div/section theo từ khóa; khối specs nằm sâu trong DOM
+    fallback = (f"<html><head><title>Nồi cơm | Sunhouse</title></head><body>{body}"
+                + "<section>" * depth + f"<div class='specs'><ul>{rows}</ul></div>" + "</section>" * depth
+                + f"<footer><ul>{menu}</ul></footer></body></html>")
+    return {"heading": with_heading, "fallback": fallback}
+
+def bench(fn, html: str, repeat: int) -> float:
+    t0 = time.process_time()
+    for _ in range(repeat):
+        fn(html)
+    return (time.process_time() - t0) / repeat
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark parse_title+parse_specs: bản cũ vs parse 1 lần")
+    ap.add_argument("--html", nargs="*", default=None, help="File HTML trang sản phẩm đã lưu")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.html:
+        pages = {p: open(p, "r", encoding="utf-8", errors="replace").read() for p in args.html}
+    else:
+        pages = synthetic_pages()
+
+    t_old = t_new = 0.0
+    for name, html in pages.items():
+        assert run_legacy(html) == run_fast(html), f"Kết quả khác nhau ở {name}"
+        a, b = bench(run_legacy, html, args.repeat), bench(run_fast, html, args.repeat)
+        t_old += a
+        t_new += b
+        print(f"{name}: cũ {a * 1000:.1f} ms | mới {b * 1000:.1f} ms (x{a / b:.1f})")
+    print(f"{len(pages)} trang x {args.repeat} lần | kết quả giống hệt")
+    print(f"Tổng CPU/lượt: cũ {t_old * 1000:.1f} ms | mới {t_new * 1000:.1f} ms (x{t_old / t_new:.1f})")
+
+if __name__ == "__main__":
+    main()
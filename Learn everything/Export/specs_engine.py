@@ -0,0 +1,437 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Engine dùng chung để trích "Thông số kỹ thuật" trang sản phẩm Sunhouse:
+- export.py / export_specs.py  : chế độ 1 URL (export_url)
+- export_specs_batch.py        : chế độ batch (run_pipeline + StreamingSpecsWriter)
+- Tải HTML qua 1 requests.Session (pool kết nối keep-alive, dùng chung mọi luồng tải)
+  + cache HTML trên đĩa shg_common/http_cache (cùng thư mục cho mọi script).
+  Mặc định luôn hỏi lại server bằng ETag/Last-Modified (304 -> dùng bản cache, không tải lại body);
+  chạy với --cache-max-age N thì mục tải/xác nhận trong N giây được dùng luôn, không gọi mạng.
+- Parser: parse HTML 1 lần (PageContext) + TextIndex cho các bước dò từ khóa.
+Yêu cầu: pip install requests beautifulsoup4 lxml pandas
+"""
+
+import re
+import os
+import sys
+import json
+import time
+import queue
+import bisect
+import threading
+import concurrent.futures as cf
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "shg_common"))
+import http_cache
+from http_cache import HttpCache
+
+# ================= Utils =================
+
+UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/123.0.0.0 Safari/537.36"
+)
+
+def normalize_space(s: str) -> str:
+    return re.sub(r"\s+", " ", s or "").strip()
+
+def slugify(s: str, fallback: str = "product") -> str:
+    s = normalize_space(s).lower()
+    s = re.sub(r"[^\w\s-]", "", s, flags=re.UNICODE)
+    s = re.sub(r"[\s_-]+", "-", s).strip("-")
+    return s or fallback
+
+# ================= Tải HTML (session pool + cache đĩa) =================
+
+# 0 = lần nào cũng xác nhận lại (GET có điều kiện); --cache-max-age N để bỏ qua mạng trong N giây
+DEFAULT_CACHE_MAX_AGE = 0
+
+# Cache HTML trên đĩa (dùng chung với sunhouse_crawler/check_links); configure() bật theo CLI
+HTTP_CACHE = HttpCache(enabled=False)
+SESSION: Optional[requests.Session] = None
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """1 Session cho mọi luồng tải: giữ kết nối keep-alive, pool đủ lớn cho số luồng."""
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers["User-Agent"] = UA
+    return s
+
+def add_cli_args(parser):
+    http_cache.add_cli_args(parser, default_max_age=DEFAULT_CACHE_MAX_AGE)
+
+def configure(args, pool_size: int = 10):
+    """Gọi 1 lần trong main(): bật cache theo cờ CLI và tạo session pool."""
+    global HTTP_CACHE, SESSION
+    HTTP_CACHE = http_cache.from_args(args)
+    SESSION = make_session(pool_size)
+
+def fetch_html(url: str, timeout: int = 30, max_retries: int = 2, delay: float = 1.0) -> str:
+    headers = {"User-Agent": UA}
+    last_err = None
+    for attempt in range(max_retries + 1):
+        try:
+            r = HTTP_CACHE.get(url, session=SESSION, headers=headers, timeout=timeout)
+            r.raise_for_status()
+            r.encoding = r.apparent_encoding or "utf-8"
+            return r.text
+        except Exception as e:
+            last_err = e
+            if attempt < max_retries:
+                time.sleep(delay)
+    raise last_err
+
+# ================= Parsers =================
+
+SPECS_HEADING_RE = re.compile(r"thông\s*số\s*kỹ\s*thuật", re.I)
+HEADING_TAGS = ["h1","h2","h3","h4","strong","p","span"]
+TABLE_KEYWORDS = [
+    "kích thước","chất liệu","xuất xứ","bảo hành","đường kính",
+    "công suất","trọng lượng","dung tích","mã sản phẩm"
+]
+BLOCK_KEYWORDS = ["kích thước","chất liệu","xuất xứ","bảo hành","mã sản phẩm"]
+# Chuỗi mà tag.get_text() tính (bỏ comment, script/style...)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+class TextIndex:
+    """
+    Text của mọi tag, tính 1 lượt từ dưới lên thay vì gọi get_text() cho từng table/div/section
+    (lồng nhau sâu -> O(n * độ sâu)).
+    - Nối mọi chuỗi (đã strip) của trang theo thứ tự tài liệu; chuỗi của 1 tag luôn là 1 đoạn liên tiếp
+      -> mỗi tag chỉ cần lưu [đầu, cuối) trên chuỗi nối.
+    - spaced: normalize_space(get_text(" ", strip=True)).lower()  (dò từ khóa)
+      tight : get_text(strip=True)                                 (dò heading)
+    - Tag chứa từ khóa <=> có 1 vị trí xuất hiện của từ khóa nằm trọn trong đoạn của tag (bisect).
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        spaced_parts: List[str] = []
+        tight_parts: List[str] = []
+        spaced_len = tight_len = 0
+        self.spans: Dict[int, Tuple[int, int, int, int]] = {}
+        stack: List[Tuple[Tag, int, int]] = []
+
+        def close_until(parent):
+            while stack and stack[-1][0] is not parent:
+                tag, s0, t0 = stack.pop()
+                # -1: bỏ dấu cách nối sau chuỗi cuối của tag
+                self.spans[id(tag)] = (s0, max(s0, spaced_len - 1), t0, tight_len)
+
+        for node in soup.descendants:
+            close_until(node.parent)
+            if isinstance(node, Tag):
+                stack.append((node, spaced_len, tight_len))
+            elif type(node) in TEXT_STRING_TYPES:
+                stripped = node.strip()
+                if stripped:
+                    piece = normalize_space(stripped).lower() + " "
+                    spaced_parts.append(piece)
+                    spaced_len += len(piece)
+                    tight_parts.append(stripped)
+                    tight_len += len(stripped)
+        close_until(None)
+        self.spaced = "".join(spaced_parts)
+        self.tight = "".join(tight_parts)
+        self._hits: Dict[str, List[int]] = {}
+        self.heading_hits = [(m.start(), m.end()) for m in SPECS_HEADING_RE.finditer(self.tight)]
+
+    def _positions(self, kw: str) -> List[int]:
+        pos = self._hits.get(kw)
+        if pos is None:
+            pos, i = [], self.spaced.find(kw)
+            while i != -1:
+                pos.append(i)
+                i = self.spaced.find(kw, i + 1)
+            self._hits[kw] = pos
+        return pos
+
+    def contains(self, tag: Tag, kw: str) -> bool:
+        """kw in normalize_space(tag.get_text(" ", strip=True)).lower()"""
+        start, end = self.spans[id(tag)][:2]
+        pos = self._positions(kw)
+        i = bisect.bisect_left(pos, start)
+        return i < len(pos) and pos[i] + len(kw) <= end
+
+    def has_specs_heading(self, tag: Tag) -> bool:
+        """tag.get_text(strip=True) khớp SPECS_HEADING_RE"""
+        start, end = self.spans[id(tag)][2:]
+        i = bisect.bisect_left(self.heading_hits, (start, -1))
+        return i < len(self.heading_hits) and self.heading_hits[i][1] <= end
+
+class PageContext:
+    """Parse HTML đúng 1 lần; parse_title/parse_specs dùng chung soup và TextIndex."""
+
+    def __init__(self, html: str):
+        self.soup = BeautifulSoup(html, "lxml")
+        self._index: Optional[TextIndex] = None
+
+    @property
+    def index(self) -> TextIndex:
+        if self._index is None:
+            self._index = TextIndex(self.soup)
+        return self._index
+
+def as_page(page) -> PageContext:
+    return page if isinstance(page, PageContext) else PageContext(page)
+
+def find_specs_root(soup: BeautifulSoup, index: Optional[TextIndex] = None):
+    """Tìm khối 'Thông số kỹ thuật' (ưu tiên heading -> block ngay sau)."""
+    index = index or TextIndex(soup)
+    heading = next((tag for tag in soup.find_all(HEADING_TAGS) if index.has_specs_heading(tag)), None)
+    if heading:
+        nxt = heading.find_next(lambda t: t.name in ["ul","ol","table","div","section"])
+        if nxt:
+            return nxt
+
+    # Fallback: table có từ khóa
+    for tb in soup.find_all("table"):
+        if any(index.contains(tb, k) for k in TABLE_KEYWORDS):
+            return tb
+
+    # Fallback: div/section giàu từ khóa
+    for d in soup.find_all(["div","section"]):
+        if (index.contains(d, "thông số") and index.contains(d, "kỹ thuật")) or \
+           sum(1 for kw in BLOCK_KEYWORDS if index.contains(d, kw)) >= 2:
+            return d
+    return None
+
+def extract_kv_from_table(table) -> List[Tuple[str, str]]:
+    out = []
+    for tr in table.find_all("tr"):
+        cells = tr.find_all(["th","td"])
+        if len(cells) >= 2:
+            key = normalize_space(cells[0].get_text(" ", strip=True))
+            val = normalize_space(" ".join(c.get_text(" ", strip=True) for c in cells[1:]))
+            if key and val:
+                out.append((key, val))
+    return out
+
+def extract_kv_from_list(list_tag) -> List[Tuple[str, str]]:
+    """
+    Nhiều trang dùng <li> với nhãn dòng 1 + giá trị ở các dòng sau.
+    Lấy phần đầu làm key, phần còn lại nối lại làm value.
+    """
+    out = []
+    for li in list_tag.find_all("li"):
+        parts = [p.strip() for p in li.stripped_strings if p and p.strip()]
+        if not parts:
+            continue
+        key = parts[0]
+        val = " ".join(parts[1:]).strip()
+        if not val or len(key) > 200:
+            continue
+        out.append((normalize_space(key), normalize_space(val)))
+    return out
+
+def extract_kv_from_block(block) -> List[Tuple[str, str]]:
+    """Nếu chỉ có khối văn bản: tách theo 'label: value'."""
+    text = block.get_text("\n", strip=True)
+    lines = [normalize_space(x) for x in text.split("\n") if normalize_space(x)]
+    out = []
+    for line in lines:
+        if re.search(r"thông\s*số\s*kỹ\s*thuật", line, re.I):
+            continue
+        parts = re.split(r"\s*[:：]\s*", line, maxsplit=1)
+        if len(parts) == 2:
+            key, val = parts
+            if key and val:
+                out.append((key, val))
+    return out
+
+def parse_specs(page) -> Dict[str, str]:
+    """page: HTML (str) hoặc PageContext đã parse."""
+    page = as_page(page)
+    specs_root = find_specs_root(page.soup, page.index)
+    if not specs_root:
+        return {}
+    if specs_root.name == "table":
+        kv = extract_kv_from_table(specs_root)
+    elif specs_root.name in ["ul","ol"]:
+        kv = extract_kv_from_list(specs_root)
+    else:
+        table = specs_root.find("table")
+        if table:
+            kv = extract_kv_from_table(table)
+        else:
+            lst = specs_root.find(["ul","ol"])
+            if lst:
+                kv = extract_kv_from_list(lst)
+            else:
+                kv = extract_kv_from_block(specs_root)
+    specs = {}
+    for k, v in kv:
+        if k not in specs:
+            specs[k] = v
+    return specs
+
+def parse_title(page) -> Optional[str]:
+    """page: HTML (str) hoặc PageContext đã parse."""
+    soup = as_page(page).soup
+    if soup.find("h1") and normalize_space(soup.find("h1").get_text()):
+        return normalize_space(soup.find("h1").get_text())
+    if soup.title and normalize_space(soup.title.get_text()):
+        title = normalize_space(soup.title.get_text())
+        return re.sub(r"\s*\|\s*.*$", "", title).strip()
+    return None
+
+# ================= I/O helpers =================
+
+URL_RE = re.compile(r"""(?ix)
+    \bhttps?://[^\s)<>"']+
+""")
+
+def read_urls_from_file(path: str) -> List[str]:
+    """
+    - .txt: mỗi dòng 1 URL (bỏ dòng trống, # comment)
+    - .md : trích tất cả URL (pattern http/https) trong file Markdown
+    """
+    urls: List[str] = []
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    if ext == ".md":
+        urls = URL_RE.findall(content)
+    else:
+        # coi như .txt
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            m = URL_RE.search(line)
+            if m:
+                urls.append(m.group(0))
+
+    # loại trùng, giữ thứ tự
+    seen = set()
+    uniq = []
+    for u in urls:
+        if u not in seen:
+            uniq.append(u)
+            seen.add(u)
+    return uniq
+
+def ensure_outdir(outdir: str):
+    os.makedirs(outdir, exist_ok=True)
+
+def save_per_product(outdir: str, url: str, title: Optional[str], specs: Dict[str, str]) -> Tuple[str, str]:
+    # Dùng mã sản phẩm nếu có để đặt tên
+    code = None
+    for k in specs:
+        if re.search(r"mã\s*sản\s*phẩm", k, re.I):
+            code = specs[k]
+            break
+    base = " ".join([p for p in [code, title] if p]) or url.split("/")[-1] or "product"
+    fname = slugify(base)
+
+    # JSON
+    json_path = os.path.join(outdir, f"{fname}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "title": title, "specs": specs}, f, ensure_ascii=False, indent=2)
+
+    # CSV (2 cột)
+    csv_path = os.path.join(outdir, f"{fname}.csv")
+    rows = [{"thuoc_tinh": k, "gia_tri": v} for k, v in specs.items()]
+    pd.DataFrame(rows).to_csv(csv_path, index=False, encoding="utf-8-sig")
+    return json_path, csv_path
+
+# ================= Worker =================
+
+def process_one(url: str, timeout: int) -> Dict:
+    try:
+        html = fetch_html(url, timeout=timeout)
+        page = PageContext(html)  # parse 1 lần cho cả title + specs
+        title = parse_title(page)
+        specs = parse_specs(page)
+        ok = bool(specs)
+        return {"url": url, "title": title, "specs": specs, "ok": ok, "error": None}
+    except Exception as e:
+        return {"url": url, "title": None, "specs": {}, "ok": False, "error": str(e)}
+
+def export_url(url: str, outdir: str = "exports", timeout: int = 30) -> Dict:
+    """Chế độ 1 URL: tải (qua session + cache) -> parse -> exports/<slug>.json + .csv. Thêm key "paths" nếu OK."""
+    res = process_one(url, timeout)
+    if res["ok"]:
+        ensure_outdir(outdir)
+        res["paths"] = save_per_product(outdir, url, res["title"], res["specs"])
+    return res
+
+def parse_one(url: str, html: str) -> Dict:
+    """Tầng parse (chạy trong process con, không bị GIL của luồng tải giữ lại)."""
+    try:
+        page = PageContext(html)
+        title = parse_title(page)
+        specs = parse_specs(page)
+        return {"url": url, "title": title, "specs": specs, "ok": bool(specs), "error": None}
+    except Exception as e:
+        return {"url": url, "title": None, "specs": {}, "ok": False, "error": str(e)}
+
+def run_pipeline(urls: List[str], timeout: int, fetch_workers: int, parse_workers: int,
+                 queue_size: int = 0):
+    """
+    Tải và parse tách 2 tầng, trả kết quả (dict như process_one) theo thứ tự hoàn thành.
+    - fetch_workers luồng tải HTML -> queue.Queue(maxsize=queue_size): đầy thì luồng tải đứng chờ (backpressure).
+    - Luồng chính lấy HTML từ hàng đợi giao cho ProcessPoolExecutor(parse_workers); chỉ giữ tối đa
+      2 x parse_workers việc parse đang chạy, nên hàng đợi không bị rút cạn vào RAM của pool.
+    - parse_workers = 0: parse ngay trong luồng chính (không tạo process).
+    """
+    queue_size = queue_size or max(2, 2 * max(parse_workers, 1))
+    html_q: "queue.Queue[Tuple[str, Optional[str], Optional[str]]]" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item):
+        # put có timeout để luồng tải thoát được khi luồng chính dừng (Ctrl+C) trong lúc hàng đợi đầy
+        while not stop.is_set():
+            try:
+                html_q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def fetch_worker(url: str):
+        if stop.is_set():
+            return
+        try:
+            put((url, fetch_html(url, timeout=timeout), None))
+        except Exception as e:
+            put((url, None, str(e)))
+
+    max_pending = 2 * max(parse_workers, 1)
+    with cf.ThreadPoolExecutor(max_workers=fetch_workers) as fx, \
+            (cf.ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else nullcontext()) as px:
+        try:
+            for u in urls:
+                fx.submit(fetch_worker, u)
+            received = 0
+            pending = set()
+            while received < len(urls) or pending:
+                if pending and (received == len(urls) or len(pending) >= max_pending):
+                    done, pending = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                    for fut in done:
+                        yield fut.result()
+                    continue
+                url, html, err = html_q.get()
+                received += 1
+                if err is not None:
+                    yield {"url": url, "title": None, "specs": {}, "ok": False, "error": err}
+                elif px is None:
+                    yield parse_one(url, html)
+                else:
+                    pending.add(px.submit(parse_one, url, html))
+        finally:
+            stop.set()
+            fx.shutdown(wait=False, cancel_futures=True)
+            if px is not None:
+                px.shutdown(wait=False, cancel_futures=True)
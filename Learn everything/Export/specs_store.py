@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Kho thông số dạng cột (Parquet/Arrow) cho export_specs_batch.py.
+- all_specs.parquet/ : thư mục part-*.parquet, mỗi dòng (url, title, thuoc_tinh, attr_key, gia_tri);
+  thuoc_tinh + attr_key lưu dạng dictionary (vài trăm tên thuộc tính lặp lại cho hàng nghìn sản phẩm).
+- attr_key: tên thuộc tính đã chuẩn hoá (bỏ dấu tiếng Việt, đ->d, chữ thường, gộp khoảng trắng, bỏ ':' cuối)
+  -> "Công suất", "CÔNG SUẤT:" và "Cong suat" gộp làm 1 cột. Có cache (lru_cache) vì tên lặp lại rất nhiều.
+- Xuất bảng rộng (1 dòng / sản phẩm, 1 cột / attr_key) không cần pandas pivot:
+    python specs_store.py wide all_specs.parquet --out all_specs_wide.xlsx
+- Dựng kho từ dữ liệu cũ: python specs_store.py build all_specs.jsonl --out all_specs.parquet
+Yêu cầu: pip install pyarrow
+"""
+
+import argparse
+import functools
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow là tuỳ chọn: export_specs_batch vẫn chạy, chỉ không ghi Parquet
+    pa = pq = None
+
+SCHEMA = None
+if pa is not None:
+    SCHEMA = pa.schema([
+        ("url", pa.string()),
+        ("title", pa.string()),
+        ("thuoc_tinh", pa.dictionary(pa.int32(), pa.string())),
+        ("attr_key", pa.dictionary(pa.int32(), pa.string())),
+        ("gia_tri", pa.string()),
+    ])
+
+def require_pyarrow():
+    if pa is None:
+        raise SystemExit("Cần pyarrow để ghi/đọc Parquet: pip install pyarrow")
+
+@functools.lru_cache(maxsize=65536)
+def attr_key(name: str) -> str:
+    """'Công suất:' / 'CÔNG SUẤT' / 'Cong  suat' -> 'cong suat'"""
+    s = unicodedata.normalize("NFD", name or "")
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.replace("đ", "d").replace("Đ", "D").lower()
+    s = re.sub(r"\s+", " ", s).strip()
+    return s.rstrip(" :：").strip()
+
+class SpecsParquetWriter:
+    """Gom dòng trong RAM tới rows_per_part rồi ghi 1 file part (file nào cũng đọc được ngay, kể cả khi crash)."""
+
+    def __init__(self, path: str, rows_per_part: int = 20000):
+        require_pyarrow()
+        self.path = Path(path)
+        self.rows_per_part = rows_per_part
+        self.path.mkdir(parents=True, exist_ok=True)
+        for old in self.path.glob("part-*.parquet"):
+            old.unlink()
+        self._part = 0
+        self._cols: Dict[str, List[Optional[str]]] = {name: [] for name in SCHEMA.names}
+
+    def add(self, url: str, title: Optional[str], specs: Dict[str, str]):
+        for k, v in specs.items():
+            self._cols["url"].append(url)
+            self._cols["title"].append(title)
+            self._cols["thuoc_tinh"].append(k)
+            self._cols["attr_key"].append(attr_key(k))
+            self._cols["gia_tri"].append(v)
+        if len(self._cols["url"]) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self._cols["url"]:
+            return
+        arrays = []
+        for field in SCHEMA:
+            values = self._cols[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        table = pa.Table.from_arrays(arrays, schema=SCHEMA)
+        target = self.path / f"part-{self._part:05d}.parquet"
+        tmp = target.with_name(target.name + ".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, target)
+        self._part += 1
+        self._cols = {name: [] for name in SCHEMA.names}
+
+    def close(self):
+        self.flush()
+
+def read_store(path: str) -> "pa.Table":
+    require_pyarrow()
+    p = Path(path)
+    files = sorted(p.glob("part-*.parquet")) if p.is_dir() else [p]
+    if not files:
+        return SCHEMA.empty_table()
+    tables = [pq.read_table(f) for f in files]
+    return pa.concat_tables(tables).unify_dictionaries().combine_chunks()
+
+def wide_table(table: "pa.Table") -> "pa.Table":
+    """
+    1 dòng / url, 1 cột / attr_key (nhãn cột = cách viết gặp đầu tiên). Trùng key trong 1 sản phẩm -> giữ giá trị đầu
+    (giống parse_specs giữ key đầu tiên). Làm hoàn toàn trên mã dictionary (numpy), không so chuỗi từng ô.
+    """
+    import numpy as np
+    import pyarrow.compute as pc
+
+    n = table.num_rows
+    url_dict = pc.dictionary_encode(table.column("url")).combine_chunks()
+    row_codes = url_dict.indices.to_numpy(zero_copy_only=False)
+    key_codes = table.column("attr_key").combine_chunks().indices.to_numpy(zero_copy_only=False)
+    n_rows = len(url_dict.dictionary)
+
+    # đánh số lại cột theo thứ tự xuất hiện đầu tiên
+    uniq_keys, first_pos = np.unique(key_codes, return_index=True)
+    order = np.argsort(first_pos)
+    remap = np.empty(uniq_keys.max() + 1 if len(uniq_keys) else 0, dtype=np.int64)
+    remap[uniq_keys[order]] = np.arange(len(order))
+    col_codes = remap[key_codes] if n else key_codes
+    n_cols = len(order)
+
+    # ô (dòng, cột) xuất hiện nhiều lần -> lấy lần đầu
+    cell = row_codes.astype(np.int64) * max(n_cols, 1) + col_codes
+    _, first_idx = np.unique(cell, return_index=True)
+    grid = np.full(n_rows * n_cols, None, dtype=object)
+    grid[cell[first_idx]] = table.column("gia_tri").combine_chunks().to_numpy(zero_copy_only=False)[first_idx]
+    grid = grid.reshape(n_rows, n_cols)
+
+    _, row_first = np.unique(row_codes, return_index=True)
+    titles = table.column("title").combine_chunks().take(pa.array(row_first)) if n else pa.array([], pa.string())
+    labels = table.column("thuoc_tinh").combine_chunks().take(pa.array(first_pos[order])).to_pylist() if n else []
+
+    columns = {"url": url_dict.dictionary, "title": titles}
+    for c, label in enumerate(labels):
+        name = label if label not in columns else f"{label} ({c})"
+        columns[name] = pa.array(grid[:, c], type=pa.string())
+    return pa.table(columns)
+
+def export_wide(store_path: str, out_path: str) -> int:
+    wide = wide_table(read_store(store_path))
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext == ".parquet":
+        pq.write_table(wide, out_path)
+    elif ext == ".xlsx":
+        wide.to_pandas().to_excel(out_path, index=False)
+    else:
+        wide.to_pandas().to_csv(out_path, index=False, encoding="utf-8-sig")
+    return wide.num_rows
+
+def build_from_jsonl(jsonl_path: str, out_path: str) -> int:
+    w = SpecsParquetWriter(out_path)
+    n = 0
+    seen = set()
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("specs") and rec["url"] not in seen:
+                seen.add(rec["url"])
+                w.add(rec["url"], rec.get("title"), rec["specs"])
+                n += 1
+    w.close()
+    return n
+
+def main():
+    ap = argparse.ArgumentParser(description="Kho thông số Parquet: dựng từ all_specs.jsonl / xuất bảng rộng")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Dựng all_specs.parquet từ all_specs.jsonl")
+    b.add_argument("jsonl", nargs="?", default="all_specs.jsonl")
+    b.add_argument("--out", default="all_specs.parquet")
+    w = sub.add_parser("wide", help="Xuất bảng rộng (1 dòng / sản phẩm) ra .csv / .xlsx / .parquet")
+    w.add_argument("store", nargs="?", default="all_specs.parquet")
+    w.add_argument("--out", default="all_specs_wide.csv")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        n = build_from_jsonl(args.jsonl, args.out)
+        print(f"✔ {n} sản phẩm -> {args.out}")
+    else:
+        n = export_wide(args.store, args.out)
+        print(f"✔ {n} sản phẩm -> {args.out}  |  cache chuẩn hoá tên: {attr_key.cache_info()}")
+
+if __name__ == "__main__":
+    main()
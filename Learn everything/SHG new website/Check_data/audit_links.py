@@ -0,0 +1,318 @@
+"""Fetch each URL once and run every audit (liveness, text presence, <img> runs) on that single body."""
+from __future__ import annotations
+
+import argparse
+import codecs
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import requests
+
+import check_links
+from check_hot_product import ImgRunParser
+from check_links import (
+    STREAM_CHUNK_SIZE,
+    USER_AGENT,
+    HostLimiter,
+    StreamingTargetMatcher,
+    load_links,
+    make_session,
+    sniff_encoding,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shg_common"))
+import http_cache
+
+
+class Analyzer:
+    """One check over a fetched page.
+
+    ``start`` sees the response metadata, ``feed`` receives decoded HTML as it
+    streams in, ``close`` marks the end of the body and ``result`` returns the
+    columns this analyzer contributes to the report. Set ``needs_body = False``
+    for checks that only look at the response, and return ``True`` from
+    ``done`` once more body cannot change the result.
+    """
+
+    needs_body = True
+
+    def start(self, response: requests.Response) -> None:
+        pass
+
+    def feed(self, text: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def done(self) -> bool:
+        return False
+
+    def result(self) -> Dict[str, object]:
+        return {}
+
+
+class StatusAnalyzer(Analyzer):
+    """HTTP status and redirect capture (what quick_check_404.py reports)."""
+
+    needs_body = False
+
+    def __init__(self, options: argparse.Namespace) -> None:
+        self._result: Dict[str, object] = {}
+
+    def start(self, response: requests.Response) -> None:
+        self._result = {
+            "status_code": response.status_code,
+            "detail": response.reason or "",
+            "final_url": response.url,
+            "redirected": bool(response.history),
+        }
+
+    @property
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> Dict[str, object]:
+        return self._result
+
+
+class TextAnalyzer(Analyzer):
+    """Visible-text target search (what check_links.py reports)."""
+
+    def __init__(self, options: argparse.Namespace) -> None:
+        self.targets: List[str] = options.targets
+        self._matcher = StreamingTargetMatcher(self.targets)
+
+    def feed(self, text: str) -> None:
+        self._matcher.feed(text)
+
+    def close(self) -> None:
+        self._matcher.close()
+
+    @property
+    def done(self) -> bool:
+        return self._matcher.done
+
+    def result(self) -> Dict[str, object]:
+        return {
+            target: ("found" if found else "not found")
+            for target, found in zip(self.targets, self._matcher.found)
+        }
+
+
+class ImgRunAnalyzer(Analyzer):
+    """Longest consecutive <img> run (what check_hot_product.py reports)."""
+
+    def __init__(self, options: argparse.Namespace) -> None:
+        self.threshold: int = options.threshold
+        self._parser = ImgRunParser()
+
+    def feed(self, text: str) -> None:
+        self._parser.feed(text)
+
+    def close(self) -> None:
+        self._parser.close()
+
+    def result(self) -> Dict[str, object]:
+        max_run = self._parser.max_run
+        return {"max_consecutive_imgs": max_run, "hot_product": max_run > self.threshold}
+
+
+# Register new analyzers here; the key is the name accepted by --analyzers.
+ANALYZERS: Dict[str, Callable[[argparse.Namespace], Analyzer]] = {
+    "status": StatusAnalyzer,
+    "text": TextAnalyzer,
+    "img_run": ImgRunAnalyzer,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "links_csv",
+        type=Path,
+        help="CSV file containing one URL per line (first column is used).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("audit_result.xlsx"),
+        help="Report file, .xlsx or .parquet (default: audit_result.xlsx).",
+    )
+    parser.add_argument(
+        "--analyzers",
+        default=",".join(ANALYZERS),
+        help=f"Comma-separated analyzers to run (default: all = {','.join(ANALYZERS)}).",
+    )
+    parser.add_argument(
+        "--target",
+        dest="targets",
+        action="append",
+        help="Text snippet for the text analyzer (can be passed multiple times).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=3,
+        help="img_run: flag hot_product when the longest <img> run is above this (default: 3).",
+    )
+    parser.add_argument("--timeout", type=float, default=15.0, help="Request timeout in seconds (default: 15).")
+    parser.add_argument("--workers", type=int, default=8, help="Links fetched concurrently (default: 8).")
+    parser.add_argument("--per-host", type=int, default=4, help="Concurrent requests per host (default: 4).")
+    http_cache.add_cli_args(parser)
+    args = parser.parse_args()
+    if not args.targets:
+        args.targets = [check_links.TARGET_TEXT]
+    args.analyzers = [name.strip() for name in args.analyzers.split(",") if name.strip()]
+    unknown = [name for name in args.analyzers if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"Unknown analyzer(s): {', '.join(unknown)}. Available: {', '.join(ANALYZERS)}")
+    return args
+
+
+class FetchCounter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.bytes_read = 0
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.fetches += 1
+            self.bytes_read += size
+
+
+def audit_link(
+    url: str,
+    options: argparse.Namespace,
+    cache: http_cache.HttpCache,
+    session: Optional[requests.Session],
+    counter: FetchCounter,
+) -> Dict[str, object]:
+    analyzers = [ANALYZERS[name](options) for name in options.analyzers]
+    try:
+        response = cache.get(
+            url,
+            session=session,
+            headers={"User-Agent": USER_AGENT},
+            timeout=options.timeout,
+            allow_redirects=True,
+            stream=True,
+        )
+    except requests.RequestException as exc:
+        counter.add(0)
+        return {"status": "request_error", "detail": str(exc), "status_code": "", "final_url": "", "redirected": False}
+
+    for analyzer in analyzers:
+        analyzer.start(response)
+
+    result: Dict[str, object] = {"status": "ok"}
+    bytes_read = 0
+    if response.status_code >= 400:
+        result["status"] = "http_error"
+        body_analyzers: List[Analyzer] = []
+    else:
+        body_analyzers = [analyzer for analyzer in analyzers if analyzer.needs_body]
+
+    if body_analyzers:
+        # A broken body (truncated chunk, reset, read timeout) gives the same row as a failed request.
+        try:
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            head = next(chunks, b"")
+            # A body read to the end is kept for the cache; an early exit leaves it uncached.
+            body: Optional[List[bytes]] = [head] if cache.enabled else None
+            decoder = codecs.getincrementaldecoder(sniff_encoding(response, head))(errors="replace")
+            bytes_read = len(head)
+            text = decoder.decode(head)
+            for analyzer in body_analyzers:
+                analyzer.feed(text)
+            finished = all(analyzer.done for analyzer in body_analyzers)
+            if not finished:
+                for chunk in chunks:
+                    bytes_read += len(chunk)
+                    if body is not None:
+                        body.append(chunk)
+                    text = decoder.decode(chunk)
+                    for analyzer in body_analyzers:
+                        analyzer.feed(text)
+                    if all(analyzer.done for analyzer in body_analyzers):
+                        finished = True
+                        break
+            if not finished:
+                tail = decoder.decode(b"", final=True)
+                for analyzer in body_analyzers:
+                    analyzer.feed(tail)
+                    analyzer.close()
+                if body is not None:
+                    cache.store_streamed(url, response, b"".join(body))
+        except requests.RequestException as exc:
+            response.close()
+            counter.add(bytes_read)
+            return {"status": "request_error", "detail": str(exc), "status_code": "", "final_url": "", "redirected": False}
+    response.close()
+    counter.add(bytes_read)
+
+    for analyzer in analyzers:
+        if analyzer.needs_body and analyzer not in body_analyzers:
+            continue  # no body to analyse (HTTP error), same as the single-purpose scripts
+        result.update(analyzer.result())
+    return result
+
+
+def write_report(df: pd.DataFrame, output: Path) -> None:
+    if output.suffix.lower() == ".parquet":
+        df.to_parquet(output, index=False)
+    else:
+        df.to_excel(output, index=False)
+
+
+def main() -> None:
+    args = parse_args()
+    cache = http_cache.from_args(args)
+    links = load_links(args.links_csv)
+    if not links:
+        raise SystemExit("No links found in the provided CSV file.")
+
+    session = make_session(max(1, args.workers))
+    limiter = HostLimiter(args.per_host)
+    counter = FetchCounter()
+
+    def run(link: str) -> Dict[str, object]:
+        with limiter.for_url(link):
+            return audit_link(link, args, cache, session, counter)
+
+    started = time.perf_counter()
+    results: List[Optional[dict]] = [None] * len(links)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(run, link): index for index, link in enumerate(links)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            result = future.result()
+            summary = ", ".join(f"{key}={value}" for key, value in result.items() if key not in ("detail", "final_url"))
+            print(f"[{done}/{len(links)}] {links[index]} -> {summary}")
+            row = {"link": links[index]}
+            row.update(result)
+            results[index] = row
+    session.close()
+    elapsed = time.perf_counter() - started
+
+    write_report(pd.DataFrame(results), args.output)
+    body_checks = sum(1 for name in args.analyzers if name != "status")
+    separate = len(links) * max(1, len(args.analyzers))
+    print(
+        f"Fetched {counter.fetches} pages ({counter.bytes_read / 1024:.0f} KB) in {elapsed:.1f}s "
+        f"for {len(args.analyzers)} analyzers ({body_checks} reading the body); "
+        f"separate scripts would fetch {separate} times"
+    )
+    print(cache.summary())
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
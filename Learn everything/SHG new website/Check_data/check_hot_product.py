@@ -7,9 +7,10 @@ from html.parser import HTMLParser
 from pathlib import Path
 from typing import List
 
-import pandas as pd
 import requests
 
+import result_sink
+
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
 
 
@@ -66,6 +67,7 @@ def parse_args() -> argparse.Namespace:
         default=3,
         help="Minimum consecutive <img> count to flag (default: 3 -> flag when >3).",
     )
+    result_sink.add_cli_args(parser)
     return parser.parse_args()
 
 
@@ -148,34 +150,44 @@ def main() -> None:
     if not links:
         raise SystemExit("No links found in the provided CSV file.")
 
-    results = []
-    total = len(links)
-    for index, link in enumerate(links, start=1):
-        result = check_link(link, args.timeout, args.threshold)
-        status = result.get("status", "ok")
-        code = result.get("status_code")
-        redirected = result.get("redirected")
-        final_url = result.get("final_url")
-        max_run = result.get("max_consecutive_imgs")
-        hot_product = result.get("hot_product")
-        detail = result.get("detail") or ""
-
-        status_text = f"{status}"
-        if code:
-            status_text += f" ({code})"
-        if detail:
-            status_text += f": {detail}"
-        if redirected and final_url:
-            status_text += f" | redirected -> {final_url}"
-        status_text += f" | max_img_run={max_run} | hot_product={hot_product}"
-        print(f"[{index}/{total}] {link} -> {status_text}")
-
-        row = {"link": link}
-        row.update(result)
-        results.append(row)
-
-    df = pd.DataFrame(results)
-    df.to_excel(args.output, index=False)
+    sink = result_sink.from_args(
+        args,
+        ["link", "status", "status_code", "detail", "final_url", "redirected", "max_consecutive_imgs", "hot_product"],
+        types={"status_code": int, "redirected": bool, "max_consecutive_imgs": int, "hot_product": bool},
+    )
+    pending = [link for link in links if link not in sink.done_links]
+    if len(pending) < len(links):
+        print(f"Resuming from {sink.path}: {len(links) - len(pending)} links already checked")
+
+    total = len(pending)
+    try:
+        for index, link in enumerate(pending, start=1):
+            result = check_link(link, args.timeout, args.threshold)
+            status = result.get("status", "ok")
+            code = result.get("status_code")
+            redirected = result.get("redirected")
+            final_url = result.get("final_url")
+            max_run = result.get("max_consecutive_imgs")
+            hot_product = result.get("hot_product")
+            detail = result.get("detail") or ""
+
+            status_text = f"{status}"
+            if code:
+                status_text += f" ({code})"
+            if detail:
+                status_text += f": {detail}"
+            if redirected and final_url:
+                status_text += f" | redirected -> {final_url}"
+            status_text += f" | max_img_run={max_run} | hot_product={hot_product}"
+            print(f"[{index}/{total}] {link} -> {status_text}")
+
+            row = {"link": link}
+            row.update(result)
+            sink.write(row)
+    finally:
+        sink.close()
+
+    sink.export_xlsx(args.output, order=links)
     print(f"Saved results to {args.output}")
 
 
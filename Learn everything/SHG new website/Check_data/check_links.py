@@ -2,17 +2,31 @@
 from __future__ import annotations
 
 import argparse
+import codecs
 import csv
+import re
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
 import unicodedata
 
-import pandas as pd
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shg_common"))
+import http_cache
+from http_cache import HttpCache
+
+import result_sink
+
 TARGET_TEXT = "Thông số kỹ thuật"
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+# Shared on-disk conditional-GET cache; enabled from the CLI in main().
+HTTP_CACHE = HttpCache(enabled=False)
 
 
 class VisibleTextParser(HTMLParser):
@@ -53,6 +67,94 @@ def normalize_text(text: str) -> str:
     """Normalize text for reliable matching (NFC + lowercase)."""
     return unicodedata.normalize("NFC", text).lower()
 
+
+class StreamingTargetMatcher(VisibleTextParser):
+    """Search visible text for every target while HTML is still arriving.
+
+    Text between two tags is buffered until the next tag so a text node split
+    across chunks is normalized exactly like the whole-page path
+    (``normalize_text(extract_visible_text(html))``). Only the last
+    ``len(longest target)`` characters are kept, so memory stays flat.
+    """
+
+    def __init__(self, targets: List[str]) -> None:
+        super().__init__()
+        self.normalized = [normalize_text(target) for target in targets]
+        self.found = [not target for target in self.normalized]
+        self._pending: List[str] = []
+        self._tail = ""
+        self._keep = max((len(target) for target in self.normalized), default=1) - 1
+
+    @property
+    def done(self) -> bool:
+        return all(self.found)
+
+    def handle_starttag(self, tag, attrs):  # type: ignore[override]
+        self._flush()
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):  # type: ignore[override]
+        self._flush()
+        super().handle_endtag(tag)
+
+    def handle_comment(self, data):  # type: ignore[override]
+        self._flush()
+
+    def handle_decl(self, decl):  # type: ignore[override]
+        self._flush()
+
+    def handle_pi(self, data):  # type: ignore[override]
+        self._flush()
+
+    def unknown_decl(self, data):  # type: ignore[override]
+        self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._pending.append(data)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        piece = normalize_text(" ".join(text.replace("\xa0", " ").split()))
+        window = f"{self._tail} {piece}" if self._tail else piece
+        for index, target in enumerate(self.normalized):
+            if not self.found[index] and target in window:
+                self.found[index] = True
+        self._tail = window[-self._keep:] if self._keep > 0 else ""
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+STREAM_CHUNK_SIZE = 16 * 1024
+STREAM_STATS = {"pages": 0, "early_exit": 0, "bytes_read": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def sniff_encoding(response: requests.Response, head: bytes) -> str:
+    """Header charset, else <meta charset> in the first chunk, else a guess from that chunk."""
+    candidates = []
+    if response.encoding and response.encoding.lower() != "iso-8859-1":
+        candidates.append(response.encoding)
+    match = META_CHARSET_RE.search(head)
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    candidates.append(requests.compat.chardet.detect(head).get("encoding") if head else None)
+    for name in candidates:
+        try:
+            if name:
+                return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return "utf-8"
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
@@ -78,6 +180,20 @@ def parse_args() -> argparse.Namespace:
         default=15.0,
         help="Request timeout in seconds (default: 15)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of links checked concurrently over a shared keep-alive session (default: 1)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Maximum concurrent requests to the same host (default: 4)",
+    )
+    http_cache.add_cli_args(parser)
+    result_sink.add_cli_args(parser)
     args = parser.parse_args()
     if not args.targets:
         args.targets = [TARGET_TEXT]
@@ -96,22 +212,56 @@ def load_links(csv_path: Path) -> List[str]:
             links.append(url)
     return links
 
-def check_link(url: str, targets: List[str], timeout: float) -> dict[str, str]:
+def make_session(pool_size: int) -> requests.Session:
+    """Session with a connection pool large enough for every worker (keep-alive per host)."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostLimiter:
+    """Cap the number of in-flight requests per host."""
+
+    def __init__(self, per_host: int) -> None:
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(max(1, per_host))
+        )
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._sems[urlparse(url).netloc.lower()]
+
+
+def request_error_result(exc: requests.RequestException) -> dict[str, str]:
+    return {
+        "status": "request_error",
+        "detail": str(exc),
+        "status_code": "",
+        "final_url": "",
+        "redirected": False,
+    }
+
+
+def check_link(
+    url: str,
+    targets: List[str],
+    timeout: float,
+    session: Optional[requests.Session] = None,
+) -> dict[str, str]:
     try:
-        response = requests.get(
+        response = HTTP_CACHE.get(
             url,
+            session=session,
             headers={"User-Agent": USER_AGENT},
             timeout=timeout,
             allow_redirects=True,
+            stream=True,
         )
     except requests.RequestException as exc:
-        return {
-            "status": "request_error",
-            "detail": str(exc),
-            "status_code": "",
-            "final_url": "",
-            "redirected": False,
-        }
+        return request_error_result(exc)
 
     status_code = response.status_code
     final_url = response.url
@@ -128,16 +278,47 @@ def check_link(url: str, targets: List[str], timeout: float) -> dict[str, str]:
             "redirected": redirected,
         }
 
-    if not response.encoding or response.encoding.lower() == "iso-8859-1":
-        response.encoding = response.apparent_encoding or response.encoding
+    # Stream the body and stop as soon as every target has been seen.
+    # A body read to the end is kept for the cache; an early exit leaves it uncached.
+    # A broken body (truncated chunk, reset, read timeout) gives the same row as a failed request.
+    matcher = StreamingTargetMatcher(targets)
+    early_exit = False
+    try:
+        chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        head = next(chunks, b"")
+        body: Optional[List[bytes]] = [head] if HTTP_CACHE.enabled else None
+        decoder = codecs.getincrementaldecoder(sniff_encoding(response, head))(errors="replace")
+        bytes_read = len(head)
+        matcher.feed(decoder.decode(head))
+        if matcher.done:
+            early_exit = True
+        else:
+            for chunk in chunks:
+                bytes_read += len(chunk)
+                if body is not None:
+                    body.append(chunk)
+                matcher.feed(decoder.decode(chunk))
+                if matcher.done:
+                    early_exit = True
+                    break
+            else:
+                matcher.feed(decoder.decode(b"", final=True))
+                matcher.close()
+                if body is not None:
+                    HTTP_CACHE.store_streamed(url, response, b"".join(body))
+    except requests.RequestException as exc:
+        return request_error_result(exc)
+    finally:
+        response.close()
+    with _STATS_LOCK:
+        STREAM_STATS["pages"] += 1
+        STREAM_STATS["bytes_read"] += bytes_read
+        STREAM_STATS["early_exit"] += int(early_exit)
 
-    page_text = normalize_text(extract_visible_text(response.text))
-    normalized_targets = [normalize_text(target) for target in targets]
     result: dict[str, str] = {
-        target: ("found" if normalized_target in page_text else "not found")
-        for target, normalized_target in zip(targets, normalized_targets)
+        target: ("found" if found else "not found")
+        for target, found in zip(targets, matcher.found)
     }
-    response.close()
 
     result["status"] = "ok"
     result["status_code"] = status_code
@@ -146,50 +327,82 @@ def check_link(url: str, targets: List[str], timeout: float) -> dict[str, str]:
     result["redirected"] = redirected
     return result
 
+def format_status(result: dict[str, str], targets: List[str]) -> str:
+    status = result.get("status", "ok")
+    if status != "ok":
+        parts = [status]
+        code = result.get("status_code")
+        if code:
+            parts.append(f"({code})")
+        if result.get("redirected"):
+            parts.append(f"redirected -> {result.get('final_url')}")
+        detail = result.get("detail")
+        if detail:
+            parts.append(f": {detail}")
+        return " ".join(parts)
+
+    status_text = ", ".join(f"{target}: {result[target]}" for target in targets)
+    extras = []
+    code = result.get("status_code")
+    if code:
+        extras.append(f"status={code}")
+    if result.get("redirected"):
+        extras.append(f"redirected -> {result.get('final_url')}")
+    detail = result.get("detail")
+    if detail:
+        extras.append(detail)
+    if extras:
+        status_text += " | " + "; ".join(extras)
+    return status_text
+
 def main() -> None:
+    global HTTP_CACHE
     args = parse_args()
+    HTTP_CACHE = http_cache.from_args(args)
     targets = args.targets
     links = load_links(args.links_csv)
     if not links:
         raise SystemExit("No links found in the provided CSV file.")
 
-    results = []
-    for index, link in enumerate(links, start=1):
-        result = check_link(link, targets, args.timeout)
-        status = result.get("status", "ok")
-        if status != "ok":
-            parts = [status]
-            code = result.get("status_code")
-            if code:
-                parts.append(f"({code})")
-            if result.get("redirected"):
-                parts.append(f"redirected -> {result.get('final_url')}")
-            detail = result.get("detail")
-            if detail:
-                parts.append(f": {detail}")
-            status_text = " ".join(parts)
-        else:
-            status_text = ", ".join(f"{target}: {result[target]}" for target in targets)
-            extras = []
-            code = result.get("status_code")
-            if code:
-                extras.append(f"status={code}")
-            if result.get("redirected"):
-                extras.append(f"redirected -> {result.get('final_url')}")
-            detail = result.get("detail")
-            if detail:
-                extras.append(detail)
-            if extras:
-                status_text += " | " + "; ".join(extras)
-        print(f"[{index}/{len(links)}] {link} -> {status_text}")
-
-        row = {"link": link}
-        row.update(result)
-        results.append(row)
-
-    df = pd.DataFrame(results)
-    df.to_excel(args.output, index=False)
-    print(f"Saved results to {args.output}")
+    sink = result_sink.from_args(
+        args,
+        ["link", *targets, "status", "status_code", "detail", "final_url", "redirected"],
+        types={"status_code": int, "redirected": bool},
+    )
+    pending = [link for link in links if link not in sink.done_links]
+    if len(pending) < len(links):
+        print(f"Resuming from {sink.path}: {len(links) - len(pending)} links already checked")
+
+    session = make_session(max(1, args.workers))
+    limiter = HostLimiter(args.per_host)
+
+    def run(link: str) -> dict[str, str]:
+        with limiter.for_url(link):
+            return check_link(link, targets, args.timeout, session=session)
+
+    # Rows go to the sink as they finish; the Excel is rebuilt from it in CSV order.
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = {executor.submit(run, link): link for link in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                link = futures[future]
+                result = future.result()
+                print(f"[{done}/{len(pending)}] {link} -> {format_status(result, targets)}")
+
+                row = {"link": link}
+                row.update(result)
+                sink.write(row)
+    finally:
+        sink.close()
+        session.close()
+
+    saved = sink.export_xlsx(args.output, order=links)
+    print(
+        f"Streamed {STREAM_STATS['pages']} pages, {STREAM_STATS['bytes_read'] / 1024:.0f} KB read, "
+        f"{STREAM_STATS['early_exit']} stopped early once all targets were found"
+    )
+    print(HTTP_CACHE.summary())
+    print(f"Saved {saved} rows to {args.output} (rows: {sink.path})")
 
 if __name__ == "__main__":
     main()
@@ -4,12 +4,20 @@ from __future__ import annotations
 
 import argparse
 import csv
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
 
 import pandas as pd
 import requests
 
+import result_sink
+from check_links import HostLimiter, make_session
+
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
 
 
@@ -32,6 +40,24 @@ def parse_args() -> argparse.Namespace:
         default=10.0,
         help="Request timeout in seconds (default: 10).",
     )
+    parser.add_argument(
+        "--head-first",
+        action="store_true",
+        help="Probe with HEAD; fall back to a ranged GET only on hosts that reject HEAD.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of links probed concurrently (default: 1).",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Maximum concurrent requests to the same host (default: 4).",
+    )
+    result_sink.add_cli_args(parser)
     return parser.parse_args()
 
 
@@ -49,23 +75,122 @@ def load_links(csv_path: Path) -> List[str]:
     return links
 
 
-def check_status(url: str, timeout: float) -> dict[str, str | int]:
+# Status codes meaning "this server does not do HEAD" (not "this page is broken").
+HEAD_REJECTED = {405, 501}
+
+
+class HeadSupport:
+    """Remember, per host, whether HEAD works so rejected hosts skip it for the rest of the run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, bool] = {}
+
+    def allows(self, host: str) -> bool:
+        with self._lock:
+            return self._hosts.get(host, True)
+
+    def mark(self, host: str, supported: bool) -> None:
+        with self._lock:
+            self._hosts[host] = supported
+
+
+class LatencyLog:
+    """Collect request latencies per host and report percentiles."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, host: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[host].append(seconds)
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+        return values[index]
+
+    def summary(self) -> pd.DataFrame:
+        rows = []
+        for host, values in sorted(self._samples.items()):
+            values = sorted(values)
+            rows.append({
+                "host": host,
+                "requests": len(values),
+                "p50_ms": round(self._percentile(values, 50) * 1000, 1),
+                "p90_ms": round(self._percentile(values, 90) * 1000, 1),
+                "p99_ms": round(self._percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            })
+        return pd.DataFrame(rows, columns=["host", "requests", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+
+
+def _probe(
+    method: str,
+    url: str,
+    timeout: float,
+    session: Optional[requests.Session],
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    client = session or requests
+    headers = {"User-Agent": USER_AGENT}
+    headers.update(extra_headers or {})
+    response = client.request(
+        method,
+        url,
+        headers=headers,
+        allow_redirects=True,
+        timeout=timeout,
+        stream=True,
+    )
+    response.close()
+    return response
+
+
+def check_status(
+    url: str,
+    timeout: float,
+    session: Optional[requests.Session] = None,
+    head_first: bool = False,
+    head_support: Optional[HeadSupport] = None,
+    latency: Optional[LatencyLog] = None,
+) -> dict[str, str | int]:
+    host = urlparse(url).netloc.lower()
+    head_support = head_support or HeadSupport()
+    probe = "GET"
+    started = time.perf_counter()
     try:
-        response = requests.get(
-            url,
-            headers={"User-Agent": USER_AGENT},
-            allow_redirects=True,
-            timeout=timeout,
-            stream=True,
-        )
+        response = None
+        if head_first and head_support.allows(host):
+            probe = "HEAD"
+            try:
+                response = _probe("HEAD", url, timeout, session)
+            except requests.RequestException:
+                # Timeout / reset: retry this URL with a ranged GET, but keep HEAD for the host.
+                response = None
+            if response is not None and response.status_code in HEAD_REJECTED:
+                head_support.mark(host, False)
+                response = None
+        if response is None and head_first:
+            # Only the first byte is requested; servers ignoring Range still close after headers.
+            probe = "GET-range"
+            response = _probe("GET", url, timeout, session, {"Range": "bytes=0-0"})
+        elif response is None:
+            response = _probe("GET", url, timeout, session)
     except requests.RequestException as exc:
-        return {"status": "request_error", "detail": str(exc), "status_code": ""}
+        return {"status": "request_error", "detail": str(exc), "status_code": "", "probe": probe}
+    finally:
+        if latency is not None:
+            latency.add(host, time.perf_counter() - started)
 
     status_code = response.status_code
+    reason = response.reason or ""
+    if probe == "GET-range" and status_code in (206, 416):
+        # 206 Partial Content / 416 on an empty body both mean the page exists.
+        status_code, reason = 200, "OK"
     final_url = response.url
     redirected = bool(response.history)
-    reason = response.reason or ""
-    response.close()
 
     if status_code >= 400:
         return {
@@ -74,6 +199,7 @@ def check_status(url: str, timeout: float) -> dict[str, str | int]:
             "detail": reason,
             "final_url": final_url,
             "redirected": redirected,
+            "probe": probe,
         }
 
     return {
@@ -82,37 +208,75 @@ def check_status(url: str, timeout: float) -> dict[str, str | int]:
         "detail": reason,
         "final_url": final_url,
         "redirected": redirected,
+        "probe": probe,
     }
 
 
+def format_status(result: dict[str, str | int]) -> str:
+    status_text = str(result.get("status", "live"))
+    code = result.get("status_code")
+    detail = result.get("detail") or ""
+    if code:
+        status_text += f" ({code})"
+    if detail:
+        status_text += f": {detail}"
+    if result.get("redirected"):
+        status_text += f" | redirected -> {result.get('final_url')}"
+    return status_text
+
+
 def main() -> None:
     args = parse_args()
     links = load_links(args.links_csv)
     if not links:
         raise SystemExit("No links found in the provided CSV file.")
 
-    results = []
-    total = len(links)
-    for index, link in enumerate(links, start=1):
-        result = check_status(link, args.timeout)
-        status = result.get("status", "live")
-        code = result.get("status_code")
-        detail = result.get("detail") or ""
-        status_text = status
-        if code:
-            status_text += f" ({code})"
-        if detail:
-            status_text += f": {detail}"
-        if result.get("redirected"):
-            status_text += f" | redirected -> {result.get('final_url')}"
-        print(f"[{index}/{total}] {link} -> {status_text}")
-
-        row = {"link": link}
-        row.update(result)
-        results.append(row)
-
-    df = pd.DataFrame(results)
-    df.to_excel(args.output, index=False)
+    sink = result_sink.from_args(
+        args,
+        ["link", "status", "status_code", "detail", "final_url", "redirected", "probe"],
+        types={"status_code": int, "redirected": bool},
+    )
+    pending = [link for link in links if link not in sink.done_links]
+    if len(pending) < len(links):
+        print(f"Resuming from {sink.path}: {len(links) - len(pending)} links already checked")
+
+    session = make_session(max(1, args.workers))
+    limiter = HostLimiter(args.per_host)
+    head_support = HeadSupport()
+    latency = LatencyLog()
+
+    def run(link: str) -> dict[str, str | int]:
+        with limiter.for_url(link):
+            return check_status(link, args.timeout, session, args.head_first, head_support, latency)
+
+    started = time.perf_counter()
+    total = len(pending)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = {executor.submit(run, link): link for link in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                link = futures[future]
+                result = future.result()
+                print(f"[{done}/{total}] {link} -> {format_status(result)}")
+
+                row = {"link": link}
+                row.update(result)
+                sink.write(row)
+    finally:
+        sink.close()
+        session.close()
+    elapsed = time.perf_counter() - started
+
+    # host_latency only covers requests made in this run (not rows resumed from the sink).
+    latency_df = latency.summary()
+    sink.export_xlsx(args.output, order=links, extra_sheets={"host_latency": latency_df})
+
+    print(f"Checked {total} links in {elapsed:.1f}s")
+    for row in latency_df.to_dict("records"):
+        print(
+            f"  {row['host']}: {row['requests']} req | p50 {row['p50_ms']} ms | "
+            f"p90 {row['p90_ms']} ms | p99 {row['p99_ms']} ms"
+        )
     print(f"Saved results to {args.output}")
 
 
@@ -0,0 +1,324 @@
+"""Streaming result sink shared by the Check_data scripts.
+
+Rows are written to disk as soon as each link finishes instead of being kept
+in a list until the end of the run:
+
+- ``*.csv``: one CSV file, flushed (and fsynced) every ``flush_every`` rows.
+- ``*.parquet``: a directory of part files, one complete file per flush, so a
+  crash never leaves an unreadable file behind (requires pyarrow).
+
+With ``resume=True`` rows already in the sink are kept and their links are
+exposed through ``done_links`` so the caller can skip them. The final Excel
+report is produced from the sink with openpyxl's write-only mode; values are
+stored as text and only the columns listed in ``types`` are converted back
+(so an SKU such as ``"00123"`` stays a string).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+
+def add_cli_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("result sink")
+    group.add_argument(
+        "--sink",
+        type=Path,
+        default=None,
+        help="File rows are streamed to while running: .csv, or .parquet for a directory of "
+        "Parquet parts (default: <output>.rows.csv).",
+    )
+    group.add_argument(
+        "--flush-every",
+        type=int,
+        default=50,
+        help="Flush the sink to disk every N rows (default: 50).",
+    )
+    group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep rows already in the sink and skip their links.",
+    )
+
+
+def from_args(
+    args: argparse.Namespace, columns: Sequence[str], types: Optional[Dict[str, type]] = None
+) -> "ResultSink":
+    path = args.sink or args.output.with_suffix(".rows.csv")
+    return ResultSink(path, columns, flush_every=args.flush_every, resume=args.resume, types=types)
+
+
+def _to_cell(value: Optional[str], kind: Optional[type] = None) -> object:
+    """Turn a stored string back into a cell value; only typed columns are converted."""
+    if value is None or value == "":
+        return None
+    if kind is bool:
+        return value == "True" if value in ("True", "False") else value
+    if kind is not None:
+        try:
+            return kind(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _to_text(value: object) -> str:
+    return "" if value is None else str(value)
+
+
+class ResultSink:
+    """Append-only row store keyed by the ``link`` column.
+
+    ``types`` maps a column to ``int``, ``float`` or ``bool`` for the Excel
+    export; every other column is written as text.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: Sequence[str],
+        flush_every: int = 50,
+        resume: bool = False,
+        types: Optional[Dict[str, type]] = None,
+    ) -> None:
+        if "link" not in columns:
+            raise ValueError("columns must include 'link'")
+        unknown = set(types or {}) - set(columns)
+        if unknown:
+            raise ValueError(f"types given for unknown columns: {sorted(unknown)}")
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.types = [(types or {}).get(name) for name in self.columns]
+        self.flush_every = max(1, flush_every)
+        self.parquet = self.path.suffix.lower() == ".parquet"
+        self.done_links: Set[str] = set()
+        self.written = 0
+        self._pending: List[Tuple[str, ...]] = []
+        self._fp = None
+        self._writer = None
+        self._part = 0
+        if self.parquet:
+            self._open_parquet(resume)
+        else:
+            self._open_csv(resume)
+
+    # ---------- CSV ----------
+    def _open_csv(self, resume: bool) -> None:
+        if resume and self.path.exists():
+            self._repair_csv_tail()
+            with self.path.open("r", encoding="utf-8-sig", newline="") as fp:
+                reader = csv.reader(fp)
+                header = next(reader, None)
+                if header is not None and header != self.columns:
+                    raise SystemExit(
+                        f"Sink {self.path} has columns {header}, expected {self.columns}; "
+                        "use another --sink or drop --resume."
+                    )
+                link_index = self.columns.index("link")
+                for row in reader:
+                    if len(row) == len(self.columns):
+                        self.done_links.add(row[link_index])
+            self._fp = self.path.open("a", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._fp)
+            if header is None:
+                self._writer.writerow(self.columns)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = self.path.open("w", encoding="utf-8-sig", newline="")
+            self._writer = csv.writer(self._fp)
+            self._writer.writerow(self.columns)
+        self._fp.flush()
+
+    @staticmethod
+    def _csv_records(fp: BinaryIO) -> Iterator[Tuple[int, List[str]]]:
+        """Yield ``(byte offset, row)`` for each CSV record from the current position.
+
+        csv.reader pulls exactly the lines of one record, so the offset seen
+        before each ``next`` is where that record starts (quoted newlines included).
+        """
+        pos = fp.tell()
+
+        def lines() -> Iterator[str]:
+            nonlocal pos
+            for raw in iter(fp.readline, b""):
+                pos = fp.tell()
+                yield raw.decode("utf-8-sig")
+
+        reader = csv.reader(lines())
+        while True:
+            start = pos
+            row = next(reader, None)
+            if row is None:
+                return
+            yield start, row
+
+    def _repair_csv_tail(self) -> None:
+        """Drop a half-written last line left by a crash."""
+        with self.path.open("rb+") as fp:
+            data = fp.read()
+            if data and not data.endswith(b"\n"):
+                fp.truncate(data.rfind(b"\n") + 1)
+
+    # ---------- Parquet ----------
+    def _open_parquet(self, resume: bool) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise SystemExit("Parquet sink needs pyarrow (pip install pyarrow), or use a .csv sink.") from exc
+        self.path.mkdir(parents=True, exist_ok=True)
+        parts = sorted(self.path.glob("part-*.parquet"))
+        if not resume:
+            for part in parts:
+                part.unlink()
+            return
+        import pyarrow.parquet as pq
+
+        for part in parts:
+            self.done_links.update(pq.read_table(part, columns=["link"]).column("link").to_pylist())
+        if parts:
+            self._part = int(parts[-1].stem.split("-")[1]) + 1
+
+    def _write_parquet_part(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, pa.string()) for name in self.columns])
+        table = pa.Table.from_arrays(
+            [pa.array(list(col), type=pa.string()) for col in zip(*self._pending)], schema=schema
+        )
+        target = self.path / f"part-{self._part:05d}.parquet"
+        tmp = target.with_name(target.name + ".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, target)
+        self._part += 1
+
+    # ---------- API ----------
+    def write(self, row: Dict[str, object]) -> None:
+        self._pending.append(tuple(_to_text(row.get(name)) for name in self.columns))
+        self.done_links.add(str(row["link"]))
+        self.written += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self.parquet:
+            self._write_parquet_part()
+        else:
+            self._writer.writerows(self._pending)
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def rows(self) -> Iterator[Tuple[str, ...]]:
+        """Stored rows as string tuples in ``columns`` order (call after ``close``)."""
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            for part in sorted(self.path.glob("part-*.parquet")):
+                table = pq.read_table(part, columns=self.columns)
+                for row in zip(*(table.column(name).to_pylist() for name in self.columns)):
+                    yield tuple(_to_text(value) for value in row)
+            return
+        with self.path.open("rb") as fp:
+            records = self._csv_records(fp)
+            next(records, None)
+            for _, row in records:
+                if len(row) == len(self.columns):
+                    yield tuple(row)
+
+    def _index(self) -> Dict[str, object]:
+        """Map each link to where its last row is stored, without keeping the rows.
+
+        The position is a byte offset for CSV and ``(part, row number)`` for Parquet.
+        """
+        index: Dict[str, object] = {}
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            for part in sorted(self.path.glob("part-*.parquet")):
+                links = pq.read_table(part, columns=["link"]).column("link").to_pylist()
+                for number, link in enumerate(links):
+                    index[link] = (part, number)
+            return index
+        link_index = self.columns.index("link")
+        with self.path.open("rb") as fp:
+            records = self._csv_records(fp)
+            next(records, None)
+            for offset, row in records:
+                if len(row) == len(self.columns):
+                    index[row[link_index]] = offset
+        return index
+
+    def _rows_at(self, positions: Iterable[object]) -> Iterator[Tuple[str, ...]]:
+        """Read the rows stored at ``positions`` (from ``_index``) in the given order."""
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            loaded: Optional[Path] = None
+            part_rows: List[Tuple[str, ...]] = []
+            for part, number in positions:
+                if part != loaded:
+                    table = pq.read_table(part, columns=self.columns)
+                    part_rows = [
+                        tuple(_to_text(value) for value in row)
+                        for row in zip(*(table.column(name).to_pylist() for name in self.columns))
+                    ]
+                    loaded = part
+                yield part_rows[number]
+            return
+        with self.path.open("rb") as fp:
+            for offset in positions:
+                fp.seek(offset)
+                _, row = next(self._csv_records(fp))
+                yield tuple(row)
+
+    def export_xlsx(
+        self,
+        output: Path,
+        order: Optional[Iterable[str]] = None,
+        sheet_name: str = "Sheet1",
+        extra_sheets: Optional[Dict[str, "object"]] = None,
+    ) -> int:
+        """Write the sink to ``output`` with openpyxl's write-only workbook.
+
+        ``order`` lists links in the order rows should appear (the input CSV
+        order); links missing from the sink are skipped and, if a link was
+        written more than once, the last row wins. Only a link -> position
+        index is kept in memory; rows are read back from the sink one by one.
+        ``extra_sheets`` maps a sheet name to a DataFrame appended after the
+        main sheet.
+        Returns the number of rows written.
+        """
+        from openpyxl import Workbook
+
+        if order is None:
+            rows: Iterable[Tuple[str, ...]] = self.rows()
+        else:
+            index = self._index()
+            rows = self._rows_at(index[link] for link in order if link in index)
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(self.columns)
+        count = 0
+        for row in rows:
+            sheet.append([_to_cell(value, kind) for value, kind in zip(row, self.types)])
+            count += 1
+        for name, frame in (extra_sheets or {}).items():
+            extra = workbook.create_sheet(name)
+            extra.append([str(col) for col in frame.columns])
+            for values in frame.itertuples(index=False, name=None):
+                extra.append(list(values))
+        workbook.save(output)
+        return count
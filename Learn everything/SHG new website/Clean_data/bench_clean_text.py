@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_clean_text.py - so sánh clean_text_keep_html_textnode bản cũ (re.sub chuỗi trong vòng lặp)
+với vn_textfix.clean_text_node (regex compile sẵn + COMMON_FIXES 1 alternation + fast path).
+
+- Lấy mọi text node của 3 cột Tổng quan / Thiết kế / Công năng trong workbook (mặc định SHG_Noicomdien.xlsx).
+- Kiểm tra 2 bản cho kết quả giống hệt từng node, rồi in thời gian:
+  (1) chỉ phần sửa text node, (2) cả normalize_html_preserve_structure cho mọi ô.
+Cách chạy: python bench_clean_text.py [file.xlsx] --repeat 5
+"""
+
+import argparse, re, time, unicodedata
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup, NavigableString, Comment, CData
+
+import vn_clean_and_split4_v2 as v2
+import vn_textfix
+
+# ---------- Bản cũ (giữ nguyên để so sánh) ----------
+def legacy_fix_numbers_units(s: str) -> str:
+    s = re.sub(r"(\d)\s*([.,])\s*(\d)", r"\1\2\3", s)
+    s = re.sub(r"(\d)(?:\s*[lL])\b", r"\1L", s)
+    s = re.sub(r"(\d)\s*[-]\s*(\d)", r"\1 – \2", s)
+    return s
+
+_DBLQUOTE_PAIR = re.compile(r'""\s*([^"]*?)\s*""')
+
+def legacy_collapse_double_quotes(s: str) -> str:
+    for _ in range(3):
+        ns = _DBLQUOTE_PAIR.sub(r'"\1"', s)
+        if ns == s: break
+        s = ns
+    return s
+
+def legacy_fix_intra_word_spaces_once(s: str) -> str:
+    s = re.sub(rf"([A-Za-zÀ-ỹđĐ])\s+(ng|nh|ch|c|m|n|t|p)\b", r"\1\2", s)
+    s = re.sub(rf"([aăâeêioôơuưyAĂÂEÊIOÔƠUƯY])\s+([iuyIUY])\b", r"\1\2", s)
+    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
+    s = re.sub(r"[ \t]{2,}", " ", s)
+    return s
+
+def legacy_clean_text(text: str) -> str:
+    if text is None: return text
+    s = unicodedata.normalize("NFC", text)
+    s = legacy_fix_numbers_units(s)
+    s = legacy_collapse_double_quotes(s)
+    for _ in range(2):
+        for pattern, repl in vn_textfix.COMMON_FIXES.items():
+            s = re.sub(pattern, repl, s, flags=re.IGNORECASE)
+    for _ in range(4):
+        ns = legacy_fix_intra_word_spaces_once(s)
+        if ns == s: break
+        s = ns
+    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
+    s = re.sub(r"([,.;:!?])(?!\s|$)", r"\1 ", s)
+    return s
+
+# ---------- Đo ----------
+def load_cells(path: Path):
+    df = pd.read_excel(path, sheet_name=0, engine="openpyxl", dtype=str)
+    cols = [c for c in (v2.best_match_column(df, n) for n in v2.TARGET_COLS) if c]
+    return [h for c in cols for h in df[c].dropna()]
+
+def text_nodes(cells):
+    nodes = []
+    for h in cells:
+        for el in BeautifulSoup(h, "html.parser").descendants:
+            if isinstance(el, NavigableString) and not isinstance(el, (Comment, CData)):
+                nodes.append(str(el))
+    return nodes
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark sửa text node: bản cũ vs vn_textfix")
+    ap.add_argument("input", nargs="?", default=str(Path(__file__).with_name("SHG_Noicomdien.xlsx")))
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    cells = load_cells(Path(args.input))
+    nodes = text_nodes(cells)
+    mismatches = sum(legacy_clean_text(n) != vn_textfix.clean_text_node(n) for n in nodes)
+    vn_textfix.STATS.update(nodes=0, fast_path=0)
+    [vn_textfix.clean_text_node(n) for n in nodes]
+    fast = vn_textfix.STATS["fast_path"]
+    print(f"{len(cells)} ô HTML | {len(nodes)} text node | khác nhau: {mismatches} | fast path {fast / max(len(nodes), 1):.0%}")
+
+    t_old = best_of(lambda: [legacy_clean_text(n) for n in nodes], args.repeat)
+    t_new = best_of(lambda: [vn_textfix.clean_text_node(n) for n in nodes], args.repeat)
+    print(f"Text node : cũ {t_old * 1000:.0f} ms | mới {t_new * 1000:.0f} ms (x{t_old / t_new:.1f})")
+
+    def normalize_all():
+        return [v2.normalize_html_preserve_structure(h) for h in cells]
+    new_out = normalize_all()
+    t_new = best_of(normalize_all, args.repeat)
+    current = v2.clean_text_keep_html_textnode
+    v2.clean_text_keep_html_textnode = legacy_clean_text
+    try:
+        same = normalize_all() == new_out
+        t_old = best_of(normalize_all, args.repeat)
+    finally:
+        v2.clean_text_keep_html_textnode = current
+    print(f"Cả ô (normalize_html_preserve_structure): cũ {t_old * 1000:.0f} ms | mới {t_new * 1000:.0f} ms "
+          f"(x{t_old / t_new:.1f}) | kết quả giống hệt: {same}")
+
+if __name__ == "__main__":
+    main()
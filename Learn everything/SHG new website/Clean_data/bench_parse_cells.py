@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_parse_cells.py - đếm số lần BeautifulSoup parse mỗi ô, luồng cũ vs luồng 1 lần parse (process_cell).
+
+Luồng cũ cho mỗi ô: parse để clean -> str -> parse lại để tách chunk -> parse lại mỗi heading
+(strip_styles_html_fragment) -> parse lại mỗi chunk để lấy chunk_text.
+Luồng mới: parse 1 lần, clean + tách chunk + chunk_text trên cùng cây (chỉ parse lại chunk có thẻ script/template...).
+- Kiểm tra 2 luồng cho kết quả giống hệt (giá trị ô sau clean + mọi dòng chunk) trên workbook và bộ HTML khó.
+- Memo ô/text node được xoá trước mỗi lượt đo -> số đo là chi phí thật của ô chưa gặp.
+Cách chạy: python bench_parse_cells.py [file.xlsx] --repeat 3
+"""
+
+import argparse, html, random, time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pandas as pd
+from bs4 import BeautifulSoup, NavigableString, Comment, CData, Tag
+
+import vn_clean_and_split4_v2 as v2
+from vn_clean_and_split4_v2 import (absolutize, clean_text_keep_html_textnode, is_nonempty,
+                                    remove_styles_in_subtree, strip_styles_html_fragment, youtube_watch_url,
+                                    HEADING_TAGS, VOID_TAGS)
+
+BASE_URL = "https://sunhouse.com.vn"
+
+# ---------- Bộ đếm parse ----------
+PARSES = [0]
+_Soup = BeautifulSoup
+
+def counting_soup(*args, **kwargs):
+    PARSES[0] += 1
+    return _Soup(*args, **kwargs)
+
+v2.BeautifulSoup = BeautifulSoup = counting_soup
+
+# ---------- Luồng cũ (giữ nguyên để so sánh) ----------
+def legacy_chunks(raw_html: str, base_url: str) -> List[Dict]:
+    """
+    Trả về list các dict:
+      { "html": chunk_html, "youtube_links": [..] }
+    - Ảnh (<img>) nằm trong chunk và khi gặp <img> thì KẾT THÚC chunk
+    - Heading (h1..h6) bắt đầu chunk mới nếu buf đã có nội dung
+    - <iframe>: không render vào chunk_html; trích youtube link vào youtube_links
+    - Mọi thẻ render KHÔNG có style=""; ảnh sẽ được absolutize src theo base_url
+    """
+    if not is_nonempty(raw_html):
+        return []
+
+    soup = BeautifulSoup(str(raw_html), "html.parser")
+    remove_styles_in_subtree(soup)
+
+    body_nodes: List = list(soup.contents)
+    if len(body_nodes)==1 and isinstance(body_nodes[0], Tag) and body_nodes[0].name in ("html","body"):
+        body_nodes = list(body_nodes[0].contents)
+
+    chunks: List[Dict] = []
+    buf: List[str] = []
+    cur_yt: List[str] = []
+
+    def flush():
+        nonlocal buf, cur_yt
+        if buf or cur_yt:
+            chunks.append({"html": "".join(buf).strip(), "youtube_links": list(cur_yt)})
+            buf, cur_yt = [], []
+
+    def render_open_no_style(tag: Tag, base: str) -> str:
+        attrs = []
+        for k, v in tag.attrs.items():
+            if k.lower() == "style":
+                continue
+            if v is True:
+                attrs.append(f"{k}")
+            else:
+                vv = v
+                # chỉnh src/href tương đối -> tuyệt đối
+                if tag.name in {"img","source"} and k.lower() == "src":
+                    vv = absolutize(str(v), base)
+                elif tag.name == "a" and k.lower() == "href":
+                    vv = absolutize(str(v), base)
+                attrs.append(f'{k}="{html.escape(str(vv), quote=True)}"')
+        return f"<{tag.name}{(' ' + ' '.join(attrs)) if attrs else ''}>"
+
+    def render_self_no_style(tag: Tag, base: str) -> str:
+        return render_open_no_style(tag, base)  # giữ dạng <img ...>
+
+    def walk(nodes: Iterable):
+        nonlocal cur_yt
+        for node in nodes:
+            if isinstance(node, (Comment, CData)):
+                continue
+
+            if isinstance(node, NavigableString):
+                txt = clean_text_keep_html_textnode(str(node))
+                if txt:
+                    buf.append(txt)
+                continue
+
+            if isinstance(node, Tag):
+                # iframes -> lấy link youtube, KHÔNG render
+                if node.name == "iframe":
+                    yt = youtube_watch_url(node.get("src", ""))
+                    if yt:
+                        cur_yt.append(yt)
+                    # không render iframe vào HTML chunk
+                    continue
+
+                # Heading: nếu đã có nội dung -> ngắt trước
+                if node.name in HEADING_TAGS and any(f.strip() for f in buf):
+                    flush()
+                    buf.append(strip_styles_html_fragment(str(node)))
+                    continue
+
+                # thẻ tự đóng
+                if node.name in VOID_TAGS:
+                    buf.append(render_self_no_style(node, base_url))
+                    if node.name == "img":
+                        flush()
+                    continue
+
+                # thẻ thường
+                buf.append(render_open_no_style(node, base_url))
+                if node.contents:
+                    walk(node.contents)
+                buf.append(f"</{node.name}>")
+
+    walk(body_nodes)
+    flush()
+
+    # loại phần hoàn toàn rỗng
+    return [c for c in chunks if (c["html"] and c["html"].strip("<> \n\t\r")) or c["youtube_links"]]
+    # loại phần hoàn toàn rỗng
+    return [c for c in chunks if (c["html"] and c["html"].strip("<> \n\t\r")) or c["youtube_links"]]
+
+def legacy_cell(raw_html) -> tuple:
+    cleaned = raw_html
+    if not (raw_html is None or (isinstance(raw_html, float) and pd.isna(raw_html))):
+        try:
+            cleaned = str(v2.clean_soup(str(raw_html)))
+        except Exception:
+            cleaned = v2.collapse_double_quotes(clean_text_keep_html_textnode(str(raw_html)))
+    parts = legacy_chunks(cleaned, BASE_URL)
+    if not parts:
+        return cleaned, (), "" if cleaned is None else strip_styles_html_fragment(str(cleaned))
+    out = []
+    for part in parts:
+        ch = part["html"]
+        txt = BeautifulSoup(ch, "html.parser").get_text(separator=" ", strip=True)
+        out.append((ch, txt, tuple(v2.extract_img_urls(ch, BASE_URL)), tuple(part.get("youtube_links", []))))
+    return cleaned, tuple(out), ""
+
+def new_cell(raw_html) -> tuple:
+    return v2.process_cell(raw_html, BASE_URL)
+
+# ---------- Dữ liệu ----------
+TRICKY = [
+    "", "   ", "<p></p>", "chỉ text, không thẻ", "<p>a &amp; b &lt;c&gt;</p>", "<p>1 , 5 l &nbsp; x</p>",
+    "<h2 style='color:red'>Tiêu đề <b>đậm</b></h2><p>đoạn</p>", "<p>mở đầu</p><h3>A<script>x<y</script>B</h3>",
+    "<p>x</p><h2>a<!-- c -->b<![CDATA[z]]></h2>", "<p>x<template><b>t</b></template>y</p>",
+    "<div><img src='/a.jpg'>sau ảnh<img src=b.png></div>", "<iframe src='https://www.youtube.com/embed/abc'></iframe>",
+    "<p>a<iframe src='https://youtu.be/xyz'>fallback thiet ke</iframe>b</p>", "<ruby>漢<rt>kan</rt></ruby>",
+    "<p>t<style>p{}</style>u</p>", "<textarea>a<b>c</textarea>", "<p>a<br>b<br/>c</p>", "<ul><li>1<li>2</ul>",
+    "<p>\"\"trích\"\" dẫn</p>", "<a href='/x'>https://sunhouse.com.vn</a>", "<p>không đóng", "</p>lạc<p>",
+    "<html><body><h1>H</h1><p>p</p></body></html>", "<h1>đầu tiên</h1><h2>thứ hai</h2>", "<div/>x<span/>y",
+    "<p>a</p>\n\n<h4>\n</h4>\n<p>b</p>", "<p>&lt;script&gt;</p><h2>&amp;</h2>", "<noscript><p>n</p></noscript>z",
+    "<a href='/x'>u</a>  </b>\n<i>k</i>", "<!DOCTYPE html>  <p>a</p>x<?php y?>z", "<pre>  </b>\n</pre>",
+    "<p>x</p><h2>a</b>  </i>\nb<!DOCTYPE x>c</h2>", "<p>x</p><h2>a</b>b<!--k-->c</h2>",
+    "<p>Nồi cơm</p><img src=\"/a.jpg\" alt=\"Nồi\">", "<p>x</p><a href='/y' target='_blank' class='btn'>mua</a>",
+    "<h2 id='h' class='t' style='c'>a</h2><img width='1' src='b.jpg' alt='x' data-src='/c.jpg'>",
+]
+
+def fuzz_cells(n: int, seed: int = 7) -> List[str]:
+    rnd = random.Random(seed)
+    pieces = TRICKY + ["cong nang", "kich thuoc 2 l", "<b>", "</b>", "<h2>", "</h2>", "<img src='x.jpg'>", "  ", "\n"]
+    return ["".join(rnd.choice(pieces) for _ in range(rnd.randint(1, 8))) for _ in range(n)]
+
+def load_cells(path: Path):
+    df = pd.read_excel(path, sheet_name=0, engine="openpyxl", dtype=str)
+    cols = [c for c in (v2.best_match_column(df, n) for n in v2.TARGET_COLS) if c]
+    return [h for c in cols for h in df[c]]
+
+def reset_memos():
+    v2._process_cell.cache_clear()
+    v2.clean_text_keep_html_textnode.cache_clear()
+
+def run(fn, cells) -> tuple:
+    reset_memos()
+    PARSES[0] = 0
+    t0 = time.perf_counter()
+    out = [fn(h) for h in cells]
+    return out, PARSES[0], time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark số lần parse mỗi ô: luồng cũ vs process_cell")
+    ap.add_argument("input", nargs="?", default=str(Path(__file__).with_name("SHG_Noicomdien.xlsx")))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--fuzz", type=int, default=2000, help="số ô HTML ngẫu nhiên để kiểm tra giống hệt")
+    args = ap.parse_args()
+
+    fuzz = TRICKY + fuzz_cells(args.fuzz)
+    same_fuzz = run(legacy_cell, fuzz)[0] == run(new_cell, fuzz)[0]
+    print(f"Bộ HTML khó: {len(fuzz)} ô | kết quả giống hệt: {same_fuzz}")
+
+    # mỗi ô khác nhau 1 lần (ô trùng thì memo của luồng mới không parse lần nào -> không công bằng)
+    cells = list(dict.fromkeys(load_cells(Path(args.input))))
+    old_out, old_parses, _ = run(legacy_cell, cells)
+    new_out, new_parses, _ = run(new_cell, cells)
+    t_old = min(run(legacy_cell, cells)[2] for _ in range(args.repeat))
+    t_new = min(run(new_cell, cells)[2] for _ in range(args.repeat))
+    n = max(len(cells), 1)
+    print(f"Workbook: {len(cells)} ô khác nhau | kết quả giống hệt: {old_out == new_out}")
+    print(f"Parse / ô : cũ {old_parses / n:.2f} | mới {new_parses / n:.2f}")
+    print(f"Thời gian : cũ {t_old * 1000:.0f} ms | mới {t_new * 1000:.0f} ms (x{t_old / t_new:.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import pandas as pd
 
+import vn_textfix
+
 # ========= CẤU HÌNH =========
 DEFAULT_WANTED = ["Thiết kế", "Công năng", "Tổng quan"]
 IMG_EXT = r"(?:jpg|jpeg|png|webp|gif|bmp|tiff|svg)"
@@ -25,19 +27,6 @@ PARENT_SKU_CANDIDATES = [
     "Thuộc mã hàng nào", "Parent SKU", "SKU cha", "Thuộc SKU", "Mã sản phẩm chính"
 ]
 
-COMMON_FIXES = {
-    r"\bthiet ke\b": "thiết kế",
-    r"\bcong nang\b": "công năng",
-    r"\btong quan\b": "tổng quan",
-    r"\bkieu dang\b": "kiểu dáng",
-    r"\bkich thuoc\b": "kích thước",
-    r"\bbao hanh\b": "bảo hành",
-    r"\bdung tich\b": "dung tích",
-    r"\bcong suat\b": "công suất",
-    r"\binox\b": "inox",
-    r"\bnoi com\b": "nồi cơm",
-}
-
 # ========= REGEX ẢNH =========
 HTML_IMG_REL = re.compile(
     rf"""(?ix)<img[^>]+src\s*=\s*["']?(?P<url>[^"'>]+?\.(?:{IMG_EXT})(?:\?[^\s"'>]*)?)["']?[^>]*>"""
@@ -93,37 +82,9 @@ def find_any_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
         return scored[0][1]
     return None
 
-def fix_numbers_units(s: str) -> str:
-    # Chỉ sửa trong text node; không đụng tới HTML
-    s = re.sub(r"(\d)\s*([.,])\s*(\d)", r"\1\2\3", s)  # 1 , 5 -> 1,5
-    s = re.sub(r"(\d)(?:\s*[lL])\b", r"\1L", s)       # 2 l -> 2L
-    s = re.sub(r"(\d)\s*[-]\s*(\d)", r"\1 – \2", s)   # 1 - 2 -> 1 – 2
-    return s
-
-def fix_intra_word_spaces_once(s: str) -> str:
-    # Thu gọn lỗi tách âm trong tiếng Việt, tránh phá layout.
-    s = re.sub(rf"([A-Za-zÀ-ỹđĐ])\s+(ng|nh|ch|c|m|n|t|p)\b", r"\1\2", s)
-    s = re.sub(rf"([aăâeêioôơuưyAĂÂEÊIOÔƠUƯY])\s+([iuyIUY])\b", r"\1\2", s)
-    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
-    # Không convert \n vì \n trong HTML thường không quyết định xuống dòng; br/p sẽ giữ layout
-    s = re.sub(r"[ \t]{2,}", " ", s)
-    return s
-
 def clean_text_keep_html_textnode(text: str) -> str:
-    if text is None: return text
-    s = unicodedata.normalize("NFC", text)
-    s = fix_numbers_units(s)
-    for _ in range(2):
-        for pattern, repl in COMMON_FIXES.items():
-            s = re.sub(pattern, repl, s, flags=re.IGNORECASE)
-    for _ in range(4):
-        new_s = fix_intra_word_spaces_once(s)
-        if new_s == s: break
-        s = new_s
-    # khoảng trắng trước dấu câu + 1 space sau dấu câu (nếu không có thẻ)
-    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
-    s = re.sub(r"([,.;:!?])(?!\s|$)", r"\1 ", s)
-    return s
+    # Bản này không gộp ""..."" (khác vn_clean_and_split4_v2.py)
+    return vn_textfix.clean_text_node(text, collapse_quotes=False)
 
 def normalize_html_preserve_structure(raw_html: str) -> str:
     """Sửa lỗi TV trong text nodes, giữ nguyên thẻ HTML."""
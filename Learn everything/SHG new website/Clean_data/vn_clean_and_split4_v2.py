@@ -19,18 +19,34 @@ Bước 2:
 Доп:
 - Khi tách, ảnh <img> có src tương đối sẽ được absolutize với --base-url (mặc định https://sunhouse.com.vn)
 - Khi tách, <iframe> được bỏ khỏi HTML chunk; link YouTube được đưa vào cột youtube_links
+- --jobs N: chia dòng cho N process (mỗi process clean + tách cả 3 cột cho lô dòng của nó), ghép lại đúng thứ tự;
+  file xuất giống hệt khi chạy 1 process
+- Mỗi ô chỉ parse HTML 1 lần (process_cell): clean, tách chunk, chunk_text đều làm trên cùng 1 cây
+  (trước: ~5,6 lần / ô). Đo: python bench_parse_cells.py
+- Nhiều file / thư mục (cả danh mục): python vn_clean_and_split4_v2.py <thư mục|file...> --jobs 0
+  -> process_batch: 1 pool chung cho đọc workbook + clean/tách chunk, file nào xong ghi ngay, cuối cùng in
+  bảng thời gian từng file (đọc / clean / ghi / tổng); file lỗi không dừng cả batch
 """
 
-import argparse, re, unicodedata, html, sys
+import argparse, functools, os, re, time, unicodedata, html, sys
+import concurrent.futures as cf
 from pathlib import Path
 from typing import List, Dict, Optional, Iterable
 from urllib.parse import urlparse, parse_qs, urljoin
 import pandas as pd
 from bs4 import BeautifulSoup, NavigableString, Tag, Comment, CData
+from bs4.element import Doctype, PreformattedString
+
+# Sửa lỗi TV trong text node: regex compile sẵn + fast path (xem vn_textfix.py); import lại để giữ tên cũ
+from vn_textfix import COMMON_FIXES, fix_numbers_units, collapse_double_quotes, fix_intra_word_spaces_once
+import vn_textfix
 
 # ================= CẤU HÌNH =================
 TARGET_COLS = ["Tổng quan", "Thiết kế", "Công năng"]
 HEADING_TAGS = {"h1","h2","h3","h4","h5","h6"}
+# Memo LRU (số mục): text node lặp lại rất nhiều (đoạn boilerplate, biến thể SKU dùng chung đoạn văn)
+TEXT_MEMO_SIZE = 65536
+CELL_MEMO_SIZE = 2048
 VOID_TAGS = {"img","br","hr","input","source","meta","link","area","col","embed","param","track","wbr"}
 
 SKU_CANDIDATES = [
@@ -42,19 +58,6 @@ PARENT_SKU_CANDIDATES = [
     "Thuộc mã hàng nào", "Parent SKU", "SKU cha", "Thuộc SKU", "Mã sản phẩm chính"
 ]
 
-COMMON_FIXES = {
-    r"\bthiet ke\b": "thiết kế",
-    r"\bcong nang\b": "công năng",
-    r"\btong quan\b": "tổng quan",
-    r"\bkieu dang\b": "kiểu dáng",
-    r"\bkich thuoc\b": "kích thước",
-    r"\bbao hanh\b": "bảo hành",
-    r"\bdung tich\b": "dung tích",
-    r"\bcong suat\b": "công suất",
-    r"\binox\b": "inox",
-    r"\bnoi com\b": "nồi cơm",
-}
-
 # ================= TIỆN ÍCH =================
 def is_nonempty(x) -> bool:
     return x is not None and not (isinstance(x, float) and pd.isna(x)) and str(x).strip() != ""
@@ -91,44 +94,12 @@ def find_any_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     return None
 
 # --------- TEXT CLEANING (chỉ text node) ---------
-def fix_numbers_units(s: str) -> str:
-    s = re.sub(r"(\d)\s*([.,])\s*(\d)", r"\1\2\3", s)  # 1 , 5 -> 1,5
-    s = re.sub(r"(\d)(?:\s*[lL])\b", r"\1L", s)       # 2 l -> 2L
-    s = re.sub(r"(\d)\s*[-]\s*(\d)", r"\1 – \2", s)   # 1 - 2 -> 1 – 2
-    return s
-
-# Gộp ""..."" -> "..."
-_DBLQUOTE_PAIR = re.compile(r'""\s*([^"]*?)\s*""')
-
-def collapse_double_quotes(s: str) -> str:
-    for _ in range(3):
-        ns = _DBLQUOTE_PAIR.sub(r'"\1"', s)
-        if ns == s: break
-        s = ns
-    return s
-
-def fix_intra_word_spaces_once(s: str) -> str:
-    s = re.sub(rf"([A-Za-zÀ-ỹđĐ])\s+(ng|nh|ch|c|m|n|t|p)\b", r"\1\2", s)
-    s = re.sub(rf"([aăâeêioôơuưyAĂÂEÊIOÔƠUƯY])\s+([iuyIUY])\b", r"\1\2", s)
-    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
-    s = re.sub(r"[ \t]{2,}", " ", s)
-    return s
+_HAS_URL = re.compile(r"https?://")
 
+@functools.lru_cache(maxsize=TEXT_MEMO_SIZE)
 def clean_text_keep_html_textnode(text: str) -> str:
-    if text is None: return text
-    s = unicodedata.normalize("NFC", text)
-    s = fix_numbers_units(s)
-    s = collapse_double_quotes(s)
-    for _ in range(2):
-        for pattern, repl in COMMON_FIXES.items():
-            s = re.sub(pattern, repl, s, flags=re.IGNORECASE)
-    for _ in range(4):
-        ns = fix_intra_word_spaces_once(s)
-        if ns == s: break
-        s = ns
-    s = re.sub(r"\s+([,.;:!?])", r"\1", s)
-    s = re.sub(r"([,.;:!?])(?!\s|$)", r"\1 ", s)
-    return s
+    """Memo theo text gốc của node (cả bước clean lẫn bước tách chunk)."""
+    return vn_textfix.clean_text_node(text)
 
 def remove_styles_in_subtree(soup_or_tag: Tag):
     for t in (soup_or_tag.find_all(True) if hasattr(soup_or_tag, "find_all") else []):
@@ -136,31 +107,50 @@ def remove_styles_in_subtree(soup_or_tag: Tag):
             del t.attrs["style"]
     return soup_or_tag
 
+def clean_soup(raw_html: str) -> BeautifulSoup:
+    """Parse 1 lần, bỏ style và sửa text node ngay trên cây (cây này dùng tiếp cho bước tách chunk)."""
+    soup = BeautifulSoup(raw_html, "html.parser")
+    # 1) Bỏ inline style
+    remove_styles_in_subtree(soup)
+    # 2) Sửa các text node (kể cả fallback text trong <iframe>)
+    skip_tags = {"script", "style", "video", "audio", "source"}  # không skip iframe để xử lý text fallback
+    for el in soup.descendants:
+        if isinstance(el, (Comment, CData)):
+            continue
+        if isinstance(el, NavigableString):
+            parent = el.parent.name if el.parent else ""
+            if parent in skip_tags:
+                continue
+            if parent == "a" and _HAS_URL.search(str(el)):
+                continue
+            cleaned = clean_text_keep_html_textnode(str(el))
+            if cleaned != str(el):
+                el.replace_with(cleaned)
+    return soup
+
 def normalize_html_preserve_structure(raw_html: str) -> str:
     """Sửa text node + gộp ""..."" -> "..." và loại bỏ toàn bộ style="" trong HTML."""
     if raw_html is None or (isinstance(raw_html, float) and pd.isna(raw_html)): return raw_html
     try:
-        soup = BeautifulSoup(str(raw_html), "html.parser")
-        # 1) Bỏ inline style
-        remove_styles_in_subtree(soup)
-        # 2) Sửa các text node (kể cả fallback text trong <iframe>)
-        skip_tags = {"script", "style", "video", "audio", "source"}  # không skip iframe để xử lý text fallback
-        for el in soup.descendants:
-            if isinstance(el, (Comment, CData)):
-                continue
-            if isinstance(el, NavigableString):
-                parent = el.parent.name if el.parent else ""
-                if parent in skip_tags:
-                    continue
-                if parent == "a" and re.search(r"https?://", str(el)):
-                    continue
-                cleaned = clean_text_keep_html_textnode(str(el))
-                if cleaned != str(el):
-                    el.replace_with(cleaned)
-        return str(soup)
+        return str(clean_soup(str(raw_html)))
     except Exception:
         return collapse_double_quotes(clean_text_keep_html_textnode(str(raw_html)))
 
+def memo_stats(since: Optional[Dict[str, tuple]] = None) -> Dict[str, tuple]:
+    """(hits, misses) của 2 memo; since = mốc trước đó -> trả phần chênh lệch."""
+    now = {"text": clean_text_keep_html_textnode.cache_info()[:2], "cell": _process_cell.cache_info()[:2]}
+    if since:
+        now = {k: (h - since[k][0], m - since[k][1]) for k, (h, m) in now.items()}
+    return now
+
+def format_memo_stats(stats: Dict[str, tuple]) -> str:
+    parts = []
+    for name, label in (("cell", "ô"), ("text", "text node")):
+        hits, misses = stats[name]
+        total = hits + misses
+        parts.append(f"{label} {hits}/{total} ({hits / total if total else 0:.0%})")
+    return "Memo trúng: " + " | ".join(parts)
+
 # --------- URL UTILS ---------
 def absolutize(u: str, base_url: str) -> str:
     if not u: return u
@@ -215,7 +205,29 @@ def html_chunks_by_image_and_heading(raw_html: str, base_url: str) -> List[Dict]
 
     soup = BeautifulSoup(str(raw_html), "html.parser")
     remove_styles_in_subtree(soup)
+    return chunks_from_soup(soup, base_url)
+
+# Chuỗi trong các thẻ này không phải NavigableString thường khi parse lại (get_text bỏ qua) hoặc
+# html.parser đọc nội dung như text thô -> không tính được text của chunk từ cây, phải parse chunk
+TEXT_UNSAFE_TAGS = {"script", "style", "template", "rt", "rp", "textarea", "title",
+                    "xmp", "noembed", "noframes", "noscript", "plaintext"}
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+PRESERVE_WS_TAGS = {"pre", "textarea"}
+
+def _is_text(node) -> bool:
+    """Chuỗi thường (không phải comment/CDATA/doctype...)."""
+    return isinstance(node, NavigableString) and not isinstance(node, PreformattedString)
 
+def keeps_whitespace(node) -> bool:
+    return any(p.name in PRESERVE_WS_TAGS for p in node.parents)
+
+def chunks_from_soup(soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    """
+    Như html_chunks_by_image_and_heading nhưng đi thẳng trên cây đã parse (+ đã bỏ style).
+    Mỗi chunk có thêm "text" = BeautifulSoup(html).get_text(" ", strip=True) tính từ các mẩu text lúc render
+    (mẩu liền nhau gộp lại như khi parse); None nếu chunk có mẩu text chứa '<'/'&' hoặc thẻ TEXT_UNSAFE_TAGS.
+    """
     body_nodes: List = list(soup.contents)
     if len(body_nodes)==1 and isinstance(body_nodes[0], Tag) and body_nodes[0].name in ("html","body"):
         body_nodes = list(body_nodes[0].contents)
@@ -223,16 +235,62 @@ def html_chunks_by_image_and_heading(raw_html: str, base_url: str) -> List[Dict]
     chunks: List[Dict] = []
     buf: List[str] = []
     cur_yt: List[str] = []
+    texts: List[Optional[str]] = []  # mẩu text theo thứ tự render; None = thẻ (ngăn cách)
+    text_ok = True
+
+    def chunk_text() -> Optional[str]:
+        if not text_ok:
+            return None
+        out, run = [], []
+        for t in texts + [None]:
+            if t is not None:
+                run.append(t)
+            elif run:
+                joined = "".join(run).strip()
+                if joined:
+                    out.append(joined)
+                run = []
+        return " ".join(out)
 
     def flush():
-        nonlocal buf, cur_yt
+        nonlocal buf, cur_yt, texts, text_ok
         if buf or cur_yt:
-            chunks.append({"html": "".join(buf).strip(), "youtube_links": list(cur_yt)})
+            chunks.append({"html": "".join(buf).strip(), "youtube_links": list(cur_yt), "text": chunk_text()})
             buf, cur_yt = [], []
+        texts, text_ok = [], True
+
+    def add_text(txt: str):
+        nonlocal text_ok
+        buf.append(txt)
+        texts.append(txt)
+        if "<" in txt or "&" in txt:
+            text_ok = False
+
+    def add_heading(node: Tag):
+        # str(node) thay cho strip_styles_html_fragment(str(node)): cây đã bỏ style, không parse lại
+        nonlocal text_ok
+        pieces: List[Optional[str]] = [None]
+        for d in node.descendants:
+            if isinstance(d, Tag):
+                pieces.append(None)
+                if d.name in TEXT_UNSAFE_TAGS:
+                    text_ok = False
+            elif isinstance(d, CData):
+                pieces.extend([None, str(d), None])
+            elif isinstance(d, Doctype) or _is_text(d) and _is_text(d.previous_sibling):
+                # parse lại sẽ gộp/đổi chuỗi (hiếm) -> làm như cũ: heading lấy từ HTML đã clean parse lại, rồi strip_styles
+                buf.append(strip_styles_html_fragment(strip_styles_html_fragment(str(node))))
+                text_ok = False
+                return
+            elif _is_text(d):
+                pieces.extend([None, str(d)])  # heading giữ nguyên comment/thẻ đóng -> mỗi chuỗi 1 node
+        buf.append(str(node))
+        texts.extend(pieces + [None])
 
     def render_open_no_style(tag: Tag, base: str) -> str:
         attrs = []
-        for k, v in tag.attrs.items():
+        # sắp xếp như formatter mặc định của bs4 (luồng cũ render từ str(soup) parse lại)
+        for k, v in sorted(tag.attrs.items()):
             if k.lower() == "style":
                 continue
             if v is True:
@@ -251,15 +309,34 @@ def html_chunks_by_image_and_heading(raw_html: str, base_url: str) -> List[Dict]
         return render_open_no_style(tag, base)  # giữ dạng <img ...>
 
     def walk(nodes: Iterable):
-        nonlocal cur_yt
+        nonlocal cur_yt, text_ok
+        run: List = []  # chuỗi liền kề (vd. tách bởi thẻ đóng lạc) = 1 text node khi parse lại HTML đã clean
+
+        def end_run():
+            if run:
+                joined = "".join(map(str, run))
+                if len(run) > 1 and not joined.strip(ASCII_SPACES) and not keeps_whitespace(run[-1]):
+                    joined = "\n" if "\n" in joined else " "  # như bs4 khi parse lại
+                txt = clean_text_keep_html_textnode(joined)
+                if txt:
+                    add_text(txt)
+                run.clear()
+
         for node in nodes:
+            if _is_text(node):
+                run.append(node)
+                continue
+            end_run()
+
             if isinstance(node, (Comment, CData)):
                 continue
 
             if isinstance(node, NavigableString):
                 txt = clean_text_keep_html_textnode(str(node))
                 if txt:
-                    buf.append(txt)
+                    add_text(txt)
+                if isinstance(node, Doctype):
+                    run.append("\n")  # str() ghi "<!DOCTYPE ...>\n"
                 continue
 
             if isinstance(node, Tag):
@@ -274,21 +351,27 @@ def html_chunks_by_image_and_heading(raw_html: str, base_url: str) -> List[Dict]
                 # Heading: nếu đã có nội dung -> ngắt trước
                 if node.name in HEADING_TAGS and any(f.strip() for f in buf):
                     flush()
-                    buf.append(strip_styles_html_fragment(str(node)))
+                    add_heading(node)
                     continue
 
                 # thẻ tự đóng
                 if node.name in VOID_TAGS:
                     buf.append(render_self_no_style(node, base_url))
+                    texts.append(None)
                     if node.name == "img":
                         flush()
                     continue
 
                 # thẻ thường
                 buf.append(render_open_no_style(node, base_url))
+                texts.append(None)
+                if node.name in TEXT_UNSAFE_TAGS:
+                    text_ok = False
                 if node.contents:
                     walk(node.contents)
                 buf.append(f"</{node.name}>")
+                texts.append(None)
+        end_run()
 
     walk(body_nodes)
     flush()
@@ -296,9 +379,10 @@ def html_chunks_by_image_and_heading(raw_html: str, base_url: str) -> List[Dict]
     # loại phần hoàn toàn rỗng
     return [c for c in chunks if (c["html"] and c["html"].strip("<> \n\t\r")) or c["youtube_links"]]
 
+IMG_SRC = re.compile(r"""<img[^>]+src\s*=\s*["']?([^"'>\s]+)""", re.IGNORECASE)
+
 def extract_img_urls(html_chunk: str, base_url: str) -> List[str]:
     if not html_chunk: return []
-    IMG_SRC = re.compile(r"""<img[^>]+src\s*=\s*["']?([^"'>\s]+)""", re.IGNORECASE)
     urls, seen = [], set()
     for m in IMG_SRC.finditer(html_chunk):
         u = m.group(1).strip()
@@ -308,92 +392,173 @@ def extract_img_urls(html_chunk: str, base_url: str) -> List[str]:
     return urls
 
 # ================= MAIN FLOW =================
-def process(input_path: Path, sheet_kw: Optional[str|int], base_url: str):
-    # đọc sheet
-    if sheet_kw is None:
-        df = pd.read_excel(input_path, sheet_name=0, engine="openpyxl", dtype=str)
+CHUNK_COLUMNS = [
+    "source_row_excel","SKU","column_name","part_index",
+    "chunk_html","chunk_text","first_image_url","all_image_urls","youtube_links"
+]
+
+def sku_for_row(row: Dict, sku_col: Optional[str], parent_sku_col: Optional[str]) -> str:
+    # SKU ưu tiên Parent
+    if parent_sku_col and is_nonempty(row.get(parent_sku_col)):
+        return str(row.get(parent_sku_col)).strip()
+    if sku_col and is_nonempty(row.get(sku_col)):
+        return str(row.get(sku_col)).strip()
+    return ""
+
+@functools.lru_cache(maxsize=CELL_MEMO_SIZE)
+def _process_cell(raw_html: str, base_url: str):
+    """
+    1 ô -> parse đúng 1 lần: clean trên cây, rồi tách chunk + lấy text chunk ngay trên cây đó.
+    Trả (html đã clean, ((chunk_html, chunk_text, ảnh, youtube), ...), chunk_html khi không có phần nào).
+    Memo cả ô: ô trùng nhau (biến thể SKU) chỉ xử lý 1 lần.
+    """
+    try:
+        soup = clean_soup(raw_html)
+        cleaned = str(soup)
+    except Exception:
+        soup = None
+        cleaned = collapse_double_quotes(clean_text_keep_html_textnode(raw_html))
+
+    if not is_nonempty(cleaned):
+        chunks = []
+    elif soup is None:
+        chunks = html_chunks_by_image_and_heading(cleaned, base_url)
     else:
-        try:
-            idx = int(sheet_kw)
-            df = pd.read_excel(input_path, sheet_name=idx, engine="openpyxl", dtype=str)
-        except ValueError:
-            df = pd.read_excel(input_path, sheet_name=sheet_kw, engine="openpyxl", dtype=str)
+        chunks = chunks_from_soup(soup, base_url)
+
+    parts = []
+    for c in chunks:
+        ch = c["html"]
+        txt = c.get("text")
+        if txt is None:
+            txt = BeautifulSoup(ch, "html.parser").get_text(separator=" ", strip=True)
+        parts.append((ch, txt, tuple(extract_img_urls(ch, base_url)), tuple(c.get("youtube_links", []))))
+    empty_html = "" if parts else strip_styles_html_fragment(cleaned)
+    return cleaned, tuple(parts), empty_html
+
+def process_cell(raw_html, base_url: str):
+    """(giá trị ô sau clean, các phần chunk, chunk_html khi không có phần nào); ô trống/NaN giữ nguyên như cũ."""
+    if raw_html is None or (isinstance(raw_html, float) and pd.isna(raw_html)):
+        return raw_html, (), "" if raw_html is None else strip_styles_html_fragment(str(raw_html))
+    return _process_cell(str(raw_html), base_url)
+
+def chunk_rows_for_cell(ridx, cell, sku_val: str, target_logical_name: str) -> List[Dict]:
+    """Các dòng của file *_chunks.xlsx cho 1 ô (cell = kết quả process_cell)."""
+    _, parts, empty_html = cell
+    if not parts:
+        return [{
+            "source_row_excel": int(ridx)+2,
+            "SKU": sku_val,
+            "column_name": target_logical_name,
+            "part_index": 1,
+            "chunk_html": empty_html,
+            "chunk_text": "",
+            "first_image_url": "",
+            "all_image_urls": "",
+            "youtube_links": ""
+        }]
+
+    rows = []
+    for i, (ch, txt, imgs, yts) in enumerate(parts, start=1):
+        rows.append({
+            "source_row_excel": int(ridx)+2,
+            "SKU": sku_val,
+            "column_name": target_logical_name,
+            "part_index": i,
+            "chunk_html": ch,  # không style, ảnh đã absolutize
+            "chunk_text": txt,
+            "first_image_url": imgs[0] if imgs else "",
+            "all_image_urls": ";".join(imgs),
+            "youtube_links": ";".join(yts)
+        })
+    return rows
+
+def process_rows(records: List[tuple], col_map: Dict[str, str], sku_col: Optional[str],
+                 parent_sku_col: Optional[str], base_url: str):
+    """
+    Clean + tách chunk 3 cột cho 1 lô dòng (chạy trong luồng chính hoặc trong process con của --jobs).
+    records: [(ridx, {cột: giá trị})]. Trả (giá trị đã clean theo cột, dòng chunk theo cột logic, memo delta).
+    """
+    memo_start = memo_stats()
+    # số lần 1 cột thật được clean (2 tên logic khớp cùng 1 cột -> apply 2 lần như trước)
+    uses: Dict[str, int] = {}
+    for real_col in col_map.values():
+        uses[real_col] = uses.get(real_col, 0) + 1
+    cleaned: Dict[str, list] = {real_col: [] for real_col in uses}
+    chunks: Dict[str, List[Dict]] = {name: [] for name in col_map}
+    for ridx, row in records:
+        row = dict(row)
+        cells = {}
+        for real_col, n in uses.items():
+            value = row[real_col]
+            for _ in range(n - 1):
+                value = normalize_html_preserve_structure(value)
+            cells[real_col] = process_cell(value, base_url)
+            row[real_col] = cells[real_col][0]
+            cleaned[real_col].append(row[real_col])
+        sku_val = sku_for_row(row, sku_col, parent_sku_col)
+        for name, real_col in col_map.items():
+            chunks[name].extend(chunk_rows_for_cell(ridx, cells[real_col], sku_val, name))
+    return cleaned, chunks, memo_stats(since=memo_start)
+
+def _process_rows_job(args):
+    return process_rows(*args)
+
+def split_batches(records: List, jobs: int) -> List[List]:
+    """Lô liên tiếp (giữ thứ tự), ~4 lô / process để chia tải đều khi ô dài ngắn khác nhau."""
+    size = max(1, -(-len(records) // (jobs * 4)))
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+def effective_jobs(jobs: int) -> int:
+    """0 = số CPU; không vượt số CPU vì process thừa chỉ tốn thêm chi phí khởi tạo + truyền dữ liệu."""
+    cpus = os.cpu_count() or 1
+    return min(jobs, cpus) if jobs > 0 else cpus
+
+def read_sheet(input_path: Path, sheet_kw: Optional[str|int]) -> pd.DataFrame:
+    if sheet_kw is None:
+        return pd.read_excel(input_path, sheet_name=0, engine="openpyxl", dtype=str)
+    try:
+        idx = int(sheet_kw)
+        return pd.read_excel(input_path, sheet_name=idx, engine="openpyxl", dtype=str)
+    except ValueError:
+        return pd.read_excel(input_path, sheet_name=sheet_kw, engine="openpyxl", dtype=str)
 
-    # map cột
+def prepare_sheet(df: pd.DataFrame):
+    """(col_map, sku_col, parent_sku_col, records); col_map rỗng = không có cột mục tiêu nào."""
     col_map: Dict[str, str] = {}
     for name in TARGET_COLS:
         c = best_match_column(df, name)
         if c: col_map[name] = c
-    if not col_map:
-        sys.exit(f"Không tìm thấy các cột mục tiêu {TARGET_COLS}. Kiểm tra tên cột.")
-
     # SKU/Parent SKU nếu có
     sku_col = find_any_column(df, SKU_CANDIDATES)
     parent_sku_col = find_any_column(df, PARENT_SKU_CANDIDATES)
+    needed = list(dict.fromkeys([*col_map.values(), *(c for c in (sku_col, parent_sku_col) if c)]))
+    records = list(zip(df.index, df[needed].to_dict("records"))) if col_map else []
+    return col_map, sku_col, parent_sku_col, records
+
+def _read_sheet_job(args):
+    """Chạy trong process của --jobs: đọc + chuẩn bị 1 workbook (trả kèm thời gian đọc)."""
+    input_path, sheet_kw = args
+    t0 = time.perf_counter()
+    df = read_sheet(input_path, sheet_kw)
+    return df, prepare_sheet(df), time.perf_counter() - t0
+
+def write_outputs(input_path: Path, df: pd.DataFrame, results: List[tuple], note: str = "") -> Dict[str, tuple]:
+    """Ghép kết quả các lô dòng (đúng thứ tự) rồi ghi 4 file; trả memo delta cộng dồn."""
+    cleaned = {real_col: [v for r in results for v in r[0][real_col]] for real_col in results[0][0]}
+    memo = {k: tuple(map(sum, zip(*(r[2][k] for r in results)))) for k in results[0][2]}
 
-    # ---- B1: Clean giữ HTML + bỏ style + gộp ""..."" ----
     df_clean = df.copy()
-    for logical, real_col in col_map.items():
-        df_clean[real_col] = df_clean[real_col].apply(normalize_html_preserve_structure)
+    for real_col, values in cleaned.items():
+        df_clean[real_col] = pd.Series(values, index=df.index, dtype=df[real_col].dtype)
 
     out_clean = input_path.with_name(input_path.stem + "_clean.xlsx")
     df_clean.to_excel(out_clean, index=False, engine="openpyxl")
 
-    # ---- B2: Chia 3 file chunk theo ảnh, bỏ iframe, trích YouTube + absolutize ảnh ----
+    # ---- B2: 3 file chunk (bỏ iframe, trích YouTube + absolutize ảnh) ----
     def make_chunk_df(target_logical_name: str) -> pd.DataFrame:
-        real_col = col_map.get(target_logical_name)
-        if not real_col:
-            return pd.DataFrame(columns=[
-                "source_row_excel","SKU","column_name","part_index",
-                "chunk_html","chunk_text","first_image_url","all_image_urls","youtube_links"
-            ])
-
-        rows = []
-        for ridx, row in df_clean.iterrows():
-            raw_html = row.get(real_col)
-            parts = html_chunks_by_image_and_heading(raw_html, base_url)
-
-            # SKU ưu tiên Parent
-            sku_val = ""
-            if parent_sku_col and is_nonempty(row.get(parent_sku_col)):
-                sku_val = str(row.get(parent_sku_col)).strip()
-            elif sku_col and is_nonempty(row.get(sku_col)):
-                sku_val = str(row.get(sku_col)).strip()
-
-            if not parts:
-                rows.append({
-                    "source_row_excel": int(ridx)+2,
-                    "SKU": sku_val,
-                    "column_name": target_logical_name,
-                    "part_index": 1,
-                    "chunk_html": "" if raw_html is None else strip_styles_html_fragment(str(raw_html)),
-                    "chunk_text": "",
-                    "first_image_url": "",
-                    "all_image_urls": "",
-                    "youtube_links": ""
-                })
-                continue
-
-            for i, part in enumerate(parts, start=1):
-                ch = part["html"]
-                yts = part.get("youtube_links", [])
-                txt = BeautifulSoup(ch, "html.parser").get_text(separator=" ", strip=True)
-                imgs = extract_img_urls(ch, base_url)
-                rows.append({
-                    "source_row_excel": int(ridx)+2,
-                    "SKU": sku_val,
-                    "column_name": target_logical_name,
-                    "part_index": i,
-                    "chunk_html": ch,  # không style, ảnh đã absolutize
-                    "chunk_text": txt,
-                    "first_image_url": imgs[0] if imgs else "",
-                    "all_image_urls": ";".join(imgs),
-                    "youtube_links": ";".join(yts)
-                })
-        return pd.DataFrame(rows, columns=[
-            "source_row_excel","SKU","column_name","part_index",
-            "chunk_html","chunk_text","first_image_url","all_image_urls","youtube_links"
-        ])
+        rows = [row for r in results for row in r[1].get(target_logical_name, [])]
+        return pd.DataFrame(rows, columns=CHUNK_COLUMNS)
 
     df_tongquan = make_chunk_df("Tổng quan")
     df_thietke  = make_chunk_df("Thiết kế")
@@ -412,6 +577,27 @@ def process(input_path: Path, sheet_kw: Optional[str|int], base_url: str):
     print(f"  2) Tổng quan chunks : {out_tq}")
     print(f"  3) Thiết kế  chunks : {out_tk}")
     print(f"  4) Công năng chunks : {out_cn}")
+    print("  " + format_memo_stats(memo) + note)
+    return memo
+
+def process(input_path: Path, sheet_kw: Optional[str|int], base_url: str, jobs: int = 1):
+    # đọc sheet + map cột
+    df = read_sheet(input_path, sheet_kw)
+    col_map, sku_col, parent_sku_col, records = prepare_sheet(df)
+    if not col_map:
+        sys.exit(f"Không tìm thấy các cột mục tiêu {TARGET_COLS}. Kiểm tra tên cột.")
+
+    # ---- B1 + B2 theo dòng: clean giữ HTML + bỏ style + gộp ""..."", rồi chia chunk theo ảnh ----
+    # --jobs N: chia dòng thành lô liên tiếp cho N process, ghép kết quả lại đúng thứ tự dòng
+    jobs = effective_jobs(jobs)
+    args = (col_map, sku_col, parent_sku_col, base_url)
+    if jobs > 1 and len(records) > 1:
+        with cf.ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(_process_rows_job, [(batch, *args) for batch in split_batches(records, jobs)]))
+    else:
+        results = [process_rows(records, *args)]
+
+    write_outputs(input_path, df, results, f"  ({jobs} process, memo riêng từng process)" if jobs > 1 else "")
 
 def main():
     ap = argparse.ArgumentParser(
@@ -420,13 +606,14 @@ def main():
     ap.add_argument("input", help="File Excel đầu vào (.xlsx)")
     ap.add_argument("--sheet", default=None, help="Tên hoặc index sheet (mặc định: sheet đầu)")
     ap.add_argument("--base-url", default="https://sunhouse.com.vn", help="Base URL để cộng vào các đường dẫn ảnh tương đối")
+    ap.add_argument("--jobs", type=int, default=1, help="Số process clean + tách chunk song song theo dòng (mặc định 1; 0 = số CPU)")
     args = ap.parse_args()
 
     in_path = Path(args.input)
     if not in_path.exists():
         sys.exit(f"Không tìm thấy file: {in_path}")
 
-    process(in_path, args.sheet, args.base_url)
+    process(in_path, args.sheet, args.base_url, args.jobs)
 
 #if __name__ == "__main__":
 #    main()
@@ -437,15 +624,151 @@ def main():
 # --- thay thế phần process_files hiện tại ---
 from pathlib import Path
 
-def process_files(paths, sheet=None, base_url="https://sunhouse.com.vn"):
-    for p in paths:
-        process(Path(p), sheet, base_url)   # <--- GỌI xử lý thật
+OUTPUT_SUFFIXES = ("_clean", "_tongquan_chunks", "_thietke_chunks", "_congnang_chunks")
+
+def expand_inputs(paths) -> List[Path]:
+    """File giữ nguyên; thư mục -> mọi *.xlsx trong đó (bỏ file tạm ~$ và file output của chính script)."""
+    files: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(f for f in sorted(p.glob("*.xlsx"))
+                         if not f.name.startswith("~$") and not f.stem.endswith(OUTPUT_SUFFIXES))
+        else:
+            files.append(p)
+    return list(dict.fromkeys(files))
+
+def print_batch_summary(files: List[Path], timings: List[Dict], wall: float):
+    timings = sorted(timings, key=lambda t: files.index(t["file"]))  # theo thứ tự đầu vào, không theo thứ tự xong
+    print(f"\n=== Tổng kết {len(timings)} file ({wall:.1f}s) ===")
+    print(f"{'File':<40} {'Dòng':>6} {'Đọc':>7} {'Clean':>7} {'Ghi':>7} {'Tổng':>7}")
+    for t in timings:
+        name = t["file"].name[:40]
+        if t.get("error"):
+            print(f"{name:<40} ✖ {t['error']}")
+        else:
+            print(f"{name:<40} {t['rows']:>6} {t['read']:>6.1f}s {t['clean']:>6.1f}s {t['write']:>6.1f}s {t['total']:>6.1f}s")
+    done = [t for t in timings if not t.get("error")]
+    print(f"OK {len(done)}/{len(timings)} file | {sum(t['rows'] for t in done)} dòng")
+
+def process_batch(paths, sheet=None, base_url="https://sunhouse.com.vn", jobs=1) -> List[Dict]:
+    """
+    Nhiều workbook (cả 1 danh mục): 1 pool process dùng chung cho đọc file + clean/tách chunk theo lô dòng.
+    - Đọc tối đa `jobs` workbook cùng lúc (pd.read_excel chạy trong pool); đọc xong file nào thì lô dòng của file đó
+      vào pool ngay và file kế tiếp được đọc tiếp.
+    - Lô cuối của 1 file xong -> ghi 4 file output ngay (luồng chính), pool vẫn chạy file khác.
+    - Process trong pool sống suốt batch: import pandas/bs4 + memo ô/text node dùng lại giữa các file.
+    - File lỗi (đọc lỗi / không có cột mục tiêu) không dừng batch, ghi vào bảng tổng kết.
+    Trả list thời gian từng file (giây): file, rows, read, clean, write, total, error.
+    """
+    files = expand_inputs(paths)
+    jobs = effective_jobs(jobs)
+    t_batch = time.perf_counter()
+    timings: List[Dict] = []
+    note = f"  ({jobs} process dùng chung, memo riêng từng process)" if jobs > 1 else ""
+
+    def finish(p: Path, st: Dict, results: List[tuple]):
+        t0 = time.perf_counter()
+        st["clean"] = t0 - st.pop("t_clean")
+        write_outputs(p, st.pop("df"), results, note)
+        st["write"] = time.perf_counter() - t0
+        st["total"] = time.perf_counter() - st.pop("t_start")
+        timings.append(st)
+
+    def failed(p: Path, error: str):
+        print(f"✖ {p}: {error}")
+        timings.append({"file": p, "error": error})
+
+    if jobs == 1:
+        for p in files:
+            st = {"file": p, "t_start": time.perf_counter()}
+            try:
+                df = read_sheet(p, sheet)
+                col_map, sku_col, parent_sku_col, records = prepare_sheet(df)
+                st["read"] = time.perf_counter() - st["t_start"]
+                if not col_map:
+                    failed(p, f"không có cột mục tiêu {TARGET_COLS}")
+                    continue
+                st.update(df=df, rows=len(records), t_clean=time.perf_counter())
+                finish(p, st, [process_rows(records, col_map, sku_col, parent_sku_col, base_url)])
+            except Exception as e:
+                failed(p, repr(e))
+        print_batch_summary(files, timings, time.perf_counter() - t_batch)
+        return timings
+
+    todo = iter(files)
+    pending: Dict[cf.Future, tuple] = {}  # future -> (file, chỉ số lô; None = đang đọc)
+    state: Dict[Path, Dict] = {}
+
+    with cf.ProcessPoolExecutor(max_workers=jobs) as ex:
+        def read_next():
+            p = next(todo, None)
+            if p is not None:
+                state[p] = {"file": p, "t_start": time.perf_counter()}
+                pending[ex.submit(_read_sheet_job, (p, sheet))] = (p, None)
+
+        for _ in range(jobs):
+            read_next()
+
+        while pending:
+            done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+            for fut in done:
+                p, i = pending.pop(fut)
+                st = state.get(p)
+                if st is None:  # file đã lỗi ở lô khác
+                    continue
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    del state[p]
+                    failed(p, repr(e))
+                    if i is None:
+                        read_next()
+                    continue
+
+                if i is None:
+                    read_next()
+                    df, (col_map, sku_col, parent_sku_col, records), st["read"] = res
+                    if not col_map:
+                        del state[p]
+                        failed(p, f"không có cột mục tiêu {TARGET_COLS}")
+                        continue
+                    st.update(df=df, rows=len(records), t_clean=time.perf_counter())
+                    args = (col_map, sku_col, parent_sku_col, base_url)
+                    batches = split_batches(records, jobs)
+                    if not batches:
+                        try:
+                            finish(p, state.pop(p), [process_rows(records, *args)])
+                        except Exception as e:
+                            failed(p, repr(e))
+                        continue
+                    st["results"] = [None] * len(batches)
+                    for j, batch in enumerate(batches):
+                        pending[ex.submit(_process_rows_job, (batch, *args))] = (p, j)
+                else:
+                    st["results"][i] = res
+                    if all(r is not None for r in st["results"]):
+                        try:
+                            finish(p, state.pop(p), st.pop("results"))
+                        except Exception as e:  # vd file output đang mở trong Excel
+                            failed(p, repr(e))
+
+    print_batch_summary(files, timings, time.perf_counter() - t_batch)
+    return timings
+
+def process_files(paths, sheet=None, base_url="https://sunhouse.com.vn", jobs=1):
+    files = expand_inputs(paths)
+    if len(files) == 1:
+        process(files[0], sheet, base_url, jobs)   # <--- GỌI xử lý thật
+    else:
+        process_batch(files, sheet, base_url, jobs)
 
 if __name__ == "__main__":
     import argparse
     ap = argparse.ArgumentParser()
-    ap.add_argument("input", nargs="+", help="1 hoặc nhiều file .xlsx")
+    ap.add_argument("input", nargs="+", help="1 hoặc nhiều file .xlsx / thư mục chứa .xlsx (nhiều file -> chạy batch)")
     ap.add_argument("--sheet", default=None)
     ap.add_argument("--base-url", default="https://sunhouse.com.vn")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Số process clean + tách chunk song song (0 = số CPU); batch nhiều file dùng chung 1 pool")
     a = ap.parse_args()
-    process_files(a.input, a.sheet, a.base_url)
+    process_files(a.input, a.sheet, a.base_url, a.jobs)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+vn_textfix.py - bộ sửa lỗi tiếng Việt cho text node (dùng chung bởi vn_clean_and_split4_v2.py, clean.py)
+
+Kết quả giống hệt bản cũ (re.sub với pattern dạng chuỗi trong vòng lặp), nhưng:
+- Mọi regex compile 1 lần lúc import (bản cũ ~10 pattern + 10 COMMON_FIXES x 2 vòng -> cache của re bị xoay vòng).
+- COMMON_FIXES gộp thành 1 alternation, mỗi nhánh là 1 group tên _f<i>; callback tra bảng theo m.lastgroup.
+  1 lượt thay = 2 vòng tuần tự cũ: giá trị thay thế có dấu nên không tạo ra match mới, các cụm không chồng nhau.
+- Fast path: 1 regex GATE = hợp của mọi pattern; text node đã NFC và không khớp GATE -> không bước nào đổi được
+  -> trả nguyên (phần lớn node: xuống dòng, khoảng trắng, câu đã đúng).
+"""
+
+import re
+import unicodedata
+
+COMMON_FIXES = {
+    r"\bthiet ke\b": "thiết kế",
+    r"\bcong nang\b": "công năng",
+    r"\btong quan\b": "tổng quan",
+    r"\bkieu dang\b": "kiểu dáng",
+    r"\bkich thuoc\b": "kích thước",
+    r"\bbao hanh\b": "bảo hành",
+    r"\bdung tich\b": "dung tích",
+    r"\bcong suat\b": "công suất",
+    r"\binox\b": "inox",
+    r"\bnoi com\b": "nồi cơm",
+}
+
+# ---- Từng bước (cùng thứ tự và nội dung với bản cũ) ----
+_NUM_SEP = re.compile(r"(\d)\s*([.,])\s*(\d)")          # 1 , 5 -> 1,5
+_NUM_LITRE = re.compile(r"(\d)(?:\s*[lL])\b")           # 2 l -> 2L
+_NUM_RANGE = re.compile(r"(\d)\s*[-]\s*(\d)")           # 1 - 2 -> 1 – 2
+
+_DBLQUOTE_PAIR = re.compile(r'""\s*([^"]*?)\s*""')      # ""..."" -> "..."
+
+_INTRA_FINAL = re.compile(r"([A-Za-zÀ-ỹđĐ])\s+(ng|nh|ch|c|m|n|t|p)\b")
+_INTRA_VOWEL = re.compile(r"([aăâeêioôơuưyAĂÂEÊIOÔƠUƯY])\s+([iuyIUY])\b")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.;:!?])")
+_MULTI_SPACE = re.compile(r"[ \t]{2,}")
+_PUNCT_NO_SPACE = re.compile(r"([,.;:!?])(?!\s|$)")
+
+_FIX_KEYS = list(COMMON_FIXES)
+_FIX_REPL = {f"_f{i}": COMMON_FIXES[k] for i, k in enumerate(_FIX_KEYS)}
+_FIXES_RE = re.compile("|".join(f"(?P<_f{i}>{k})" for i, k in enumerate(_FIX_KEYS)), re.IGNORECASE)
+
+def _fix_repl(m: re.Match) -> str:
+    return _FIX_REPL[m.lastgroup]
+
+# Hợp của mọi pattern phía trên (bỏ group): không khớp => không bước nào thay đổi text
+_GATE = re.compile("|".join([
+    r"\d\s*[.,]\s*\d", r"\d\s*[lL]\b", r"\d\s*-\s*\d",
+    r'""',
+    r"(?i:" + "|".join(_FIX_KEYS) + ")",
+    r"[A-Za-zÀ-ỹđĐ]\s+(?:ng|nh|ch|c|m|n|t|p)\b",
+    r"[aăâeêioôơuưyAĂÂEÊIOÔƠUƯY]\s+[iuyIUY]\b",
+    r"\s+[,.;:!?]", r"[ \t]{2,}", r"[,.;:!?](?!\s|$)",
+]))
+
+STATS = {"nodes": 0, "fast_path": 0}
+
+def apply_common_fixes(s: str) -> str:
+    return _FIXES_RE.sub(_fix_repl, s)
+
+def fix_numbers_units(s: str) -> str:
+    s = _NUM_SEP.sub(r"\1\2\3", s)
+    s = _NUM_LITRE.sub(r"\1L", s)
+    s = _NUM_RANGE.sub(r"\1 – \2", s)
+    return s
+
+def collapse_double_quotes(s: str) -> str:
+    if '""' not in s:
+        return s
+    for _ in range(3):
+        ns = _DBLQUOTE_PAIR.sub(r'"\1"', s)
+        if ns == s: break
+        s = ns
+    return s
+
+def fix_intra_word_spaces_once(s: str) -> str:
+    s = _INTRA_FINAL.sub(r"\1\2", s)
+    s = _INTRA_VOWEL.sub(r"\1\2", s)
+    s = _SPACE_BEFORE_PUNCT.sub(r"\1", s)
+    s = _MULTI_SPACE.sub(" ", s)
+    return s
+
+def clean_text_node(text: str, collapse_quotes: bool = True) -> str:
+    """
+    = clean_text_keep_html_textnode cũ. collapse_quotes=False cho clean.py (bản đó không gộp ""..."").
+    """
+    if text is None: return text
+    STATS["nodes"] += 1
+    if unicodedata.is_normalized("NFC", text) and not _GATE.search(text):
+        STATS["fast_path"] += 1
+        return text
+    s = unicodedata.normalize("NFC", text)
+    s = fix_numbers_units(s)
+    if collapse_quotes:
+        s = collapse_double_quotes(s)
+    s = apply_common_fixes(s)
+    for _ in range(4):
+        ns = fix_intra_word_spaces_once(s)
+        if ns == s: break
+        s = ns
+    s = _SPACE_BEFORE_PUNCT.sub(r"\1", s)
+    s = _PUNCT_NO_SPACE.sub(r"\1 ", s)
+    return s
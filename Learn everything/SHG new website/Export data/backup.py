@@ -18,13 +18,14 @@ import re
 import time
 from typing import List, Dict, Optional, Set
 from urllib.parse import urlparse, urljoin, urlunparse
-from urllib import robotparser
 
 import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
+from robots_cache import RobotsCache
+
 # ---------- Config ----------
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; SHG-CodeSmith/1.0; +https://example.com/bot-info)",
@@ -113,16 +114,11 @@ def sanitize_slug(url: str) -> str:
     slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", slug).strip("-")
     return slug or "output"
 
+# robots.txt: cache theo host (TTL 1h, lỗi tải -> negative cache 5 phút)
+ROBOTS = RobotsCache(HEADERS["User-Agent"])
+
 def allowed_by_robots(url: str) -> bool:
-    p = urlparse(url)
-    robots_url = f"{p.scheme}://{p.netloc}/robots.txt"
-    rp = robotparser.RobotFileParser()
-    try:
-        rp.set_url(robots_url)
-        rp.read()
-        return rp.can_fetch(HEADERS["User-Agent"], url)
-    except Exception:
-        return True  # thận trọng
+    return ROBOTS.allowed(url)
 
 def fetch(url: str) -> requests.Response:
     return requests.get(url, headers=HEADERS, timeout=20)
@@ -320,6 +316,7 @@ def main():
     df = pd.DataFrame(rows, columns=["url", "slug", "status", "image_links", "specs_json", "note"])
     with pd.ExcelWriter(args.out, engine="openpyxl") as w:
         df.to_excel(w, sheet_name="products", index=False)
+    print(f"[INFO] {ROBOTS.summary()}")
     print(f"[OK] Xuất Excel -> {args.out}")
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: crawl tuần tự (sleep 0.4s) vs crawl asyncio (--concurrency) trên 1 HTTP server giả lập cục bộ.
+- Server trả về trang sản phẩm mẫu (div.col1 + #menuView4) với độ trễ cố định để mô phỏng mạng.
+- Cách chạy: python bench_async_crawl.py --urls 40 --latency 0.25 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import sunhouse_crawler as sc
+
+PAGE = """<html><body>
+<div class="col1">
+  <img src="/pic/product/a.jpg"><img data-src="/pic/product/b.webp">
+  <a href="/pic/product/zoom.png">zoom</a>
+  <div style="background-image:url('/pic/product/bg.jpg')"></div>
+</div>
+<div class="thongSoKyThuatSanPham1" id="menuView4"><ul>
+  <li><span class="text">Công suất</span><span class="val">700W</span></li>
+  <li><span class="text">Dung tích</span><span class="val">1.8L</span></li>
+</ul></div>
+</body></html>""".encode("utf-8")
+
+def make_handler(latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/robots.txt":
+                self.send_response(404); self.end_headers(); return
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark crawl tuần tự vs asyncio trên server cục bộ")
+    ap.add_argument("--urls", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.25, help="Độ trễ giả lập mỗi trang (giây)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=50.0)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/san-pham/sp-{i}.html" for i in range(args.urls)]
+
+    t0 = time.perf_counter()
+    serial = []
+    for u in urls:
+        serial.append(sc.process_url(u, use_js=False))
+        time.sleep(0.4)
+    t_serial = time.perf_counter() - t0
+
+    sc.configure_session(args.concurrency)
+    t0 = time.perf_counter()
+    par = asyncio.run(sc.crawl_async(urls, False, args.concurrency, args.concurrency,
+                                     args.rate, args.concurrency))
+    t_async = time.perf_counter() - t0
+    server.shutdown()
+
+    assert serial == par, "Kết quả asyncio khác tuần tự"
+    print(f"Tuần tự : {len(urls)} URL / {t_serial:.2f}s = {len(urls) / t_serial:.2f} URL/s")
+    print(f"Asyncio : {len(urls)} URL / {t_async:.2f}s = {len(urls) / t_async:.2f} URL/s "
+          f"(concurrency={args.concurrency}, rate={args.rate}/s)")
+    print(f"Tăng tốc: x{t_serial / t_async:.1f} | output giống hệt, đúng thứ tự input")
+    print(sc.ROBOTS.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark blacklist: vòng lặp cũ (mọi mẫu x mọi URL) vs BlacklistMatcher (set + Aho-Corasick + trie đảo ngược).
+- Sinh ngẫu nhiên --patterns mẫu (1/3 URL đầy đủ, 1/3 "*substring", 1/3 suffix) và --urls URL ảnh.
+- Bản cũ chạy trên --legacy-sample URL rồi ngoại suy (chạy đủ 100k x 10k mất hàng giờ); kết quả được so khớp trên mẫu đó.
+- Cách chạy: python bench_blacklist.py --patterns 10000 --urls 100000
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from url_blacklist import BlacklistMatcher, norm, strip_qf
+
+def legacy_is_blacklisted(u: str, patterns) -> bool:
+    """Bản is_blacklisted cũ (trước khi biên dịch), giữ lại để so sánh."""
+    if not u:
+        return False
+    u_noq = strip_qf(norm(u)).lower()
+    for pat in patterns:
+        pat0 = norm(pat)
+        if not pat0:
+            continue
+        if pat0.startswith("*"):
+            if pat0[1:].lower() in u_noq:
+                return True
+            continue
+        if re.match(r"^https?://", pat0, re.I):
+            if strip_qf(pat0).lower() == u_noq:
+                return True
+            continue
+        if u_noq.endswith(pat0.lower()):
+            return True
+    return False
+
+def rand_word(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(n))
+
+def make_data(n_pat: int, n_url: int, seed: int = 7):
+    rng = random.Random(seed)
+    urls = [f"https://sunhouse.com.vn/pic/product/{rand_word(rng, 6)}/{rand_word(rng, 10)}.jpg"
+            f"{'?v=' + rand_word(rng, 3) if rng.random() < 0.3 else ''}" for _ in range(n_url)]
+    pats = []
+    for i in range(n_pat):
+        kind = i % 3
+        if kind == 0:
+            pats.append(rng.choice(urls) if rng.random() < 0.05 else
+                        f"https://sunhouse.com.vn/pic/banner/{rand_word(rng, 12)}.jpg")
+        elif kind == 1:
+            pats.append("*" + rand_word(rng, 7))
+        else:
+            pats.append(rand_word(rng, 9) + ".jpg")
+    return pats, urls
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark blacklist cũ vs đã biên dịch")
+    ap.add_argument("--patterns", type=int, default=10000)
+    ap.add_argument("--urls", type=int, default=100000)
+    ap.add_argument("--legacy-sample", type=int, default=300)
+    args = ap.parse_args()
+
+    pats, urls = make_data(args.patterns, args.urls)
+
+    t0 = time.perf_counter()
+    matcher = BlacklistMatcher(pats)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fast = [matcher.match(u) for u in urls]
+    t_fast = time.perf_counter() - t0
+
+    sample = urls[:args.legacy_sample]
+    t0 = time.perf_counter()
+    legacy = [legacy_is_blacklisted(u, pats) for u in sample]
+    t_legacy = (time.perf_counter() - t0) / len(sample) * len(urls)
+
+    assert legacy == fast[:len(sample)], "Kết quả khác bản cũ"
+    print(f"{len(pats)} mẫu x {len(urls)} URL | khớp {sum(fast)} URL | kết quả giống bản cũ trên {len(sample)} URL mẫu")
+    print(f"Biên dịch   : {t_build:.2f}s")
+    print(f"Đã biên dịch: {t_fast:.2f}s ({t_fast / len(urls) * 1e6:.1f} µs/URL)")
+    print(f"Bản cũ      : ~{t_legacy:.0f}s (ngoại suy) -> x{t_legacy / t_fast:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kiểm tra + benchmark BrowserPool (--js) với Playwright GIẢ (không cần cài Chromium).
+- Thay sunhouse_crawler.async_playwright bằng bản giả: launch / new_context / goto có độ trễ cố định,
+  evaluate trả dump col1 mẫu -> chạy đúng code BrowserPool (thread event loop riêng, run_coroutine_threadsafe).
+- Kiểm tra:
+  1) nhiều thread gọi collect() cùng lúc: không quá `size` trang chạy đồng thời, mọi lời gọi chạy trên thread loop
+  2) tái tạo context sau `recycle_after` URL (context cũ được đóng)
+  3) trang lỗi (goto ném lỗi) -> trả [], slot được thay context mới, pool vẫn dùng tiếp được
+  4) tạo context mới lỗi (sau trang lỗi) -> lời gọi đó trả [], lượt sau tạo lại được
+  5) close(): đóng hết context, browser, playwright và dừng thread loop
+- So sánh thời gian: pool dùng chung vs mở browser mới cho mỗi URL (như trước khi có pool).
+Cách chạy: python bench_browser_pool.py --urls 40 --threads 4 --size 2
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sunhouse_crawler as sc
+
+DUMP = [{"imgs": [{"src": "https://sunhouse.com.vn/pic/product/a.jpg", "ds": "", "srcset": ""}],
+         "hrefs": ["https://sunhouse.com.vn/pic/product/zoom.png"],
+         "styles": ["background-image:url('https://sunhouse.com.vn/pic/product/bg.jpg')"]}]
+
+class FakeState:
+    def __init__(self, launch_delay: float, page_delay: float):
+        self.launch_delay = launch_delay
+        self.page_delay = page_delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.launches = 0
+        self.contexts_opened = 0
+        self.contexts_closed = 0
+        self.browsers_closed = 0
+        self.stopped = 0
+        self.threads = set()
+        self.fail_urls = set()
+        self.fail_new_context = 0
+
+class FakePage:
+    def __init__(self, st: FakeState, ctx: "FakeContext"):
+        self.st, self.ctx = st, ctx
+
+    def set_default_timeout(self, ms):
+        pass
+
+    async def goto(self, url, wait_until=None):
+        assert not self.ctx.closed, "goto trên context đã đóng"
+        with self.st.lock:
+            self.st.threads.add(threading.get_ident())
+            self.st.active += 1
+            self.st.max_active = max(self.st.max_active, self.st.active)
+        try:
+            await asyncio.sleep(self.st.page_delay)
+            if url in self.st.fail_urls:
+                raise RuntimeError(f"net::ERR giả cho {url}")
+        finally:
+            with self.st.lock:
+                self.st.active -= 1
+
+    async def wait_for_selector(self, sel, timeout=None):
+        pass
+
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def evaluate(self, js):
+        return DUMP if js == sc.COL1_DUMP_JS else None
+
+class FakeContext:
+    def __init__(self, st: FakeState):
+        self.st = st
+        self.closed = False
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def new_page(self):
+        return FakePage(self.st, self)
+
+    async def close(self):
+        self.closed = True
+        with self.st.lock:
+            self.st.contexts_closed += 1
+
+class FakeBrowser:
+    def __init__(self, st: FakeState):
+        self.st = st
+
+    async def new_context(self, **kwargs):
+        with self.st.lock:
+            if self.st.fail_new_context:
+                self.st.fail_new_context -= 1
+                raise RuntimeError("new_context giả lỗi")
+            self.st.contexts_opened += 1
+        return FakeContext(self.st)
+
+    async def close(self):
+        self.st.browsers_closed += 1
+
+class FakeChromium:
+    def __init__(self, st: FakeState):
+        self.st = st
+
+    async def launch(self, headless=True):
+        await asyncio.sleep(self.st.launch_delay)
+        self.st.launches += 1
+        return FakeBrowser(self.st)
+
+class FakePlaywright:
+    def __init__(self, st: FakeState):
+        self.st = st
+        self.chromium = FakeChromium(st)
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.st.stopped += 1
+
+def install_fake(launch_delay: float, page_delay: float) -> FakeState:
+    st = FakeState(launch_delay, page_delay)
+    sc.async_playwright = lambda: FakePlaywright(st)
+    sc.PLAYWRIGHT_AVAILABLE = True
+    return st
+
+EXPECTED = sc.images_from_col1_dump(DUMP)
+assert len(EXPECTED) == 3, EXPECTED
+
+def check_concurrency(n_urls: int, threads: int, size: int):
+    st = install_fake(0.0, 0.02)
+    pool = sc.BrowserPool(size=size, recycle_after=1000).start()
+    try:
+        with ThreadPoolExecutor(threads) as ex:
+            out = list(ex.map(pool.collect, [f"https://x/{i}" for i in range(n_urls)]))
+    finally:
+        pool.close()
+    assert all(o == EXPECTED for o in out), "kết quả collect sai"
+    assert st.max_active <= size, f"{st.max_active} trang chạy cùng lúc > size={size}"
+    assert st.threads == {pool._thread.ident}, "goto chạy ngoài thread event loop"
+    assert not pool._thread.is_alive(), "thread loop chưa dừng sau close()"
+    assert st.contexts_closed == st.contexts_opened == size and st.browsers_closed == 1 and st.stopped == 1
+    print(f"1) {threads} thread / {n_urls} URL / size={size}: tối đa {st.max_active} trang cùng lúc, "
+          f"1 thread loop, close() đóng {st.contexts_closed}/{st.contexts_opened} context -> OK")
+
+def check_recycle():
+    st = install_fake(0.0, 0.0)
+    pool = sc.BrowserPool(size=1, recycle_after=3).start()
+    try:
+        for i in range(10):
+            assert pool.collect(f"https://x/{i}") == EXPECTED
+    finally:
+        pool.close()
+    # dùng 3 lần -> lần thứ 4, 7, 10 tạo context mới
+    assert pool.recycled == 3 and st.contexts_opened == 4 and st.contexts_closed == 4, \
+        (pool.recycled, st.contexts_opened, st.contexts_closed)
+    print(f"2) recycle_after=3, 10 URL: tái tạo {pool.recycled} lần, mở {st.contexts_opened} / đóng "
+          f"{st.contexts_closed} context -> OK")
+
+def check_errors():
+    st = install_fake(0.0, 0.0)
+    st.fail_urls = {"https://x/bad"}
+    pool = sc.BrowserPool(size=1, recycle_after=1000).start()
+    try:
+        assert pool.collect("https://x/bad") == []
+        assert pool.collect("https://x/ok") == EXPECTED
+        # trang lỗi, rồi tạo context thay thế cũng lỗi -> vẫn trả [], lượt sau tạo lại được
+        assert pool.collect("https://x/bad") == []
+        st.fail_new_context = 1
+        assert pool.collect("https://x/ok") == []
+        assert pool.collect("https://x/ok") == EXPECTED
+    finally:
+        pool.close()
+    assert st.contexts_closed == st.contexts_opened, (st.contexts_opened, st.contexts_closed)
+    print(f"3+4) trang lỗi / tạo context lỗi -> [] rồi chạy tiếp, mở {st.contexts_opened} / đóng "
+          f"{st.contexts_closed} context -> OK")
+
+def bench(n_urls: int, threads: int, size: int, launch_delay: float, page_delay: float):
+    install_fake(launch_delay, page_delay)
+    urls = [f"https://x/{i}" for i in range(n_urls)]
+
+    def per_url(url):  # như trước khi có pool: mỗi URL 1 browser
+        pool = sc.BrowserPool(size=1).start()
+        try:
+            return pool.collect(url)
+        finally:
+            pool.close()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as ex:
+        list(ex.map(per_url, urls))
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    pool = sc.BrowserPool(size=size).start()
+    try:
+        with ThreadPoolExecutor(threads) as ex:
+            list(ex.map(pool.collect, urls))
+    finally:
+        pool.close()
+    t_new = time.perf_counter() - t0
+    print(f"Thời gian ({n_urls} URL, launch {launch_delay}s, trang {page_delay}s): "
+          f"browser / URL {t_old:.2f}s | pool {t_new:.2f}s (x{t_old / t_new:.1f})")
+
+def main():
+    ap = argparse.ArgumentParser(description="Kiểm tra + benchmark BrowserPool với Playwright giả")
+    ap.add_argument("--urls", type=int, default=40)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--size", type=int, default=2)
+    ap.add_argument("--launch-delay", type=float, default=0.3, help="giây mở 1 Chromium giả")
+    ap.add_argument("--page-delay", type=float, default=0.05, help="giây load 1 trang giả")
+    args = ap.parse_args()
+
+    check_concurrency(args.urls, args.threads, args.size)
+    check_recycle()
+    check_errors()
+    bench(args.urls, args.threads, args.size, args.launch_delay, args.page_delay)
+
+if __name__ == "__main__":
+    main()
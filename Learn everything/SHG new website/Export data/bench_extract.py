@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark: BS4 (bản cũ legacy_images_col1 + legacy_specs_menuView4, giữ trong file này)
+vs fast path lxml (extract_page_fast).
+- Đầu vào: các file HTML trang sản phẩm đã lưu (--html a.html b.html ...).
+  Không truyền thì tự dựng 1 trang mẫu cỡ thật (menu/footer dày, slider col1 ~40 ảnh, ~25 dòng specs).
+- Kiểm tra 2 cách cho kết quả giống hệt rồi in thời gian/trang.
+- Cách chạy: python bench_extract.py --html saved/*.html --repeat 20
+"""
+
+import argparse
+import time
+from typing import Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+import sunhouse_crawler as sc
+
+BASE = "https://sunhouse.com.vn/noi-com-dien/sunhouse-mama-shd8852b"
+
+def synthetic_page(n_imgs: int = 40, n_specs: int = 25, n_menu: int = 400) -> str:
+    menu = "".join(f'<li class="menu-item"><a href="/danh-muc/{i}" style="color:#333">Danh mục {i}</a>'
+                   f'<img src="/pic/icon/{i}.png"></li>' for i in range(n_menu))
+    slides = "".join(
+        f'<div class="item" style="background-image:url(\'/pic/product/bg-{i}.jpg\')">'
+        f'<a href="/pic/product/images/zoom-{i}.jpg"><img src="data:image/gif;base64,R0lGOD" '
+        f'data-src="/pic/product/images/sp-{i}.jpg" srcset="/pic/thumb/small/sp-{i}.jpg 1x"></a></div>'
+        for i in range(n_imgs))
+    specs = "".join(f'<li><div class="text">Thuộc tính {i}</div><div class="val">Giá trị {i}<br>dòng 2</div></li>'
+                    for i in range(n_specs))
+    return (f'<html><head><title>Nồi cơm điện</title><script>var x = 1;</script></head><body>'
+            f'<header><ul class="menu">{menu}</ul></header>'
+            f'<div class="row"><div class="col1"><div class="slider">{slides}</div></div>'
+            f'<div class="col2"><h1>Nồi cơm điện Sunhouse Mama</h1></div></div>'
+            f'<div class="thongSoKyThuatSanPham1" id="menuView4"><ul>{specs}</ul></div>'
+            f'<footer><ul>{menu}</ul></footer></body></html>')
+
+# ---------- Bản BS4 cũ (trước fast path lxml), giữ làm chuẩn so sánh ----------
+def legacy_images_col1(soup: BeautifulSoup, base_url: str) -> List[str]:
+    imgs, seen = [], set()
+
+    for col in soup.select("div.col1"):
+        # <img>
+        for img in col.select("img"):
+            u = sc.pick_best_img_src(img, base_url)
+            if u and sc.is_http_image(u) and (not sc.is_blacklisted(u)) and u not in seen:
+                seen.add(u); imgs.append(u)
+
+        # Link zoom ảnh
+        for a in col.select("a[href]"):
+            href = (a.get("href") or "").strip()
+            if not href:
+                continue
+            if sc.HREF_IMG.search(href):
+                u = urljoin(base_url, href)
+                if sc.is_http_image(u) and (not sc.is_blacklisted(u)) and u not in seen:
+                    seen.add(u); imgs.append(u)
+
+        # background-image trong style (slider CSS)
+        for el in col.select("[style]"):
+            st = el.get("style") or ""
+            for m in sc.BG_URL_RE.finditer(st):
+                u = urljoin(base_url, (m.group(1) or "").strip())
+                if sc.HREF_IMG.search(u) and sc.is_http_image(u) and (not sc.is_blacklisted(u)) and u not in seen:
+                    seen.add(u); imgs.append(u)
+
+    # Lọc lần chót
+    imgs = [u for u in imgs if not sc.DATA_URI_RE.match(u) and not sc.is_blacklisted(u)]
+    return imgs
+
+def legacy_specs_menuView4(soup: BeautifulSoup) -> List[Dict[str, str]]:
+    container = soup.select_one("div.thongSoKyThuatSanPham1#menuView4")
+    if not container:
+        return []
+    data: List[Dict[str, str]] = []
+    for li in container.select("ul > li"):
+        k = li.select_one(".text")
+        v = li.select_one(".val")
+        if not k or not v:
+            continue
+        key = k.get_text(" ", strip=True)
+        val = v.get_text("\n", strip=True)
+        if key and val:
+            data.append({"key": key, "value": val})
+    return data
+
+def run_bs4(text: str):
+    soup = BeautifulSoup(text, "lxml")
+    return legacy_images_col1(soup, BASE), legacy_specs_menuView4(soup)
+
+def run_fast(text: str):
+    return sc.extract_page_fast(sc.parse_html_fast(text), BASE)
+
+def bench(fn, pages, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in pages:
+            fn(p)
+    return (time.perf_counter() - t0) / (repeat * len(pages))
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark trích xuất BS4 vs lxml fast path")
+    ap.add_argument("--html", nargs="*", default=None, help="File HTML trang sản phẩm đã lưu")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("-b", "--blacklist", default=None, help="File blacklist (như crawler)")
+    args = ap.parse_args()
+
+    sc.load_blacklist_file(args.blacklist)
+    if args.html:
+        pages = [open(p, "r", encoding="utf-8", errors="replace").read() for p in args.html]
+    else:
+        pages = [synthetic_page()]
+
+    for i, p in enumerate(pages):
+        assert run_bs4(p) == run_fast(p), f"Kết quả khác nhau ở trang #{i}"
+
+    t_bs4 = bench(run_bs4, pages, args.repeat)
+    t_fast = bench(run_fast, pages, args.repeat)
+    print(f"{len(pages)} trang x {args.repeat} lần | kết quả giống hệt")
+    print(f"BS4 + select : {t_bs4 * 1000:.2f} ms/trang")
+    print(f"lxml 1 lượt  : {t_fast * 1000:.2f} ms/trang  (x{t_bs4 / t_fast:.1f})")
+
+if __name__ == "__main__":
+    main()
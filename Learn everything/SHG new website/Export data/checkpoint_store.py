@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+Checkpoint JSONL (append-only) cho sunhouse_crawler.py.
+- Mỗi bản ghi process_url được ghi ngay 1 dòng JSON khi xong (flush + fsync) -> chết giữa chừng không mất dữ liệu.
+- Đọc lại: URL xuất hiện nhiều lần thì lấy bản ghi mới nhất; dòng cuối bị ghi dở (crash) được bỏ qua.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List
+
+class CheckpointStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._fh = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # dòng ghi dở
+                if isinstance(rec, dict) and rec.get("url"):
+                    self.records[rec["url"]] = rec
+
+    def pending(self, urls: Iterable[str], only_failed: bool = False) -> List[str]:
+        """URL cần crawl: chưa có trong checkpoint; only_failed=True thì thêm cả URL có status != OK."""
+        out = []
+        for u in urls:
+            rec = self.records.get(u)
+            if rec is None or (only_failed and rec.get("status") != "OK"):
+                out.append(u)
+        return out
+
+    def append(self, rec: Dict[str, str]) -> None:
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.records[rec["url"]] = rec
+
+    def rows_for(self, urls: Iterable[str]) -> List[Dict[str, str]]:
+        """Bản ghi theo đúng thứ tự input (bỏ URL chưa có)."""
+        return [self.records[u] for u in urls if u in self.records]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache robots.txt theo host (netloc) dùng chung cho sunhouse_crawler.py và backup.py.
+- Mỗi host chỉ tải robots.txt 1 lần trong `ttl` giây (mặc định 1 giờ).
+- Tải lỗi -> nhớ kết quả "cho phép" trong `negative_ttl` giây (negative cache), không tải lại mỗi URL.
+- Thread-safe: chế độ song song chỉ tải 1 lần cho mỗi host dù nhiều URL chạy cùng lúc.
+- Bộ đếm: fetches (số lần tải thật), hits (số lần dùng cache) -> saved = số lần tải được tiết kiệm.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import urlparse
+
+class RobotsCache:
+    def __init__(self, user_agent: str, ttl: float = 3600.0, negative_ttl: float = 300.0):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # netloc -> (parser hoặc None nếu tải lỗi, hạn dùng)
+        self._entries: Dict[str, Tuple[Optional[robotparser.RobotFileParser], float]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.fetches = 0
+        self.failures = 0
+        self.hits = 0
+
+    def _host_lock(self, netloc: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(netloc, threading.Lock())
+
+    def _load(self, scheme: str, netloc: str) -> Optional[robotparser.RobotFileParser]:
+        rp = robotparser.RobotFileParser()
+        rp.set_url(f"{scheme}://{netloc}/robots.txt")
+        self.fetches += 1
+        try:
+            rp.read()
+            return rp
+        except Exception:
+            self.failures += 1
+            return None
+
+    def get(self, url: str) -> Optional[robotparser.RobotFileParser]:
+        p = urlparse(url)
+        netloc = p.netloc.lower()
+        with self._host_lock(netloc):
+            entry = self._entries.get(netloc)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            rp = self._load(p.scheme or "https", netloc)
+            ttl = self.ttl if rp is not None else self.negative_ttl
+            self._entries[netloc] = (rp, time.monotonic() + ttl)
+            return rp
+
+    def allowed(self, url: str) -> bool:
+        rp = self.get(url)
+        if rp is None:
+            return True  # thận trọng: không tải được robots.txt thì vẫn cho phép
+        try:
+            return rp.can_fetch(self.user_agent, url)
+        except Exception:
+            return True
+
+    @property
+    def saved(self) -> int:
+        return self.hits
+
+    def summary(self) -> str:
+        return (f"robots.txt: tải {self.fetches} lần (lỗi {self.failures}), "
+                f"dùng cache {self.hits} lần -> tiết kiệm {self.saved} lần tải")
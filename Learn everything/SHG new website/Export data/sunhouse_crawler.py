@@ -8,26 +8,39 @@ Sunhouse crawler -> Excel (col1 images; drop data:image; blacklist; optional JS
 - Output: 1 Excel (sheet 'products'): url | slug | status | image_links(JSON) | specs_json(JSON) | note
 - Input: product.md (mỗi dòng 1 URL hoặc dạng [text](url))
 - Optional: --js để render JS bằng Playwright (lấy đầy đủ ảnh slider)
+- Checkpoint JSONL (<out>.checkpoint.jsonl): chạy lại sẽ tiếp tục; --since-checkpoint chỉ crawl lại URL lỗi
+- Optional: --concurrency N để crawl song song (asyncio; giới hạn theo host + token bucket thay cho sleep cố định)
 """
 
 import argparse
+import asyncio
 import json
 import os
 import re
+import sys
+import threading
 import time
-from typing import List, Dict, Optional, Set
-from urllib.parse import urlparse, urljoin, urlunparse
-from urllib import robotparser
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse, urljoin
 
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup
-from bs4.element import Tag
+from lxml import etree, html as lxml_html
+
+from checkpoint_store import CheckpointStore
+from robots_cache import RobotsCache
+from url_blacklist import BlacklistMatcher, norm as _norm
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "shg_common"))
+import http_cache
+from http_cache import HttpCache
 
 # ---- Optional: Playwright (only if --js is used) ----
 PLAYWRIGHT_AVAILABLE = False
 try:
-    from playwright.sync_api import sync_playwright
+    from playwright.async_api import async_playwright
     PLAYWRIGHT_AVAILABLE = True
 except Exception:
     PLAYWRIGHT_AVAILABLE = False
@@ -41,6 +54,7 @@ URL_REGEX = re.compile(r"https?://[^\s)>\]]+", re.I)
 HREF_IMG = re.compile(r"\.(?:jpe?g|png|webp|gif|avif)(?:[?#].*)?$", re.I)
 DATA_URI_RE = re.compile(r"^\s*data:", re.I)  # loại tuyệt đối data:
 BG_URL_RE = re.compile(r"url\((?:['\"]?)(.*?)(?:['\"]?)\)", re.I)
+OUT_COLUMNS = ["url", "slug", "status", "image_links", "specs_json", "note"]
 
 # ---------- Blacklist ----------
 # Có thể thêm trực tiếp vào đây, hoặc nạp từ file --blacklist
@@ -48,35 +62,23 @@ BLACKLIST_URLS: Set[str] = {
     "*thumb/small/",  # bỏ thumb small đi.
 }
 
-def _strip_qf(u: str) -> str:
-    try:
-        p = urlparse(u); p = p._replace(query="", fragment=""); return urlunparse(p)
-    except Exception:
-        return u
+# Biên dịch BLACKLIST_URLS thành set/Aho-Corasick/trie (url_blacklist.py); tự biên dịch lại nếu set thay đổi
+_MATCHER: Optional[BlacklistMatcher] = None
+_MATCHER_KEY = None
 
-def _norm(s: str) -> str:
-    return (s or "").strip().strip('"').strip("'")
+def compile_blacklist() -> BlacklistMatcher:
+    global _MATCHER, _MATCHER_KEY
+    _MATCHER = BlacklistMatcher(BLACKLIST_URLS)
+    _MATCHER_KEY = (id(BLACKLIST_URLS), len(BLACKLIST_URLS))
+    return _MATCHER
 
 def is_blacklisted(u: str) -> bool:
     if not u:
         return False
-    u0 = _norm(u)
-    u_noq = _strip_qf(u0).lower()
-    for pat in BLACKLIST_URLS:
-        pat0 = _norm(pat)
-        if not pat0:
-            continue
-        if pat0.startswith("*"):
-            if pat0[1:].lower() in u_noq:
-                return True
-            continue
-        if re.match(r"^https?://", pat0, re.I):
-            if _strip_qf(pat0).lower() == u_noq:
-                return True
-            continue
-        if u_noq.endswith(pat0.lower()):
-            return True
-    return False
+    matcher = _MATCHER
+    if matcher is None or _MATCHER_KEY != (id(BLACKLIST_URLS), len(BLACKLIST_URLS)):
+        matcher = compile_blacklist()
+    return matcher.match(u)
 
 def load_blacklist_file(path: Optional[str]) -> None:
     if not path:
@@ -91,6 +93,7 @@ def load_blacklist_file(path: Optional[str]) -> None:
                 if not s or s.startswith("#") or s.startswith("//"):
                     continue
                 BLACKLIST_URLS.add(s)
+        compile_blacklist()
         print(f"[OK] Nạp {len(BLACKLIST_URLS)} mẫu blacklist (kể cả mặc định).")
     except Exception as e:
         print(f"[WARN] Lỗi đọc blacklist '{path}': {e}")
@@ -101,19 +104,27 @@ def sanitize_slug(url: str) -> str:
     slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", slug).strip("-")
     return slug or "output"
 
+# robots.txt: cache theo host (TTL 1h, lỗi tải -> negative cache 5 phút)
+ROBOTS = RobotsCache(HEADERS["User-Agent"])
+
 def allowed_by_robots(url: str) -> bool:
-    p = urlparse(url)
-    robots_url = f"{p.scheme}://{p.netloc}/robots.txt"
-    rp = robotparser.RobotFileParser()
-    try:
-        rp.set_url(robots_url)
-        rp.read()
-        return rp.can_fetch(HEADERS["User-Agent"], url)
-    except Exception:
-        return True  # thận trọng
+    return ROBOTS.allowed(url)
+
+_SESSION: Optional[requests.Session] = None
+
+def configure_session(pool_size: int) -> None:
+    """Dùng chung 1 Session (keep-alive) với pool đủ lớn cho chế độ song song."""
+    global _SESSION
+    s = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter); s.mount("https://", adapter)
+    _SESSION = s
+
+# Cache conditional-GET trên đĩa; main() bật theo --cache-dir/--no-cache/--offline
+HTTP_CACHE = HttpCache(enabled=False)
 
 def fetch(url: str) -> requests.Response:
-    return requests.get(url, headers=HEADERS, timeout=20)
+    return HTTP_CACHE.get(url, session=_SESSION, headers=HEADERS, timeout=20)
 
 def is_http_image(u: str) -> bool:
     if not u:
@@ -123,8 +134,9 @@ def is_http_image(u: str) -> bool:
         return False
     return s.startswith("http://") or s.startswith("https://") or s.startswith("//")
 
-def pick_best_img_src(img: Tag, base: str) -> Optional[str]:
-    """Ưu tiên src -> data-src/data-original/data-lazy/data-image -> srcset; loại data:/blacklist."""
+def pick_best_img_src(img: lxml_html.HtmlElement, base: str) -> Optional[str]:
+    """Ưu tiên src -> data-src/data-original/data-lazy/data-image -> srcset; loại data:/blacklist.
+    (Chỉ dùng img.get(); bench_extract.py gọi cả với Tag của BS4 cho bản tham chiếu.)"""
     src = (img.get("src") or "").strip()
 
     for k in ("data-src", "data-original", "data-lazy", "data-image"):
@@ -150,135 +162,297 @@ def pick_best_img_src(img: Tag, base: str) -> Optional[str]:
         return None
     return full
 
-# ---- IMAGE: chỉ trong div.col1 (requests + BS4) ----
-def collect_images_col1_static(soup: BeautifulSoup, base_url: str) -> List[str]:
-    imgs, seen = [], set()
-
-    for col in soup.select("div.col1"):
-        # <img>
-        for img in col.select("img"):
-            u = pick_best_img_src(img, base_url)
-            if u and is_http_image(u) and (not is_blacklisted(u)) and u not in seen:
-                seen.add(u); imgs.append(u)
-
-        # Link zoom ảnh
-        for a in col.select("a[href]"):
-            href = (a.get("href") or "").strip()
-            if not href:
-                continue
-            if HREF_IMG.search(href):
-                u = urljoin(base_url, href)
-                if is_http_image(u) and (not is_blacklisted(u)) and u not in seen:
-                    seen.add(u); imgs.append(u)
-
-        # background-image trong style (slider CSS)
-        for el in col.select("[style]"):
-            st = el.get("style") or ""
-            for m in BG_URL_RE.finditer(st):
-                u = urljoin(base_url, (m.group(1) or "").strip())
-                if HREF_IMG.search(u) and is_http_image(u) and (not is_blacklisted(u)) and u not in seen:
-                    seen.add(u); imgs.append(u)
-
-    # Lọc lần chót
-    imgs = [u for u in imgs if not DATA_URI_RE.match(u) and not is_blacklisted(u)]
-    return imgs
-
 # ---- IMAGE: Playwright (JS render) ----
-def collect_images_col1_js(url: str) -> List[str]:
-    """Dùng Playwright load trang, chờ render, quét ảnh trong div.col1 (img/a[img]/background-image)."""
-    if not PLAYWRIGHT_AVAILABLE:
-        print("[WARN] Playwright chưa cài. Bỏ qua --js.")
-        return []
+# Chỉ đọc thuộc tính DOM -> chặn tải ảnh/font/media và script analytics cho nhanh
+BLOCK_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCK_HOST_KEYWORDS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "facebook.com/tr", "hotjar.com", "clarity.ms", "tiktok.com", "zalo.me", "subiz",
+)
+
+# 1 lần evaluate trả về toàn bộ thuộc tính cần trong từng div.col1 (thay cho hàng trăm lần query_selector)
+COL1_DUMP_JS = """() => Array.from(document.querySelectorAll('div.col1')).map(blk => ({
+  imgs: Array.from(blk.querySelectorAll('img')).map(i => ({
+    src: i.getAttribute('src') || '',
+    ds: i.getAttribute('data-src') || i.getAttribute('data-original') ||
+        i.getAttribute('data-lazy') || i.getAttribute('data-image') || '',
+    srcset: i.getAttribute('srcset') || i.getAttribute('data-srcset') || ''
+  })),
+  hrefs: Array.from(blk.querySelectorAll('a[href]')).map(a => a.getAttribute('href') || ''),
+  styles: Array.from(blk.querySelectorAll('[style]')).map(e => e.getAttribute('style') || '')
+}))"""
+
+def images_from_col1_dump(blocks: List[Dict]) -> List[str]:
+    """Áp cùng luật lọc như bản cũ (img -> a[href] ảnh -> background-image) lên dữ liệu DOM đã dump."""
     results, seen = [], set()
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(locale="vi-VN", user_agent=HEADERS["User-Agent"])
-        page = context.new_page()
-        page.set_default_timeout(15000)
-        page.goto(url, wait_until="domcontentloaded")
+    for blk in blocks:
+        # IMG
+        for img in blk.get("imgs", []):
+            cand = None
+            src = (img.get("src") or "").strip()
+            ds = (img.get("ds") or "").strip()
+            srcset = (img.get("srcset") or "").strip()
+            if src and not DATA_URI_RE.match(src):
+                cand = src
+            elif ds and not DATA_URI_RE.match(ds):
+                cand = ds
+            elif srcset:
+                parts = [p.strip().split(" ")[0] for p in srcset.split(",") if p.strip()]
+                for c in reversed(parts):
+                    if c and not DATA_URI_RE.match(c):
+                        cand = c; break
+            if cand and is_http_image(cand) and (not is_blacklisted(cand)) and cand not in seen:
+                seen.add(cand); results.append(cand)
+
+        # <a href="*.jpg"> (zoom)
+        for href in blk.get("hrefs", []):
+            href = (href or "").strip()
+            if href and HREF_IMG.search(href) and is_http_image(href) and (not is_blacklisted(href)) and href not in seen:
+                seen.add(href); results.append(href)
+
+        # background-image
+        for st in blk.get("styles", []):
+            for m in BG_URL_RE.finditer((st or "").strip()):
+                u = (m.group(1) or "").strip()
+                if u and HREF_IMG.search(u) and is_http_image(u) and (not is_blacklisted(u)) and u not in seen:
+                    seen.add(u); results.append(u)
+
+    # Lọc lần cuối (phòng hờ)
+    return [u for u in results if not DATA_URI_RE.match(u) and not is_blacklisted(u)]
+
+class BrowserPool:
+    """1 Chromium sống suốt phiên crawl + `size` trang (mỗi trang 1 context) dùng lại cho nhiều URL.
+    - Playwright chạy trong 1 thread riêng (event loop riêng); collect() gọi được từ bất kỳ thread nào,
+      nhiều lời gọi đồng thời chạy song song trên các trang khác nhau.
+    - Mỗi context đóng & tạo lại sau `recycle_after` URL để tránh phình bộ nhớ.
+    - Trang lỗi/treo: đóng context đó, slot để trống (None) và được tạo context mới ở lượt dùng sau;
+      tạo context lỗi cũng chỉ làm lượt đó trả [] (caller dùng kết quả tĩnh).
+    Kiểm tra bằng Playwright giả: bench_browser_pool.py
+    """
+
+    def __init__(self, size: int = 2, recycle_after: int = 50, block_resources: bool = True):
+        self.size = max(1, size)
+        self.recycle_after = max(1, recycle_after)
+        self.block_resources = block_resources
+        self.pages_served = 0
+        self.recycled = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._pw = None
+        self._browser = None
+        self._slots: Optional[asyncio.Queue] = None
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def start(self) -> "BrowserPool":
+        self._thread.start()
         try:
-            # chờ khu vực col1 xuất hiện (tối đa 10s), sau đó thêm chờ network idle nhẹ
-            page.wait_for_selector("div.col1", timeout=10000)
-            try:
-                page.wait_for_load_state("networkidle", timeout=5000)
-            except Exception:
-                pass
-        except Exception:
-            pass
+            self._run(self._astart())
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    async def _astart(self):
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(headless=True)
+        self._slots = asyncio.Queue()
+        for _ in range(self.size):
+            self._slots.put_nowait(await self._new_slot())
+
+    async def _route(self, route):
+        req = route.request
+        if req.resource_type in BLOCK_RESOURCE_TYPES or any(k in req.url for k in BLOCK_HOST_KEYWORDS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_slot(self) -> Dict:
+        context = await self._browser.new_context(locale="vi-VN", user_agent=HEADERS["User-Agent"])
+        if self.block_resources:
+            await context.route("**/*", self._route)
+        page = await context.new_page()
+        page.set_default_timeout(15000)
+        return {"context": context, "page": page, "used": 0}
 
-        # Scroll nhẹ để lazy-load
+    async def _discard(self, slot: Optional[Dict]) -> None:
+        if slot is None:
+            return
+        self.recycled += 1
         try:
-            page.evaluate("window.scrollBy(0, 400)")
-            time.sleep(0.4)
+            await slot["context"].close()
         except Exception:
             pass
 
-        # Lấy tất cả nodes trong col1
-        nodes = page.query_selector_all("div.col1")
-        for blk in nodes:
-            # IMG
-            for img in blk.query_selector_all("img"):
-                cand = None
+    async def _acollect(self, url: str) -> List[str]:
+        slot = await self._slots.get()
+        try:
+            if slot is not None and slot["used"] >= self.recycle_after:
+                await self._discard(slot)
+                slot = None
+            if slot is None:
+                slot = await self._new_slot()
+            slot["used"] += 1
+            self.pages_served += 1
+            page = slot["page"]
+            await page.goto(url, wait_until="domcontentloaded")
+            try:
+                # chờ khu vực col1 xuất hiện (tối đa 10s), sau đó thêm chờ network idle nhẹ
+                await page.wait_for_selector("div.col1", timeout=10000)
                 try:
-                    src = (img.get_attribute("src") or "").strip()
-                    ds  = (img.get_attribute("data-src") or img.get_attribute("data-original") or
-                           img.get_attribute("data-lazy") or img.get_attribute("data-image") or "")
-                    ds = ds.strip()
-                    srcset = (img.get_attribute("srcset") or img.get_attribute("data-srcset") or "").strip()
-                    if src and not DATA_URI_RE.match(src):
-                        cand = src
-                    elif ds and not DATA_URI_RE.match(ds):
-                        cand = ds
-                    elif srcset:
-                        parts = [p.strip().split(" ")[0] for p in srcset.split(",") if p.strip()]
-                        for c in reversed(parts):
-                            if c and not DATA_URI_RE.match(c):
-                                cand = c; break
+                    await page.wait_for_load_state("networkidle", timeout=5000)
                 except Exception:
-                    cand = None
-                if cand and is_http_image(cand) and (not is_blacklisted(cand)) and cand not in seen:
-                    seen.add(cand); results.append(cand)
-
-            # <a href="*.jpg"> (zoom)
-            for a in blk.query_selector_all("a[href]"):
-                href = (a.get_attribute("href") or "").strip()
-                if href and HREF_IMG.search(href) and is_http_image(href) and (not is_blacklisted(href)) and href not in seen:
-                    seen.add(href); results.append(href)
-
-            # background-image
-            for el in blk.query_selector_all("[style]"):
-                st = (el.get_attribute("style") or "").strip()
-                for m in BG_URL_RE.finditer(st):
-                    u = (m.group(1) or "").strip()
-                    if u and HREF_IMG.search(u) and is_http_image(u) and (not is_blacklisted(u)) and u not in seen:
-                        seen.add(u); results.append(u)
+                    pass
+            except Exception:
+                pass
 
-        context.close()
-        browser.close()
+            # Scroll nhẹ để lazy-load
+            try:
+                await page.evaluate("window.scrollBy(0, 400)")
+                await page.wait_for_timeout(400)
+            except Exception:
+                pass
 
-    # Lọc lần cuối (phòng hờ)
-    results = [u for u in results if not DATA_URI_RE.match(u) and not is_blacklisted(u)]
-    return results
+            blocks = await page.evaluate(COL1_DUMP_JS)
+            return images_from_col1_dump(blocks)
+        except Exception:
+            # trang lỗi/treo (hoặc tạo context lỗi) -> bỏ context này, lượt sau tạo mới; caller fallback sang bản tĩnh
+            await self._discard(slot)
+            slot = None
+            return []
+        finally:
+            self._slots.put_nowait(slot)
+
+    def collect(self, url: str) -> List[str]:
+        return self._run(self._acollect(url))
+
+    async def _aclose(self):
+        while self._slots is not None and not self._slots.empty():
+            slot = self._slots.get_nowait()
+            if slot is None:
+                continue
+            try:
+                await slot["context"].close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            await self._browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+
+    def close(self) -> None:
+        try:
+            self._run(self._aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
 
-# ---- SPECS (#menuView4) ----
-def html_to_text_preserve_br(node: Tag) -> str:
-    return node.get_text("\n", strip=True)
+    def summary(self) -> str:
+        return f"Playwright: {self.pages_served} trang trên {self.size} tab, tái tạo context {self.recycled} lần"
 
-def collect_specs_menuView4(soup: BeautifulSoup) -> List[Dict[str, str]]:
-    container = soup.select_one("div.thongSoKyThuatSanPham1#menuView4")
-    if not container:
+_BROWSER_POOL: Optional[BrowserPool] = None
+
+def collect_images_col1_js(url: str) -> List[str]:
+    """Dùng Playwright load trang, chờ render, quét ảnh trong div.col1 (img/a[img]/background-image).
+    Dùng BrowserPool chung nếu main() đã mở; nếu không thì mở 1 pool tạm cho riêng URL này."""
+    if not PLAYWRIGHT_AVAILABLE:
+        print("[WARN] Playwright chưa cài. Bỏ qua --js.")
         return []
-    data: List[Dict[str, str]] = []
-    for li in container.select("ul > li"):
-        k = li.select_one(".text")
-        v = li.select_one(".val")
-        if not k or not v:
-            continue
-        key = k.get_text(" ", strip=True)
-        val = html_to_text_preserve_br(v)
-        if key and val:
-            data.append({"key": key, "value": val})
-    return data
+    if _BROWSER_POOL is not None:
+        return _BROWSER_POOL.collect(url)
+    pool = BrowserPool(size=1).start()
+    try:
+        return pool.collect(url)
+    finally:
+        pool.close()
+
+# ---- FAST PATH: 1 lần parse lxml, 1 lần duyệt mỗi div.col1 (thay cho BS4 + 3 lần select, bản cũ giữ trong bench_extract.py) ----
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+XP_COL1 = etree.XPath(f"//div[{_has_class('col1')}]")
+XP_SPECS = etree.XPath(f"//div[@id='menuView4' and {_has_class('thongSoKyThuatSanPham1')}][1]")
+XP_SPEC_LI = etree.XPath(".//ul/li")
+XP_TEXT = etree.XPath(f"(.//*[{_has_class('text')}])[1]")
+XP_VAL = etree.XPath(f"(.//*[{_has_class('val')}])[1]")
+_TEXT_SKIP_TAGS = {"script", "style", "template"}  # giống get_text() của BS4
+
+def parse_html_fast(text: str):
+    """Parse lxml; body rỗng/chỉ có khoảng trắng -> cây rỗng (như BS4), không ném ParserError."""
+    try:
+        try:
+            return lxml_html.document_fromstring(text)
+        except ValueError:  # chuỗi unicode có khai báo <?xml encoding?>
+            return lxml_html.document_fromstring(text.encode("utf-8"))
+    except etree.ParserError:  # "Document is empty"
+        return lxml_html.document_fromstring("<html><body></body></html>")
+
+def _text_parts(el):
+    if el.text and el.tag not in _TEXT_SKIP_TAGS:
+        yield el.text
+    for ch in el:
+        if isinstance(ch.tag, str):
+            yield from _text_parts(ch)
+        if ch.tail:
+            yield ch.tail
+
+def lxml_get_text(el, sep: str) -> str:
+    """Tương đương Tag.get_text(sep, strip=True)."""
+    return sep.join(t for t in (p.strip() for p in _text_parts(el)) if t)
+
+def extract_page_fast(root, base_url: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Ảnh col1 + specs #menuView4 từ cây lxml; kết quả giống bản BS4 cũ (bench_extract.py: legacy_images_col1 + legacy_specs_menuView4).
+    Mỗi div.col1 chỉ duyệt 1 lần; mỗi URL chỉ kiểm blacklist 1 lần."""
+    imgs, seen = [], set()
+    verdict: Dict[str, bool] = {}  # url -> hợp lệ (http + không blacklist)
+
+    def ok(u: str) -> bool:
+        v = verdict.get(u)
+        if v is None:
+            v = verdict[u] = is_http_image(u) and not DATA_URI_RE.match(u) and not is_blacklisted(u)
+        return v
+
+    for col in XP_COL1(root):
+        # gom theo đúng thứ tự bản cũ: toàn bộ <img> -> <a href> -> [style] của từng col1
+        from_img, from_a, from_style = [], [], []
+        it = col.iter()
+        next(it)  # bỏ chính div.col1 (select() chỉ xét con cháu)
+        for el in it:
+            tag = el.tag
+            if not isinstance(tag, str):
+                continue
+            if tag == "img":
+                u = pick_best_img_src(el, base_url)
+                if u:
+                    from_img.append(u)
+            elif tag == "a":
+                href = (el.get("href") or "").strip()
+                if href and HREF_IMG.search(href):
+                    from_a.append(urljoin(base_url, href))
+            st = el.get("style")
+            if st is not None:
+                for m in BG_URL_RE.finditer(st):
+                    u = urljoin(base_url, (m.group(1) or "").strip())
+                    if HREF_IMG.search(u):
+                        from_style.append(u)
+        for u in (*from_img, *from_a, *from_style):
+            if u not in seen and ok(u):
+                seen.add(u); imgs.append(u)
+
+    specs: List[Dict[str, str]] = []
+    container = XP_SPECS(root)
+    if container:
+        for li in XP_SPEC_LI(container[0]):
+            k = XP_TEXT(li)
+            v = XP_VAL(li)
+            if not k or not v:
+                continue
+            key = lxml_get_text(k[0], " ")
+            val = lxml_get_text(v[0], "\n")
+            if key and val:
+                specs.append({"key": key, "value": val})
+    return imgs, specs
 
 # ---- INPUT ----
 def parse_urls_from_markdown(md_path: str) -> List[str]:
@@ -317,20 +491,16 @@ def process_url(url: str, use_js: bool) -> Dict[str, str]:
     if resp.status_code >= 400:
         rec["status"] = f"HTTP_{resp.status_code}"; rec["note"] = "Trang lỗi/không tồn tại"; return rec
 
-    soup = BeautifulSoup(resp.text, "lxml")
+    # 1 lần parse lxml cho cả ảnh lẫn specs
+    root = parse_html_fast(resp.text)
+    imgs, specs = extract_page_fast(root, resp.url)
 
-    # Ảnh trong col1
+    # Ảnh trong col1: --js ưu tiên Playwright, không gom được thì dùng kết quả tĩnh
     if use_js:
-        imgs = collect_images_col1_js(resp.url)
-        if not imgs:
-            # fallback tĩnh nếu JS không gom được
-            imgs = collect_images_col1_static(soup, resp.url)
-    else:
-        imgs = collect_images_col1_static(soup, resp.url)
+        imgs = collect_images_col1_js(resp.url) or imgs
     rec["image_links"] = json.dumps(imgs, ensure_ascii=False)
 
     # Specs: #menuView4
-    specs = collect_specs_menuView4(soup)
     if specs:
         rec["specs_json"] = json.dumps(specs, ensure_ascii=False)
     else:
@@ -339,14 +509,81 @@ def process_url(url: str, use_js: bool) -> Dict[str, str]:
 
     return rec
 
+# ---- ASYNC CRAWL ----
+class TokenBucket:
+    """Giới hạn lịch sự: trung bình `rate` request/giây, cho phép dồn tối đa `burst` request."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def crawl_async(urls: List[str], use_js: bool, concurrency: int, per_host: int,
+                      rate: float, burst: int, on_done=None) -> List[Dict[str, str]]:
+    """Giữ tối đa `concurrency` URL đang chạy (mỗi host tối đa `per_host`); kết quả trả về theo thứ tự input.
+    Mỗi URL vẫn đi qua process_url (chạy trong thread), nên output giống hệt chế độ tuần tự."""
+    global_sem = asyncio.Semaphore(concurrency)
+    host_sems: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+    bucket = TokenBucket(rate, burst)
+
+    async def one(u: str) -> Dict[str, str]:
+        async with global_sem, host_sems[urlparse(u).netloc]:
+            await bucket.acquire()
+            rec = await asyncio.to_thread(process_url, u, use_js)
+        if on_done:
+            on_done(rec)
+        return rec
+
+    return await asyncio.gather(*(one(u) for u in urls))
+
+# ---- OUTPUT ----
+def log_record(rec: Dict[str, str]) -> None:
+    try:
+        n_img = len(json.loads(rec["image_links"]))
+        n_specs = len(json.loads(rec["specs_json"]))
+    except Exception:
+        n_img = n_specs = 0
+    print(f"[{rec['status']}] {rec['slug']} | imgs:{n_img} | specs:{n_specs} | note:{rec['note']}")
+
+def write_excel(rows: List[Dict[str, str]], out_path: str) -> None:
+    df = pd.DataFrame(rows, columns=OUT_COLUMNS)
+    with pd.ExcelWriter(out_path, engine="openpyxl") as w:
+        df.to_excel(w, sheet_name="products", index=False)
+
 def main():
     ap = argparse.ArgumentParser(description="Sunhouse -> Excel (col1 images; blacklist; optional JS; specs #menuView4)")
     ap.add_argument("-i", "--input", default="product.md", help="Đường dẫn file product.md")
     ap.add_argument("-o", "--out", default="sunhouse_products.xlsx", help="File Excel output")
     ap.add_argument("-b", "--blacklist", default=None, help="File blacklist (mỗi dòng 1 mẫu)")
     ap.add_argument("--js", action="store_true", help="Bật renderer JS (Playwright) để lấy ảnh slider đầy đủ")
+    ap.add_argument("--concurrency", type=int, default=1, help="Số URL chạy song song (>1 bật chế độ asyncio)")
+    ap.add_argument("--per-host", type=int, default=4, help="Tối đa request đồng thời trên 1 host (chế độ song song)")
+    ap.add_argument("--rate", type=float, default=2.5, help="Số request/giây trung bình (token bucket, chế độ song song)")
+    ap.add_argument("--burst", type=int, default=4, help="Số request được dồn một lúc (token bucket)")
+    ap.add_argument("--js-pages", type=int, default=None, help="Số tab Playwright chạy song song (mặc định = --concurrency)")
+    ap.add_argument("--js-recycle", type=int, default=50, help="Tạo lại context Playwright sau N trang (chống phình RAM)")
+    ap.add_argument("--checkpoint", default=None, help="File checkpoint JSONL (mặc định: <out>.checkpoint.jsonl)")
+    ap.add_argument("--since-checkpoint", action="store_true", help="Chỉ crawl lại URL có status != OK trong checkpoint")
+    ap.add_argument("--fresh", action="store_true", help="Bỏ checkpoint cũ, crawl lại từ đầu")
+    http_cache.add_cli_args(ap)
     args = ap.parse_args()
 
+    global HTTP_CACHE
+    HTTP_CACHE = http_cache.from_args(args)
+
     load_blacklist_file(args.blacklist)
 
     if args.js and not PLAYWRIGHT_AVAILABLE:
@@ -363,21 +600,48 @@ def main():
         print("[WARN] Không có URL hợp lệ trong input.")
         return
 
-    rows = []
-    for u in urls:
-        rec = process_url(u, use_js=args.js and PLAYWRIGHT_AVAILABLE)
-        rows.append(rec)
-        try:
-            n_img = len(json.loads(rec["image_links"]))
-            n_specs = len(json.loads(rec["specs_json"]))
-        except Exception:
-            n_img = n_specs = 0
-        print(f"[{rec['status']}] {rec['slug']} | imgs:{n_img} | specs:{n_specs} | note:{rec['note']}")
-        time.sleep(0.4)
-
-    df = pd.DataFrame(rows, columns=["url", "slug", "status", "image_links", "specs_json", "note"])
-    with pd.ExcelWriter(args.out, engine="openpyxl") as w:
-        df.to_excel(w, sheet_name="products", index=False)
+    # Checkpoint: mỗi bản ghi được ghi ngay khi xong; chạy lại sẽ bỏ qua URL đã có
+    ckpt_path = args.checkpoint or os.path.splitext(args.out)[0] + ".checkpoint.jsonl"
+    if args.fresh and os.path.isfile(ckpt_path):
+        os.remove(ckpt_path)
+    store = CheckpointStore(ckpt_path)
+    todo = store.pending(urls, only_failed=args.since_checkpoint)
+    if len(todo) < len(urls):
+        print(f"[INFO] Checkpoint {ckpt_path}: bỏ qua {len(urls) - len(todo)} URL đã xong, còn {len(todo)} URL")
+
+    def on_done(rec: Dict[str, str]) -> None:
+        store.append(rec)
+        log_record(rec)
+
+    use_js = args.js and PLAYWRIGHT_AVAILABLE
+    global _BROWSER_POOL
+    if use_js and todo:
+        _BROWSER_POOL = BrowserPool(size=args.js_pages or max(1, args.concurrency),
+                                    recycle_after=args.js_recycle).start()
+    t0 = time.perf_counter()
+    try:
+        if args.concurrency > 1:
+            configure_session(args.concurrency)
+            asyncio.run(crawl_async(todo, use_js, args.concurrency, args.per_host,
+                                    args.rate, args.burst, on_done=on_done))
+        else:
+            for u in todo:
+                on_done(process_url(u, use_js=use_js))
+                time.sleep(0.4)
+    finally:
+        store.close()
+        if _BROWSER_POOL is not None:
+            print(f"[INFO] {_BROWSER_POOL.summary()}")
+            _BROWSER_POOL.close()
+            _BROWSER_POOL = None
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] {len(todo)} URL trong {elapsed:.1f}s ({len(todo) / max(elapsed, 1e-9):.2f} URL/s)")
+
+    # Excel dựng lại từ checkpoint, đúng thứ tự input
+    rows = store.rows_for(urls)
+    write_excel(rows, args.out)
+    print(f"[INFO] {ROBOTS.summary()}")
+    print(f"[INFO] {HTTP_CACHE.summary()}")
     print(f"[OK] Xuất Excel -> {args.out}")
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Blacklist URL ảnh đã biên dịch (dùng cho is_blacklisted trong sunhouse_crawler.py).
+Luật giữ nguyên như bản cũ, so khớp trên URL đã bỏ query/fragment + lowercase:
+- "https://..." (URL đầy đủ)  -> khớp tuyệt đối      -> set (O(1))
+- "*chuoi"                    -> URL chứa chuoi      -> automaton Aho-Corasick (O(độ dài URL))
+- còn lại                     -> URL kết thúc bằng   -> trie đảo ngược (O(độ dài URL))
+Chi phí mỗi URL không còn phụ thuộc số mẫu.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse, urlunparse
+
+_SCHEME_RE = re.compile(r"^https?://", re.I)
+
+def strip_qf(u: str) -> str:
+    """Bỏ query & fragment để so khớp ổn định."""
+    try:
+        p = urlparse(u); p = p._replace(query="", fragment=""); return urlunparse(p)
+    except Exception:
+        return u
+
+def norm(s: str) -> str:
+    return (s or "").strip().strip('"').strip("'")
+
+class AhoCorasick:
+    """Automaton đa mẫu; chỉ cần biết 'có mẫu nào xuất hiện không'."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[bool] = [False]
+        self.match_all = False
+        for pat in patterns:
+            if not pat:
+                self.match_all = True  # "*" rỗng khớp mọi URL (như bản cũ)
+                continue
+            node = 0
+            for ch in pat:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({}); self.fail.append(0); self.out.append(False)
+                node = nxt
+            self.out[node] = True
+        # BFS dựng fail link; out[n] = True nếu n hoặc chuỗi fail của n kết thúc 1 mẫu
+        q = deque(self.goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                cand = self.goto[f].get(ch, 0)
+                self.fail[nxt] = cand if cand != nxt else 0
+                self.out[nxt] = self.out[nxt] or self.out[self.fail[nxt]]
+                q.append(nxt)
+        self.empty = len(self.goto) == 1 and not self.match_all
+
+    def search(self, text: str) -> bool:
+        if self.match_all:
+            return True
+        if self.empty:
+            return False
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                return True
+        return False
+
+class SuffixTrie:
+    """Trie trên chuỗi đảo ngược: URL khớp nếu đi ngược từ cuối URL chạm 1 nút kết thúc mẫu."""
+
+    _END = ""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.root: Dict[str, dict] = {}
+        for pat in patterns:
+            node = self.root
+            for ch in reversed(pat):
+                node = node.setdefault(ch, {})
+            node[self._END] = True
+
+    def match(self, text: str) -> bool:
+        node = self.root
+        if self._END in node:
+            return True
+        for ch in reversed(text):
+            node = node.get(ch)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+class BlacklistMatcher:
+    def __init__(self, patterns: Iterable[str]):
+        exact, subs, suffixes = set(), [], []
+        for pat in patterns:
+            p0 = norm(pat)
+            if not p0:
+                continue
+            if p0.startswith("*"):
+                subs.append(p0[1:].lower())
+            elif _SCHEME_RE.match(p0):
+                exact.add(strip_qf(p0).lower())
+            else:
+                suffixes.append(p0.lower())
+        self.exact = exact
+        self.substrings = AhoCorasick(subs)
+        self.suffixes = SuffixTrie(suffixes)
+        self.size = len(exact) + len(subs) + len(suffixes)
+
+    def match(self, u: Optional[str]) -> bool:
+        if not u:
+            return False
+        u_noq = strip_qf(norm(u)).lower()
+        return (u_noq in self.exact
+                or self.suffixes.match(u_noq)
+                or self.substrings.search(u_noq))
@@ -0,0 +1,250 @@
+"""Adaptive HTTP fetching for the TRX link checkers.
+
+- Keep-alive connection pool (one requests.Session) instead of `Connection: close`.
+- AIMD concurrency: the number of requests in flight grows by 1 after a window of
+  healthy responses and is halved on 429/5xx, timeouts or slow responses.
+- Per-host circuit breaker: after several consecutive failures the host is paused
+  (honouring Retry-After when the server sends it), then probed with one request.
+- Retry with exponential backoff + jitter, never shorter than Retry-After.
+- Throughput log: requests/sec vs error rate per time window (report_rows / write_report).
+"""
+
+import csv
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes that mean "slow down" rather than "this URL is broken"
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delay-seconds or an HTTP date; returns seconds to wait."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class AimdLimiter:
+    """Concurrency gate whose limit follows additive-increase / multiplicative-decrease."""
+
+    def __init__(self, min_limit: int, max_limit: int, start: Optional[int] = None,
+                 increase_every: int = 10, slow_seconds: float = 5.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(start if start is not None else self.min_limit)
+        self.increase_every = increase_every
+        self.slow_seconds = slow_seconds
+        self.in_flight = 0
+        self._ok_streak = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, ok: bool, latency: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if not ok or latency > self.slow_seconds:
+                # One decrease per latency window: responses already in flight
+                # when the server pushed back should not halve the limit again.
+                now = time.monotonic()
+                if now - self._last_decrease > min(latency, self.slow_seconds):
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+                self._ok_streak = 0
+            else:
+                self._ok_streak += 1
+                if self._ok_streak >= self.increase_every:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self._ok_streak = 0
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Per-host breaker: closed -> open after `threshold` consecutive failures -> half-open probe."""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = defaultdict(int)
+        self._open_until: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = defaultdict(bool)
+        self.opened = 0
+
+    def wait(self, host: str) -> None:
+        """Block while the host is open; once the cooldown ends let a single probe through."""
+        while True:
+            with self._lock:
+                until = self._open_until.get(host, 0.0)
+                now = time.monotonic()
+                if now >= until and not self._probing[host]:
+                    if until:
+                        self._probing[host] = True  # half-open
+                    return
+                delay = until - now if now < until else 0.2
+            time.sleep(min(delay, 5.0))
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            self._failures[host] = 0
+            self._open_until.pop(host, None)
+            self._probing[host] = False
+
+    def failure(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._failures[host] += 1
+            half_open = self._probing[host]
+            self._probing[host] = False
+            if retry_after or half_open or self._failures[host] >= self.threshold:
+                pause = retry_after if retry_after else self.cooldown
+                until = time.monotonic() + pause
+                if until > self._open_until.get(host, 0.0):
+                    self._open_until[host] = until
+                    self.opened += 1
+
+
+class ThroughputLog:
+    """Per-window request/error counters for the req/s vs error-rate report."""
+
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "latency": 0.0, "limit": 0.0})
+
+    def record(self, ok: bool, latency: float, limit: float) -> None:
+        with self._lock:
+            b = self._buckets[int((time.monotonic() - self.started) // self.window)]
+            b["requests"] += 1
+            b["errors"] += 0 if ok else 1
+            b["latency"] += latency
+            b["limit"] = max(b["limit"], limit)
+
+    def rows(self) -> List[Dict[str, object]]:
+        out = []
+        with self._lock:
+            for idx in sorted(self._buckets):
+                b = self._buckets[idx]
+                n = b["requests"]
+                out.append({
+                    "t_start_s": round(idx * self.window, 1),
+                    "requests": int(n),
+                    "req_per_s": round(n / self.window, 2),
+                    "errors": int(b["errors"]),
+                    "error_rate": round(b["errors"] / n, 3) if n else 0.0,
+                    "avg_latency_ms": round(b["latency"] / n * 1000, 1) if n else 0.0,
+                    "concurrency_limit": int(b["limit"]),
+                })
+        return out
+
+
+class AdaptiveFetcher:
+    def __init__(self, headers: Dict[str, str], timeout: float = 20, retries: int = 2,
+                 backoff: float = 1.5, min_workers: int = 2, max_workers: int = 20,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 30.0, max_retry_after: float = 120.0):
+        self.headers = {k: v for k, v in headers.items() if k.lower() != "connection"}
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.limiter = AimdLimiter(min_workers, max_workers, start=min_workers)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.log = ThroughputLog()
+
+    def _sleep_before_retry(self, attempt: int, retry_after: Optional[float]) -> None:
+        delay = random.uniform(0, self.backoff ** (attempt + 1))  # full jitter
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        time.sleep(delay)
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """GET with adaptive concurrency; 429/5xx responses are retried and the last one is returned."""
+        host = urlparse(url).netloc.lower()
+        last_exc: Optional[Exception] = None
+        resp: Optional[requests.Response] = None
+        for attempt in range(self.retries + 1):
+            self.breaker.wait(host)
+            self.limiter.acquire()
+            t0 = time.monotonic()
+            retry_after = None
+            ok = False
+            try:
+                resp = self.session.get(url, headers=self.headers, timeout=self.timeout,
+                                        allow_redirects=True, **kwargs)
+                ok = resp.status_code not in RETRY_STATUS
+                if not ok:
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        retry_after = min(retry_after, self.max_retry_after)
+            except requests.RequestException as e:
+                last_exc, resp = e, None
+            finally:
+                # Any other exception (bad URL, hook error...) still frees the slot and ends a
+                # half-open probe as a failure before propagating.
+                latency = time.monotonic() - t0
+                self.limiter.release(ok, latency)
+                self.log.record(ok, latency, self.limiter.limit)
+                if ok:
+                    self.breaker.success(host)
+                else:
+                    self.breaker.failure(host, retry_after)
+            if ok:
+                return resp
+            if attempt < self.retries:
+                if resp is not None:
+                    resp.close()
+                self._sleep_before_retry(attempt, retry_after)
+        if resp is not None:
+            return resp
+        raise last_exc
+
+    def report_rows(self) -> List[Dict[str, object]]:
+        return self.log.rows()
+
+    def summary(self) -> str:
+        rows = self.report_rows()
+        total = sum(r["requests"] for r in rows)
+        errors = sum(r["errors"] for r in rows)
+        elapsed = max(time.monotonic() - self.log.started, 1e-9)
+        return (f"Requests: {total} in {elapsed:.1f}s ({total / elapsed:.2f} req/s) | "
+                f"error rate {errors / total if total else 0:.1%} | "
+                f"final concurrency {int(self.limiter.limit)} | breaker opened {self.breaker.opened}x")
+
+    def write_report(self, path: str) -> None:
+        rows = self.report_rows()
+        fieldnames = ["t_start_s", "requests", "req_per_s", "errors", "error_rate",
+                      "avg_latency_ms", "concurrency_limit"]
+        with open(path, "w", newline="", encoding="utf-8") as fo:
+            writer = csv.DictWriter(fo, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def close(self) -> None:
+        self.session.close()
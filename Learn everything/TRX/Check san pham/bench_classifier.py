@@ -0,0 +1,91 @@
+"""
+Benchmark: detect_status_and_product (whole resp.text) vs detect_status_and_product_stream (chunked, early abort).
+- Input: saved search pages (--html a.html b.html ...), final URL taken from --url (default: a /search/ URL).
+  Without --html, builds 3 synthetic ~150 KB pages: not found, results with product links, no signal.
+- Checks both verdicts agree, then prints bytes read and time per page.
+- Run: python bench_classifier.py --html saved/*.html --repeat 50
+"""
+
+import argparse
+import importlib.util
+import io
+import time
+from pathlib import Path
+
+import requests
+
+_spec = importlib.util.spec_from_file_location("check_links_v12", Path(__file__).with_name("check_links_v1.2.py"))
+clv = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(clv)
+
+SEARCH_URL = "https://sunhouse.com.vn/search/SHD7510"
+
+def synthetic_pages(filler_kb: int = 150):
+    menu = "".join(f'<li><a href="/danh-muc/{i}">Danh mục {i}</a></li>' for i in range(filler_kb * 1024 // 45))
+    head = ('<html><head><title>Tìm kiếm</title>'
+            f'<link rel="canonical" href="{SEARCH_URL}"></head><body><header><ul>{menu[:4000]}</ul></header>')
+    tail = f'<footer><ul>{menu}</ul></footer></body></html>'
+    not_found = head + '<div class="search-count">Tìm thấy 0 kết quả</div>' + tail
+    products = "".join(f'<div class="item"><a href="/san-pham/noi-com-dien-{i}">SP {i}</a></div>' for i in range(12))
+    found = head + f'<div class="search-count">Tìm thấy 12 kết quả</div>{products}' + tail
+    nothing = head + '<div class="search-count">Đang tải...</div>' + tail
+    return {"not_found": not_found, "results": found, "no_signal": nothing}
+
+def make_response(body: bytes, url: str) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r.url = url
+    r.headers["Content-Type"] = "text/html; charset=utf-8"
+    r.encoding = "utf-8"
+    r.raw = io.BytesIO(body)
+    return r
+
+def run_full(body: bytes, url: str):
+    r = make_response(body, url)
+    return clv.detect_status_and_product(r), len(body)
+
+def run_stream(body: bytes, url: str):
+    before = clv.STREAM_STATS["bytes_read"]
+    verdict = clv.detect_status_and_product_stream(make_response(body, url))
+    return verdict, clv.STREAM_STATS["bytes_read"] - before
+
+def bench(fn, body: bytes, url: str, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(body, url)
+    return (time.perf_counter() - t0) / repeat
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark full-body vs streaming search-page classifier")
+    ap.add_argument("--html", nargs="*", default=None, help="Saved search result pages")
+    ap.add_argument("--url", default=SEARCH_URL, help="Final URL assumed for saved pages")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    if args.html:
+        pages = {Path(p).name: Path(p).read_bytes() for p in args.html}
+    else:
+        pages = {name: html.encode("utf-8") for name, html in synthetic_pages().items()}
+
+    tot = {"full_b": 0, "stream_b": 0, "full_t": 0.0, "stream_t": 0.0}
+    mismatches = 0
+    for name, body in pages.items():
+        (v_full, b_full), (v_stream, b_stream) = run_full(body, args.url), run_stream(body, args.url)
+        if v_full != v_stream:
+            mismatches += 1
+            print(f"  MISMATCH: {name}: full={v_full} stream={v_stream}")
+        t_full = bench(run_full, body, args.url, args.repeat)
+        t_stream = bench(run_stream, body, args.url, args.repeat)
+        tot["full_b"] += b_full; tot["stream_b"] += b_stream
+        tot["full_t"] += t_full; tot["stream_t"] += t_stream
+        print(f"{name:<20} {v_stream[0]:<10} read {b_stream / 1024:7.1f}/{b_full / 1024:7.1f} KB | "
+              f"{t_stream * 1000:6.2f} ms vs {t_full * 1000:6.2f} ms")
+
+    print(f"{len(pages)} pages | verdict mismatches: {mismatches}")
+    print(f"Bytes read: {tot['stream_b'] / 1024:.0f} KB vs {tot['full_b'] / 1024:.0f} KB "
+          f"({1 - tot['stream_b'] / max(tot['full_b'], 1):.0%} saved)")
+    print(f"Time: {tot['stream_t'] * 1000:.2f} ms vs {tot['full_t'] * 1000:.2f} ms per pass "
+          f"(x{tot['full_t'] / max(tot['stream_t'], 1e-9):.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
+import argparse
 import csv
 import re
-import time
 import unicodedata
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
@@ -8,8 +8,11 @@ import requests
 import sys
 from pathlib import Path
 
-INPUT_FILE = sys.argv[1] if len(sys.argv) > 1 else "urls.txt"
-OUTPUT_FILE = sys.argv[2] if len(sys.argv) > 2 else "results.csv"
+import search_memo
+from adaptive_fetch import AdaptiveFetcher
+
+INPUT_FILE = "urls.txt"
+OUTPUT_FILE = "results.csv"
 
 # Fallback message snippet (de-accented compare will also handle this)
 LONG_NOT_FOUND_MSG = "khong tim thay ket qua theo yeu cau cua ban"
@@ -28,13 +31,23 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; LinkChecker/1.1; +https://example.invalid)",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "vi,vi-VN;q=0.9,en;q=0.8",
-    "Connection": "close",
 }
 
 TIMEOUT = 20
+# Concurrency adapts between MIN_WORKERS and MAX_WORKERS (AIMD on 429/5xx/timeouts/slow responses)
+MIN_WORKERS = 2
 MAX_WORKERS = 12
 RETRIES = 2
 BACKOFF = 1.5
+# Per-host circuit breaker: pause the host after N consecutive failures (or for Retry-After)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+FETCHER = AdaptiveFetcher(
+    HEADERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+    min_workers=MIN_WORKERS, max_workers=MAX_WORKERS,
+    breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN,
+)
 
 def deaccent(s: str) -> str:
     return "".join(
@@ -43,15 +56,7 @@ def deaccent(s: str) -> str:
     )
 
 def fetch(url: str):
-    last_exc = None
-    for attempt in range(RETRIES + 1):
-        try:
-            return requests.get(url, headers=HEADERS, timeout=TIMEOUT, allow_redirects=True)
-        except Exception as e:
-            last_exc = e
-            if attempt < RETRIES:
-                time.sleep((BACKOFF ** attempt))
-    raise last_exc
+    return FETCHER.fetch(url)
 
 def detect_status_and_product(resp: requests.Response):
     status_code = getattr(resp, "status_code", None)
@@ -144,8 +149,18 @@ def process_url(url: str):
             "notes": str(e),
         }
 
+def parse_args():
+    ap = argparse.ArgumentParser(description="Check Sunhouse search URLs: product / not_found / unknown")
+    ap.add_argument("input", nargs="?", default=INPUT_FILE, help=f"URL list, one per line (default: {INPUT_FILE})")
+    ap.add_argument("output", nargs="?", default=OUTPUT_FILE, help=f"Result CSV (default: {OUTPUT_FILE})")
+    search_memo.add_cli_args(ap)
+    return ap.parse_args()
+
 def main():
-    in_path = Path(INPUT_FILE)
+    global OUTPUT_FILE
+    args = parse_args()
+    OUTPUT_FILE = args.output
+    in_path = Path(args.input)
     if not in_path.exists():
         print(f"Input file not found: {in_path}")
         sys.exit(2)
@@ -153,7 +168,14 @@ def main():
     with in_path.open("r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip()]
 
+    memo = None if args.no_memo else search_memo.SearchMemo(
+        args.memo, search_memo.parse_ttl_overrides(args.ttl))
     results = []
+    if memo is not None and args.refresh_stale_only:
+        # Fresh memo entries answer directly; only missing/stale URLs reach process_url (network)
+        results, urls = memo.split(urls)
+        print(f"Memo: {len(results)} fresh, {len(urls)} to check")
+
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {executor.submit(process_url, u): u for u in urls}
         done_count = 0
@@ -161,6 +183,8 @@ def main():
         for fut in as_completed(futures):
             res = fut.result()
             results.append(res)
+            if memo is not None:
+                memo.put(res)
             done_count += 1
             if done_count % 50 == 0 or done_count == total:
                 print(f"Processed {done_count}/{total}")
@@ -178,6 +202,15 @@ def main():
     print("Done.")
     print(f"product: {sum_product} | not_found: {sum_not_found} | unknown: {sum_unknown} | http_error: {sum_error}")
     print(f"Saved -> {OUTPUT_FILE}")
+    if memo is not None:
+        print(memo.summary())
+        memo.close()
+
+    report_file = str(Path(OUTPUT_FILE).with_name(Path(OUTPUT_FILE).stem + "_throughput.csv"))
+    FETCHER.write_report(report_file)
+    FETCHER.close()
+    print(FETCHER.summary())
+    print(f"Throughput report (req/s vs error rate) -> {report_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
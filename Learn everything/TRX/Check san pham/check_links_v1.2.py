@@ -1,15 +1,20 @@
+import codecs
+import argparse
 import csv
 import re
-import time
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 import requests
 import sys
 from pathlib import Path
 
+import search_memo
+from adaptive_fetch import AdaptiveFetcher
+
 # Paths
-INPUT_FILE = sys.argv[1] if len(sys.argv) > 1 else "urls.txt"
-OUTPUT_FILE = sys.argv[2] if len(sys.argv) > 2 else "results.csv"
+INPUT_FILE = "urls.txt"
+OUTPUT_FILE = "results.csv"
 
 # Message snippet to detect "no results" page (case-insensitive, relaxed match)
 # Updated per request: look for the exact phrase "Tìm thấy 0 kết quả"
@@ -26,30 +31,67 @@ CANONICAL_PATTERN = re.compile(
     flags=re.IGNORECASE,
 )
 
+# Result counter on search pages; a count other than 0 means the not-found snippet will not appear further down
+RESULT_COUNTER_PATTERN = re.compile(r"tìm thấy\s*(\d+)\s*kết quả")
+
+# Streaming classifier: read the body in chunks and stop once the verdict cannot change
+STREAM_CHUNK_SIZE = 16 * 1024
+MATCH_OVERLAP = 2048  # longest tag a regex match may straddle between two chunks
+STREAM_STATS = {"pages": 0, "bytes_read": 0, "early_exit": 0}
+_STATS_LOCK = threading.Lock()
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; LinkChecker/1.0; +https://example.invalid)",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "vi,vi-VN;q=0.9,en;q=0.8",
-    "Connection": "close",
 }
 
 TIMEOUT = 20
+# Concurrency adapts between MIN_WORKERS and MAX_WORKERS (AIMD on 429/5xx/timeouts/slow responses)
+MIN_WORKERS = 2
 MAX_WORKERS = 20
 RETRIES = 2
 BACKOFF = 1.5
+# Per-host circuit breaker: pause the host after N consecutive failures (or for Retry-After)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+FETCHER = AdaptiveFetcher(
+    HEADERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+    min_workers=MIN_WORKERS, max_workers=MAX_WORKERS,
+    breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN,
+)
 
 def fetch(url: str):
-    last_exc = None
-    for attempt in range(RETRIES + 1):
-        try:
-            return requests.get(url, headers=HEADERS, timeout=TIMEOUT, allow_redirects=True)
-        except Exception as e:
-            last_exc = e
-            if attempt < RETRIES:
-                time.sleep((BACKOFF ** attempt))
-    raise last_exc
+    return FETCHER.fetch(url, stream=True)
+
+def absolute_href(href: str, final_url: str) -> str:
+    if href.startswith("/"):
+        parsed = urlparse(final_url)
+        href = f"{parsed.scheme}://{parsed.netloc}{href}"
+    return href
+
+def classify_body(final_url: str, text: str, text_lower: str):
+    if NOT_FOUND_SNIPPET in text_lower:
+        return "not_found", "", "search page says no results"
+
+    if "/search/" not in final_url:
+        return "product", final_url, "redirected or landed on non-search page"
+
+    m = CANONICAL_PATTERN.search(text)
+    if m:
+        href = m.group("href")
+        if href and "/search/" not in href:
+            return "product", href, "canonical suggests product"
+
+    m2 = PRODUCT_HREF_PATTERN.search(text)
+    if m2:
+        return "product", absolute_href(m2.group("href"), final_url), "found product link in page"
+
+    return "unknown", "", "no not-found text, no product link detected"
 
 def detect_status_and_product(resp: requests.Response):
+    """Classify from the whole body (resp.text)."""
     status_code = getattr(resp, "status_code", None)
     final_url = getattr(resp, "url", "")
 
@@ -59,28 +101,109 @@ def detect_status_and_product(resp: requests.Response):
     if status_code >= 400:
         return "http_error", "", f"HTTP {status_code}"
 
-    text_lower = resp.text.lower()
+    return classify_body(final_url, resp.text, resp.text.lower())
 
-    if NOT_FOUND_SNIPPET in text_lower:
-        return "not_found", "", "search page says no results"
+def stream_decoder(resp: requests.Response, first_chunk: bytes):
+    """
+    Incremental decoder picking the charset the way resp.text does: the header charset,
+    else requests' apparent_encoding rule (chardet/charset_normalizer, "utf-8" if neither),
+    sniffed from the first chunk instead of the whole body. A first chunk that is plain
+    ASCII is decoded as UTF-8 so non-ASCII text further down is not replaced.
+    """
+    encoding = resp.encoding
+    if not encoding:
+        detector = requests.compat.chardet
+        encoding = (detector.detect(first_chunk)["encoding"] if detector is not None else None) or "utf-8"
+        if encoding.lower() == "ascii":
+            encoding = "utf-8"
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:  # unknown charset in the header: resp.text falls back the same way
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
 
-    if "/search/" not in final_url:
-        return "product", final_url, "redirected or landed on non-search page"
+def detect_status_and_product_stream(resp: requests.Response):
+    """
+    Same verdict as detect_status_and_product, but reads the body chunk by chunk and closes
+    the connection as soon as the verdict is known:
+    - the not-found snippet shows up -> not_found;
+    - a result counter > 0 shows up (the snippet can no longer appear) -> the first of
+      non-search final URL / canonical in <head> / first product href that is already decidable.
+    Otherwise the page is read to the end and classified exactly like the full-body version.
+    """
+    status_code = getattr(resp, "status_code", None)
+    final_url = getattr(resp, "url", "")
 
-    m = CANONICAL_PATTERN.search(resp.text)
-    if m:
-        href = m.group("href")
-        if href and "/search/" not in href:
-            return "product", href, "canonical suggests product"
+    if status_code is None:
+        return "http_error", "", "No status code"
 
-    m2 = PRODUCT_HREF_PATTERN.search(resp.text)
-    if m2:
-        href = m2.group("href")
-        if href.startswith("/"):
-            parsed = urlparse(final_url)
-            href = f"{parsed.scheme}://{parsed.netloc}{href}"
-        return "product", href, "found product link in page"
+    if status_code >= 400:
+        resp.close()
+        return "http_error", "", f"HTTP {status_code}"
+
+    decoder = None
+    text = lower = ""
+    bytes_read = 0
+    results_seen = False
+    canonical = product = None
+    verdict = None
+    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        if not chunk:
+            continue
+        if decoder is None:
+            decoder = stream_decoder(resp, chunk)
+        bytes_read += len(chunk)
+        piece = decoder.decode(chunk)
+        # text and lower can differ in length (some characters lowercase to two), so each gets its own offset
+        scan_from = max(0, len(text) - MATCH_OVERLAP)
+        scan_lower = max(0, len(lower) - MATCH_OVERLAP)
+        text += piece
+        lower += piece.lower()
+
+        if NOT_FOUND_SNIPPET in lower[scan_lower:]:
+            verdict = ("not_found", "", "search page says no results")
+            break
+        if not results_seen:
+            for m in RESULT_COUNTER_PATTERN.finditer(lower, scan_lower):
+                if int(m.group(1)) > 0:
+                    results_seen = True
+                    break
+        if canonical is None:
+            canonical = CANONICAL_PATTERN.search(text, scan_from)
+        if product is None:
+            product = PRODUCT_HREF_PATTERN.search(text, scan_from)
+        if not results_seen:
+            continue
+
+        if "/search/" not in final_url:
+            verdict = ("product", final_url, "redirected or landed on non-search page")
+        elif canonical is not None and "/search/" not in canonical.group("href"):
+            verdict = ("product", canonical.group("href"), "canonical suggests product")
+        elif canonical is None and "</head>" not in lower:
+            continue  # canonical may still come
+        elif product is not None:
+            verdict = ("product", absolute_href(product.group("href"), final_url), "found product link in page")
+        if verdict:
+            break
+    resp.close()
+
+    with _STATS_LOCK:
+        STREAM_STATS["pages"] += 1
+        STREAM_STATS["bytes_read"] += bytes_read
+        STREAM_STATS["early_exit"] += int(verdict is not None)
+    if verdict:
+        return verdict
 
+    # Whole body read: same rules as classify_body, reusing the matches found while streaming
+    tail = decoder.decode(b"", final=True) if decoder is not None else ""
+    if tail:
+        text += tail
+        return classify_body(final_url, text, text.lower())
+    if "/search/" not in final_url:
+        return "product", final_url, "redirected or landed on non-search page"
+    if canonical is not None and "/search/" not in canonical.group("href"):
+        return "product", canonical.group("href"), "canonical suggests product"
+    if product is not None:
+        return "product", absolute_href(product.group("href"), final_url), "found product link in page"
     return "unknown", "", "no not-found text, no product link detected"
 
 def process_url(url: str):
@@ -97,7 +220,7 @@ def process_url(url: str):
 
     try:
         resp = fetch(url)
-        status, product_url, notes = detect_status_and_product(resp)
+        status, product_url, notes = detect_status_and_product_stream(resp)
         return {
             "input_url": url,
             "http_status": resp.status_code,
@@ -116,8 +239,18 @@ def process_url(url: str):
             "notes": str(e),
         }
 
+def parse_args():
+    ap = argparse.ArgumentParser(description="Check Sunhouse search URLs: product / not_found / unknown")
+    ap.add_argument("input", nargs="?", default=INPUT_FILE, help=f"URL list, one per line (default: {INPUT_FILE})")
+    ap.add_argument("output", nargs="?", default=OUTPUT_FILE, help=f"Result CSV (default: {OUTPUT_FILE})")
+    search_memo.add_cli_args(ap)
+    return ap.parse_args()
+
 def main():
-    in_path = Path(INPUT_FILE)
+    global OUTPUT_FILE
+    args = parse_args()
+    OUTPUT_FILE = args.output
+    in_path = Path(args.input)
     if not in_path.exists():
         print(f"Input file not found: {in_path}")
         sys.exit(2)
@@ -125,7 +258,14 @@ def main():
     with in_path.open("r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip()]
 
+    memo = None if args.no_memo else search_memo.SearchMemo(
+        args.memo, search_memo.parse_ttl_overrides(args.ttl))
     results = []
+    if memo is not None and args.refresh_stale_only:
+        # Fresh memo entries answer directly; only missing/stale URLs reach process_url (network)
+        results, urls = memo.split(urls)
+        print(f"Memo: {len(results)} fresh, {len(urls)} to check")
+
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {executor.submit(process_url, u): u for u in urls}
         done_count = 0
@@ -133,6 +273,8 @@ def main():
         for fut in as_completed(futures):
             res = fut.result()
             results.append(res)
+            if memo is not None:
+                memo.put(res)
             done_count += 1
             if done_count % 50 == 0 or done_count == total:
                 print(f"Processed {done_count}/{total}")
@@ -150,6 +292,17 @@ def main():
     print("Done.")
     print(f"product: {sum_product} | not_found: {sum_not_found} | unknown: {sum_unknown} | http_error: {sum_error}")
     print(f"Saved -> {OUTPUT_FILE}")
+    if memo is not None:
+        print(memo.summary())
+        memo.close()
+    print(f"Body read: {STREAM_STATS['bytes_read'] / 1024:.0f} KB over {STREAM_STATS['pages']} pages, "
+          f"{STREAM_STATS['early_exit']} stopped early")
+
+    report_file = str(Path(OUTPUT_FILE).with_name(Path(OUTPUT_FILE).stem + "_throughput.csv"))
+    FETCHER.write_report(report_file)
+    FETCHER.close()
+    print(FETCHER.summary())
+    print(f"Throughput report (req/s vs error rate) -> {report_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
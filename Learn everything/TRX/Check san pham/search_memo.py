@@ -0,0 +1,108 @@
+"""
+Persistent memo of search-URL checks across runs (SQLite):
+input_url -> (status, product_url, checked_at) + http_status/final_url/notes for the output CSV.
+
+Freshness: each status class has its own TTL (DEFAULT_TTL_HOURS, override with --ttl STATUS=HOURS).
+With --refresh-stale-only, URLs whose entry is still fresh are answered from the memo and only
+missing/stale URLs go to the network. Without it every URL is checked (as before) and the memo is updated.
+"""
+
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Product mappings rarely change; "not found" may become a product any day; errors are always retried
+DEFAULT_TTL_HOURS = {
+    "product": 7 * 24,
+    "not_found": 24,
+    "unknown": 24,
+    "http_error": 0,
+    "skip": 0,
+}
+
+COLUMNS = ("input_url", "http_status", "final_url", "status", "product_url", "notes")
+
+def parse_ttl_overrides(values: Optional[Iterable[str]]) -> Dict[str, float]:
+    ttl = dict(DEFAULT_TTL_HOURS)
+    for item in values or []:
+        status, sep, hours = item.partition("=")
+        if not sep:
+            raise ValueError(f"--ttl expects STATUS=HOURS, got {item!r}")
+        ttl[status.strip()] = float(hours)
+    return ttl
+
+def add_cli_args(parser) -> None:
+    g = parser.add_argument_group("memo (SQLite, across runs)")
+    g.add_argument("--memo", default="search_memo.sqlite", help="SQLite memo file (default: search_memo.sqlite)")
+    g.add_argument("--no-memo", action="store_true", help="Do not read or write the memo")
+    g.add_argument("--refresh-stale-only", action="store_true",
+                   help="Answer URLs with a fresh memo entry from the memo; only fetch missing/stale ones")
+    g.add_argument("--ttl", action="append", metavar="STATUS=HOURS",
+                   help=f"Freshness per status (default: {DEFAULT_TTL_HOURS})")
+
+class SearchMemo:
+    def __init__(self, path: str, ttl_hours: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.ttl_hours = ttl_hours or dict(DEFAULT_TTL_HOURS)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_memo ("
+            " input_url TEXT PRIMARY KEY, status TEXT NOT NULL, product_url TEXT,"
+            " checked_at REAL NOT NULL, http_status TEXT, final_url TEXT, notes TEXT)"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self._pending = 0
+
+    def is_fresh(self, status: str, checked_at: float, now: Optional[float] = None) -> bool:
+        ttl = self.ttl_hours.get(status, 0) * 3600
+        return ttl > 0 and (now or time.time()) - checked_at < ttl
+
+    def split(self, urls: List[str]) -> Tuple[List[Dict[str, object]], List[str]]:
+        """Return (rows answered from fresh memo entries, URLs that must be checked)."""
+        now = time.time()
+        fresh: List[Dict[str, object]] = []
+        todo: List[str] = []
+        cur = self.conn.cursor()
+        for url in urls:
+            row = cur.execute(
+                "SELECT status, product_url, checked_at, http_status, final_url, notes"
+                " FROM search_memo WHERE input_url = ?", (url,)).fetchone()
+            if row and self.is_fresh(row[0], row[2], now):
+                checked = time.strftime("%Y-%m-%d %H:%M", time.localtime(row[2]))
+                fresh.append({
+                    "input_url": url,
+                    "http_status": row[3] or "",
+                    "final_url": row[4] or "",
+                    "status": row[0],
+                    "product_url": row[1] or "",
+                    "notes": f"{row[5] or ''} (memo {checked})",
+                })
+            else:
+                todo.append(url)
+        self.hits += len(fresh)
+        return fresh, todo
+
+    def put(self, res: Dict[str, object], commit_every: int = 100) -> None:
+        if res.get("status") == "skip":
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO search_memo"
+            " (input_url, status, product_url, checked_at, http_status, final_url, notes)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (res["input_url"], res["status"], res.get("product_url") or "", time.time(),
+             str(res.get("http_status") or ""), res.get("final_url") or "", res.get("notes") or ""),
+        )
+        self._pending += 1
+        if self._pending >= commit_every:
+            self.conn.commit()
+            self._pending = 0
+
+    def summary(self) -> str:
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM search_memo GROUP BY status"))
+        return f"Memo: {self.hits} answered from memo | stored {counts} ({self.path})"
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
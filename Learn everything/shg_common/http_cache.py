@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache HTTP trên đĩa (conditional GET) dùng chung cho các script tải trang Sunhouse:
+  - SHG new website/Export data/sunhouse_crawler.py  (fetch)
+  - Export/specs_engine.py                          (fetch_html: export.py, export_specs_batch.py)
+  - SHG new website/Check_data/check_links.py       (check_link)
+
+Cách hoạt động:
+- Key = URL. Mỗi URL lưu 2 file: <sha1>.body (nội dung) + <sha1>.json (status, headers, ETag, Last-Modified...).
+- Lần chạy sau gửi If-None-Match / If-Modified-Since; server trả 304 -> lấy body từ đĩa (chỉ tốn 1 round-trip).
+- Giới hạn dung lượng (max_bytes): vượt thì xoá bớt mục ít dùng nhất (LRU theo mtime, chạm khi hit).
+- Gọi với stream=True (đọc dở rồi dừng, vd check_links): get() KHÔNG tự lưu bản tải mới (để không phải đọc hết
+  body), nhưng vẫn gửi conditional GET và trả body từ đĩa nếu URL đã có trong cache. Người gọi đọc hết body
+  thì gọi store_streamed(url, resp, body) để lưu; đọc dở (dừng sớm) thì không lưu được.
+- max_age > 0: mục được tải/xác nhận (304) trong vòng max_age giây được dùng luôn, không gọi mạng
+  (vd export 1 URL ngay sau lượt batch). Mặc định 0 = luôn gửi conditional GET như cũ.
+- offline=True: chỉ đọc từ cache, không gọi mạng (URL chưa có trong cache -> requests.ConnectionError).
+- Thư mục mặc định: biến môi trường SHG_HTTP_CACHE, nếu không có thì Learn everything/.http_cache
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_DIR = Path(os.environ.get("SHG_HTTP_CACHE") or Path(__file__).resolve().parents[1] / ".http_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Header giữ lại để dựng lại Response từ cache
+KEEP_HEADERS = ("content-type", "etag", "last-modified", "content-language")
+
+class HttpCache:
+    def __init__(self, root: Optional[os.PathLike] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 offline: bool = False, enabled: bool = True, max_age: float = 0):
+        self.root = Path(root) if root else DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline
+        self.enabled = enabled or offline
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "offline_hits": 0, "downloads": 0,
+                      "bytes_saved": 0, "evicted": 0}
+
+    # ---------- lưu trữ ----------
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        sub = self.root / key[:2]
+        return sub / f"{key}.json", sub / f"{key}.body"
+
+    def _load(self, url: str):
+        meta_p, body_p = self._paths(url)
+        try:
+            meta = json.loads(meta_p.read_text(encoding="utf-8"))
+            body = body_p.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        if not self.cacheable(meta.get("status", 200)):  # mục 4xx do bản cũ lưu: coi như chưa có
+            return None, None
+        return meta, body
+
+    def _touch(self, url: str) -> None:
+        _, body_p = self._paths(url)
+        try:
+            os.utime(body_p, None)
+        except OSError:
+            pass
+
+    def _scan_total(self) -> int:
+        if self._total is None:
+            self._total = sum(p.stat().st_size for p in self.root.glob("*/*.body")) if self.root.exists() else 0
+        return self._total
+
+    def _store(self, url: str, resp: requests.Response, body: Optional[bytes] = None) -> None:
+        meta_p, body_p = self._paths(url)
+        if body is None:
+            body = resp.content
+        meta = {
+            "url": url,
+            "final_url": resp.url,
+            "status": resp.status_code,
+            "reason": resp.reason,
+            "redirected": bool(resp.history),
+            "headers": {k: resp.headers[k] for k in KEEP_HEADERS if k in resp.headers},
+            "stored_at": time.time(),
+        }
+        meta["validated_at"] = meta["stored_at"]
+        meta_p.parent.mkdir(parents=True, exist_ok=True)
+        old_size = body_p.stat().st_size if body_p.exists() else 0
+        tmp = body_p.with_name(f"{body_p.name}.tmp{threading.get_ident()}")
+        tmp.write_bytes(body)
+        os.replace(tmp, body_p)
+        tmp = meta_p.with_name(f"{meta_p.name}.tmp{threading.get_ident()}")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, meta_p)
+        with self._lock:
+            self._total = self._scan_total() + len(body) - old_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _mark_validated(self, url: str, meta: Dict) -> None:
+        """304: ghi lại thời điểm xác nhận để max_age tính từ lần kiểm tra gần nhất."""
+        meta_p, _ = self._paths(url)
+        meta["validated_at"] = time.time()
+        tmp = meta_p.with_name(f"{meta_p.name}.tmp{threading.get_ident()}")
+        try:
+            tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, meta_p)
+        except OSError:
+            pass
+
+    @staticmethod
+    def cacheable(status: int) -> bool:
+        """Chỉ lưu 2xx: trang 404/403/429 (chặn tạm, rate limit) không được trả lại như cache hit."""
+        return 200 <= status < 300
+
+    def _count(self, **deltas: int) -> None:
+        """Cộng thống kê dưới _lock (get() chạy từ nhiều luồng)."""
+        with self._lock:
+            for k, v in deltas.items():
+                self.stats[k] += v
+
+    def is_fresh(self, meta: Dict) -> bool:
+        checked = meta.get("validated_at") or meta.get("stored_at") or 0
+        return self.max_age > 0 and time.time() - checked < self.max_age
+
+    def _evict(self) -> None:
+        """Xoá mục ít dùng nhất đến khi còn ~90% max_bytes (gọi khi đang giữ _lock)."""
+        bodies = sorted(self.root.glob("*/*.body"), key=lambda p: p.stat().st_mtime)
+        target = int(self.max_bytes * 0.9)
+        for body_p in bodies:
+            if self._total <= target:
+                break
+            try:
+                size = body_p.stat().st_size
+                body_p.unlink()
+                body_p.with_suffix(".json").unlink(missing_ok=True)
+            except OSError:
+                continue
+            self._total -= size
+            self.stats["evicted"] += 1
+
+    # ---------- dựng Response ----------
+    @staticmethod
+    def _from_cache(meta: Dict, body: bytes, base: Optional[requests.Response] = None) -> requests.Response:
+        r = base if base is not None else requests.Response()
+        r.status_code = meta.get("status", 200)
+        r.reason = meta.get("reason") or "OK"
+        r._content = body
+        r._content_consumed = True
+        r.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+        if base is None:
+            r.url = meta.get("final_url") or meta.get("url")
+            # chỉ đánh dấu đã redirect (giữ tương thích bool(resp.history)); không có Response gốc
+            r.history = [requests.Response()] if meta.get("redirected") else []
+        r.from_cache = True
+        return r
+
+    # ---------- API ----------
+    def get(self, url: str, session=None, headers: Optional[Dict[str, str]] = None,
+            timeout: float = 20, **kwargs) -> requests.Response:
+        """GET có cache. Thay thế requests.get / session.get (cùng tham số chính)."""
+        client = session or requests
+        if not self.enabled:
+            return client.get(url, headers=headers, timeout=timeout, **kwargs)
+
+        meta, body = self._load(url)
+        if self.offline:
+            if meta is None:
+                raise requests.ConnectionError(f"offline: chưa có trong cache: {url}")
+            self._touch(url)
+            self._count(offline_hits=1)
+            return self._from_cache(meta, body)
+
+        if meta is not None and self.is_fresh(meta):
+            self._touch(url)
+            self._count(fresh_hits=1, bytes_saved=len(body))
+            return self._from_cache(meta, body)
+
+        req_headers = dict(headers or {})
+        if meta is not None:
+            h = meta.get("headers") or {}
+            if h.get("etag"):
+                req_headers["If-None-Match"] = h["etag"]
+            if h.get("last-modified"):
+                req_headers["If-Modified-Since"] = h["last-modified"]
+
+        resp = client.get(url, headers=req_headers, timeout=timeout, **kwargs)
+        if resp.status_code == 304 and meta is not None:
+            resp.close()
+            self._touch(url)
+            if self.max_age > 0:
+                self._mark_validated(url, meta)
+            self._count(revalidated=1, bytes_saved=len(body))
+            return self._from_cache(meta, body, base=resp)
+
+        self._count(downloads=1)
+        if self.cacheable(resp.status_code) and not kwargs.get("stream"):
+            try:
+                self._store(url, resp)
+            except OSError:
+                pass
+        return resp
+
+    def store_streamed(self, url: str, resp: requests.Response, body: bytes) -> None:
+        """Lưu response của get(..., stream=True) khi người gọi đã tự đọc HẾT body (bỏ qua bản lấy từ cache)."""
+        if not self.enabled or self.offline or getattr(resp, "from_cache", False) \
+                or not self.cacheable(resp.status_code):
+            return
+        try:
+            self._store(url, resp, body)
+        except OSError:
+            pass
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "HTTP cache: tắt (--no-cache)"
+        s = self.stats
+        return (f"HTTP cache: tải mới {s['downloads']}, còn hạn {s['fresh_hits']}, 304 dùng lại {s['revalidated']}, "
+                f"offline {s['offline_hits']}, tiết kiệm {s['bytes_saved'] / 1024:.0f} KB, "
+                f"xoá LRU {s['evicted']} ({self.root})")
+
+# ---------- CLI dùng chung ----------
+def add_cli_args(parser, default_max_age: float = 0) -> None:
+    g = parser.add_argument_group("HTTP cache (conditional GET)")
+    g.add_argument("--cache-dir", default=None, help=f"Thư mục cache (mặc định: {DEFAULT_DIR})")
+    g.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                   help="Dung lượng tối đa của cache (MB), vượt thì xoá LRU")
+    g.add_argument("--cache-max-age", type=float, default=default_max_age,
+                   help=f"Dùng bản cache không hỏi lại server nếu tải/xác nhận trong vòng N giây "
+                        f"(mặc định: {default_max_age:g}; 0 = luôn conditional GET)")
+    g.add_argument("--no-cache", action="store_true", help="Tắt cache, luôn tải mới")
+    g.add_argument("--offline", action="store_true", help="Chỉ đọc từ cache, không gọi mạng (replay)")
+
+def from_args(args) -> HttpCache:
+    return HttpCache(root=args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024,
+                     offline=args.offline, enabled=not args.no_cache,
+                     max_age=getattr(args, "cache_max_age", 0))